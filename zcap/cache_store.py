@@ -0,0 +1,120 @@
+"""
+Small persistent key/value cache (SQLite) with TTL and size-based eviction.
+
+Used for anything that is expensive to recompute across runs (LLM responses,
+DNS answers, API lookups). Files live under CACHE_DIR, which can be a mounted
+volume (e.g. a Cloud Run GCS volume) to survive between job executions.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .config import CACHE_DIR
+
+SIZE_CHECK_EVERY = 100  # writes between size-limit enforcement passes
+
+
+class PersistentCache:
+    def __init__(self, name, max_entries=10000, default_ttl=30 * 86400):
+        self.name = name
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON cache(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key, default=None):
+        """Returns the cached value, or `default` if missing/expired/unreadable."""
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+                if not row:
+                    return default
+                value, expires_at = row
+                if expires_at and expires_at < now:
+                    db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    db.commit()
+                    return default
+                db.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+                db.commit()
+            return json.loads(value)
+        except Exception as e:
+            logging.warning(f"Cache [{self.name}] read failed: {e}")
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Stores a JSON-serialisable value. ttl in seconds (None -> default_ttl, 0 -> never expires)."""
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now + ttl if ttl else None, now)
+                )
+                db.commit()
+                self._writes += 1
+                if self._writes % SIZE_CHECK_EVERY == 0:
+                    self._enforce_limits(db, now)
+        except Exception as e:
+            logging.warning(f"Cache [{self.name}] write failed: {e}")
+
+    def delete(self, key):
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                db.commit()
+        except Exception as e:
+            logging.warning(f"Cache [{self.name}] delete failed: {e}")
+
+    def values(self):
+        """Every unexpired value (for small caches that are read back in full, e.g. training sets)."""
+        try:
+            with self._lock:
+                rows = self._db().execute(
+                    "SELECT value FROM cache WHERE expires_at IS NULL OR expires_at >= ?", (time.time(),)
+                ).fetchall()
+            return [json.loads(value) for (value,) in rows]
+        except Exception as e:
+            logging.warning(f"Cache [{self.name}] read failed: {e}")
+            return []
+
+    def _enforce_limits(self, db, now):
+        db.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        count = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count > self.max_entries:
+            # Least recently used entries go first
+            db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            logging.info(f"Cache [{self.name}] evicted {count - self.max_entries} entries (limit {self.max_entries})")
+        db.commit()
+
+    def __len__(self):
+        try:
+            with self._lock:
+                return self._db().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except Exception:
+            return 0
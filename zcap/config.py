@@ -22,12 +22,118 @@ BUILTWITH_API_KEY = os.getenv("BUILTWITH_API_KEY")
 
 # Limits
 DAILY_LEAD_TARGET = 1000  # Very high target - run continuously until manually stopped
+DISCOVERY_WORKERS = int(os.getenv("DISCOVERY_WORKERS", "4"))  # Companies processed at once (their Gemini calls share LLM_MAX_CONCURRENCY)
 GOOGLE_SEARCH_DAILY_LIMIT = 1000
-HUNTER_MONTHLY_LIMIT = 50
+HUNTER_MONTHLY_LIMIT = int(os.getenv("HUNTER_MONTHLY_LIMIT", "50"))
 
 # Quality Control
 MIN_QUALIFICATION_GRADE = 1  # Minimum grade to save lead (0-10). Set to 0 to save all leads, 6+ for quality filtering
 
+# Memory Governor (Cloud Run jobs have a hard memory ceiling)
+MEMORY_LIMIT_MB = int(os.getenv("MEMORY_LIMIT_MB", "0"))  # 0 = auto-detect from cgroup, else 2048
+MEMORY_SOFT_LIMIT_RATIO = 0.75   # Shrink browser concurrency + trim caches above this
+MEMORY_HARD_LIMIT_RATIO = 0.90   # Single browser, flush caches, recycle browsers above this
+MEMORY_SAMPLE_INTERVAL = 2.0     # Seconds between RSS samples
+BROWSER_MAX_CONCURRENCY = int(os.getenv("BROWSER_MAX_CONCURRENCY", "3"))
+
+# Scraper Worker Pool (each worker process owns one Chromium)
+SCRAPE_ISOLATION = os.getenv("SCRAPE_ISOLATION", "true").lower() == "true"
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "3"))
+SCRAPE_JOB_TIMEOUT = 180          # Hard kill (seconds) for one scrape_website job
+SCRAPE_WORKER_MAX_RSS_MB = 1024   # Recycle a worker (incl. its browser) above this
+SCRAPE_WORKER_MAX_JOBS = 50       # Recycle a worker after this many jobs
+
+# Vertex AI / Gemini Client
+LLM_MODEL_NAME = "gemini-2.0-flash-001"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # In-flight Gemini calls (keep under project QPM)
+LLM_MAX_RETRIES = 5               # Retries on 429 / RESOURCE_EXHAUSTED
+LLM_BACKOFF_BASE_SECONDS = 1.0
+LLM_BACKOFF_MAX_SECONDS = 30.0
+# LLM backend: vertex | record (vertex + write prompt/response pairs) | replay (offline, from recordings)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "vertex").lower()
+LLM_RECORD_FILE = os.getenv("LLM_RECORD_FILE", "recordings/llm_recordings.jsonl")
+LLM_REPLAY_LATENCY_MS = int(os.getenv("LLM_REPLAY_LATENCY_MS", "800"))  # Simulated per-call latency (-1 = recorded latency)
+LLM_REPLAY_JITTER_MS = int(os.getenv("LLM_REPLAY_JITTER_MS", "200"))
+LLM_REPLAY_MISS = os.getenv("LLM_REPLAY_MISS", "error")  # error | empty ("{}") for prompts never recorded
+# Extract the POC and qualify the lead in one Gemini call when a team/about page exists
+COMBINED_ANALYSIS_ENABLED = os.getenv("COMBINED_ANALYSIS_ENABLED", "true").lower() == "true"
+
+# Persistent Caches (mount a volume here to keep them across Cloud Run executions)
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+# LLM Response Cache
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+# Prompt types that may be served from cache. keyword_generation is left out on
+# purpose: variation seeds restart every run, so caching would repeat keywords.
+LLM_CACHE_PROMPT_TYPES = [t.strip() for t in os.getenv(
+    "LLM_CACHE_PROMPT_TYPES", "clean_name,clean_name_batch,extract_contacts,analyze_lead,analyze_lead_poc,personalize_outreach").split(",") if t.strip()]
+LLM_CACHE_TTL_DAYS = 30
+LLM_CACHE_MAX_ENTRIES = 20000
+
+# ICP keyword pool (background Gemini refill + local expansions)
+KEYWORD_BATCH_SIZE = 25           # Keywords searched per ICP per iteration
+KEYWORD_MAX_USAGE = 3             # Keywords used this many times are considered exhausted
+KEYWORD_POOL_LOW_WATERMARK = 30   # Refill in the background below this many pooled keywords
+KEYWORD_POOL_WORKERS = 4          # Parallel Gemini keyword generations
+KEYWORD_POOL_TTL_DAYS = 14
+
+# People search (LinkedIn X-ray via CSE): results per query, ranked locally (CSE max is 10)
+PEOPLE_SEARCH_RESULTS = 10
+PEOPLE_INDEX_TTL_DAYS = 90           # Indexed LinkedIn profiles older than this trigger a fresh search
+PEOPLE_INDEX_NEGATIVE_TTL_DAYS = 14  # Don't re-search a company that returned nobody within this window
+# Fire all decision-maker strategies at once (costs every query up front; worth it when quota isn't the limit)
+PEOPLE_SEARCH_PARALLEL = os.getenv("PEOPLE_SEARCH_PARALLEL", "false").lower() == "true"
+ENRICHMENT_PEOPLE_SEARCH_PARALLEL = os.getenv("ENRICHMENT_PEOPLE_SEARCH_PARALLEL", "true").lower() == "true"
+PEOPLE_SEARCH_STRATEGY_TIMEOUT = float(os.getenv("PEOPLE_SEARCH_STRATEGY_TIMEOUT", "10"))  # Seconds before a strategy is given up on
+PEOPLE_SEARCH_WORKERS = int(os.getenv("PEOPLE_SEARCH_WORKERS", "8"))
+
+# Rule-based title parser: titles below this confidence are escalated to Gemini
+TITLE_PARSER_MIN_CONFIDENCE = 0.85
+
+# Pre-qualification gate (local scoring before analyze_lead)
+PREQUAL_ENABLED = os.getenv("PREQUAL_ENABLED", "true").lower() == "true"
+PREQUAL_REJECT_THRESHOLD = float(os.getenv("PREQUAL_REJECT_THRESHOLD", "0.9"))  # P(low grade) needed to skip the LLM; raise for more precision
+PREQUAL_MODEL_ENABLED = os.getenv("PREQUAL_MODEL_ENABLED", "true").lower() == "true"  # Blend in NB model trained on past grades
+PREQUAL_EXAMPLES_TTL_DAYS = int(os.getenv("PREQUAL_EXAMPLES_TTL_DAYS", "365"))  # Graded sites kept as NB training examples
+PREQUAL_LOW_GRADE_MAX = 4  # Grades 1-4 = discard tier in the analysis matrix
+
+# DNS/MX resolution cache (dns_resolver.py); TTLs in seconds
+DNS_MIN_TTL = 3600                # Floor for record TTLs (MX TTLs of 5 min would defeat the cache)
+DNS_MAX_TTL = 7 * 86400
+DNS_NEGATIVE_TTL = 86400          # NXDOMAIN / NoAnswer
+DNS_TIMEOUT = float(os.getenv("DNS_TIMEOUT", "5"))
+DNS_BULK_CONCURRENCY = int(os.getenv("DNS_BULK_CONCURRENCY", "50"))
+
+# Verification stage (verification_stage.py): leads are saved "Verification Pending" and updated in place
+VERIFICATION_ASYNC = os.getenv("VERIFICATION_ASYNC", "true").lower() == "true"
+VERIFICATION_WORKERS = int(os.getenv("VERIFICATION_WORKERS", "4"))
+VERIFICATION_QUEUE_LIMIT = int(os.getenv("VERIFICATION_QUEUE_LIMIT", "50"))  # Submitters block beyond this many queued jobs
+VERIFICATION_DRAIN_TIMEOUT = 600  # Seconds to wait for outstanding verifications at shutdown
+
+# SMTP verification: one session per MX probes catch-all + every candidate pattern (RSET between)
+SMTP_VERIFY_ENABLED = os.getenv("SMTP_VERIFY_ENABLED", "true").lower() == "true"  # false where port 25 is blocked
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "5"))
+SMTP_MAX_CONCURRENT_PER_MX = int(os.getenv("SMTP_MAX_CONCURRENT_PER_MX", "2"))  # Open sessions per MX host
+SMTP_MAX_SESSIONS_PER_MX = int(os.getenv("SMTP_MAX_SESSIONS_PER_MX", "100"))   # Sessions per MX host per run (avoid blocklisting)
+
+# Mail knowledge base (mail_knowledge.py): remembered SMTP behavior per domain / MX provider
+MAIL_KB_CATCH_ALL_TTL_DAYS = 30
+MAIL_KB_GREYLIST_TTL_DAYS = 2
+MAIL_KB_BLOCKED_TTL_DAYS = 7
+MAIL_KB_PROVIDER_MIN_SESSIONS = 5   # Sessions seen before a provider-wide behavior is trusted
+MAIL_KB_PROVIDER_RATIO = 0.9        # Share of sessions that must agree
+MAIL_KB_PROVIDER_TTL_DAYS = 30
+
+# Email format learning (email_patterns.py)
+EMAIL_PATTERN_MIN_CONFIDENCE = float(os.getenv("EMAIL_PATTERN_MIN_CONFIDENCE", "0.75"))  # Domain format trusted without Hunter/SMTP
+EMAIL_PATTERN_TTL_DAYS = 180
+
+# Hunter.io response cache + monthly credit ledger (hunter_ledger.py)
+HUNTER_CACHE_TTL_DAYS = 90
+HUNTER_NEGATIVE_TTL_DAYS = 30                                     # "Not found" answers are retried sooner
+HUNTER_LEDGER_BACKEND = os.getenv("HUNTER_LEDGER_BACKEND", "gcs")  # gcs (shared across Cloud Run tasks) | local
+HUNTER_LEDGER_PREFIX = "hunter_ledger/"                           # Object prefix in BUCKET_NAME, one JSON per month
+
 # Google Sheets Integration
 ENABLE_SHEETS_SYNC = os.getenv("ENABLE_SHEETS_SYNC", "false").lower() == "true"
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")  # Extract from Google Sheets URL
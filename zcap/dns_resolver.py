@@ -0,0 +1,136 @@
+"""
+MX resolution with a persistent TTL cache (dnspython asyncio resolver).
+
+Many brands share Google Workspace / Microsoft 365 MX hosts and the same
+domains come back across runs, so answers are kept in a PersistentCache under
+CACHE_DIR for the record's own TTL (clamped to DNS_MIN_TTL..DNS_MAX_TTL).
+NXDOMAIN / NoAnswer are cached for DNS_NEGATIVE_TTL; timeouts and SERVFAIL are
+not cached. resolve_mx_bulk() resolves a whole batch of domains concurrently
+so pre-flight stages can warm the cache before verification needs it.
+"""
+
+import asyncio
+import logging
+import threading
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+from .cache_store import PersistentCache
+from .config import DNS_MIN_TTL, DNS_MAX_TTL, DNS_NEGATIVE_TTL, DNS_TIMEOUT, DNS_BULK_CONCURRENCY
+
+_cache = PersistentCache("dns_mx", max_entries=50000, default_ttl=DNS_MAX_TTL)
+_lock = threading.Lock()
+_stats = {"hits": 0, "negative_hits": 0, "lookups": 0, "failures": 0}
+
+
+def _normalize(domain):
+    domain = (domain or "").lower().strip().rstrip(".")
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def _bump(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def _cached(domain):
+    """(hit, hosts) from the persistent cache."""
+    entry = _cache.get(domain)
+    if entry is None:
+        return False, None
+    _bump("hits" if entry["hosts"] else "negative_hits")
+    return True, entry["hosts"]
+
+
+def _store_answer(domain, answer):
+    hosts = [r.exchange.to_text().rstrip(".").lower() for r in sorted(answer, key=lambda r: r.preference)]
+    hosts = [h for h in hosts if h]  # null MX ("0 .") means the domain accepts no mail
+    ttl = min(max(answer.rrset.ttl, DNS_MIN_TTL), DNS_MAX_TTL)
+    _cache.set(domain, {"hosts": hosts}, ttl=ttl)
+    return hosts
+
+
+def _store_negative(domain, error):
+    logging.debug(f"No MX for {domain}: {error}")
+    _cache.set(domain, {"hosts": []}, ttl=DNS_NEGATIVE_TTL)
+    return []
+
+
+def _resolver(resolver_cls):
+    resolver = resolver_cls()
+    resolver.lifetime = DNS_TIMEOUT
+    return resolver
+
+
+def resolve_mx(domain):
+    """
+    MX hosts for a domain, best preference first ([] when it has none).
+    Blocking; served from the cache when possible.
+    """
+    domain = _normalize(domain)
+    if not domain:
+        return []
+    hit, hosts = _cached(domain)
+    if hit:
+        return hosts
+
+    _bump("lookups")
+    try:
+        return _store_answer(domain, _resolver(dns.resolver.Resolver).resolve(domain, "MX"))
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+        return _store_negative(domain, e)
+    except (dns.exception.DNSException, OSError) as e:
+        _bump("failures")
+        logging.warning(f"Could not get MX record for {domain}: {e}")
+        return []
+
+
+async def resolve_mx_async(domain, resolver=None):
+    """Async resolve_mx (dns.asyncresolver); pass a shared resolver for batches."""
+    domain = _normalize(domain)
+    if not domain:
+        return []
+    hit, hosts = _cached(domain)
+    if hit:
+        return hosts
+
+    _bump("lookups")
+    try:
+        resolver = resolver or _resolver(dns.asyncresolver.Resolver)
+        return _store_answer(domain, await resolver.resolve(domain, "MX"))
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+        return _store_negative(domain, e)
+    except (dns.exception.DNSException, OSError) as e:
+        _bump("failures")
+        logging.warning(f"Could not get MX record for {domain}: {e}")
+        return []
+
+
+async def resolve_mx_bulk_async(domains, concurrency=DNS_BULK_CONCURRENCY):
+    """{domain: [mx hosts]} for every domain, at most `concurrency` queries in flight."""
+    resolver = _resolver(dns.asyncresolver.Resolver)
+    slots = asyncio.Semaphore(concurrency)
+    unique = list(dict.fromkeys(_normalize(d) for d in domains if _normalize(d)))
+
+    async def one(domain):
+        async with slots:
+            return domain, await resolve_mx_async(domain, resolver)
+
+    return dict(await asyncio.gather(*(one(d) for d in unique)))
+
+
+def resolve_mx_bulk(domains, concurrency=DNS_BULK_CONCURRENCY):
+    """Blocking wrapper around resolve_mx_bulk_async for threaded pipeline code."""
+    if not domains:
+        return {}
+    results = asyncio.run(resolve_mx_bulk_async(domains, concurrency))
+    resolved = sum(1 for hosts in results.values() if hosts)
+    logging.info(f"📮 MX pre-flight: {resolved}/{len(results)} domains have mail servers")
+    return results
+
+
+def get_dns_stats():
+    with _lock:
+        return dict(_stats)
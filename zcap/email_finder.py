@@ -1,23 +1,90 @@
 import re
+import json
+import html as html_lib
 import logging
-from .scraping import scrape_with_playwright, scrape_with_jina
-from urllib.parse import urljoin
+from .scraping import fetch_html, scrape_with_jina
+from urllib.parse import urljoin, unquote
+
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+MAILTO_RE = re.compile(r'mailto:([^"\'?>\s]+)', re.I)
+# Cloudflare email obfuscation: data-cfemail="HEX" or href="/cdn-cgi/l/email-protection#HEX"
+CFEMAIL_RE = re.compile(r'(?:data-cfemail=["\']|email-protection#)([0-9a-fA-F]{4,})')
+# "jane [at] brand [dot] com", "jane(at)brand.com", "jane {at} brand {dot} co {dot} uk"
+AT_FORM_RE = re.compile(
+    r'\b([A-Za-z0-9._%+-]+)\s*[\[\(\{]\s*at\s*[\]\)\}]\s*'
+    r'([A-Za-z0-9-]+(?:\s*(?:[\[\(\{]\s*dot\s*[\]\)\}]|\.)\s*[A-Za-z0-9-]+)+)', re.I)
+AT_DOT_RE = re.compile(r'\s*(?:[\[\(\{]\s*dot\s*[\]\)\}]|\.)\s*', re.I)
+JSON_LD_RE = re.compile(r'<script[^>]+application/ld\+json[^>]*>(.*?)</script>', re.I | re.S)
+
+# Filter out common generic/support emails
+EXCLUDE_KEYWORDS = ['support', 'info', 'hello', 'contact', 'admin', 'noreply', 'sales', 'marketing']
+# Asset names (logo@2x.png) and third-party/placeholder addresses embedded in themes and scripts
+ASSET_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.css', '.js')
+IGNORE_EMAIL_DOMAINS = ('sentry.io', 'sentry-next.wixpress.com', 'wixpress.com', 'example.com', 'domain.com',
+                        'email.com', 'yourdomain.com', 'shopify.com')
+
+CONTACT_PATHS = ['/contact', '/contact-us', '/about', '/about-us', '/team', '/our-story']
+MAX_CONTACT_PAGES = 3  # raw HTTP fetches are cheap, but stop early on the first personal address
+
+def is_personal_email(email):
+    local_part = email.split('@')[0].lower()
+    return not any(keyword in local_part for keyword in EXCLUDE_KEYWORDS)
+
+def _clean_email(email):
+    email = unquote(email).strip().strip('.').lower()
+    if not EMAIL_RE.fullmatch(email) or email.endswith(ASSET_SUFFIXES):
+        return None
+    domain = email.split('@')[1]
+    if any(domain == d or domain.endswith('.' + d) for d in IGNORE_EMAIL_DOMAINS):
+        return None
+    return email
 
 def extract_emails_from_text(text):
     """Extract email addresses from text using regex."""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, text)
-    
-    # Filter out common generic/support emails
-    exclude_keywords = ['support', 'info', 'hello', 'contact', 'admin', 'noreply', 'sales', 'marketing']
-    filtered_emails = []
-    
-    for email in emails:
-        local_part = email.split('@')[0].lower()
-        if not any(keyword in local_part for keyword in exclude_keywords):
-            filtered_emails.append(email)
-    
-    return filtered_emails
+    return [email for email in EMAIL_RE.findall(text) if is_personal_email(email)]
+
+def decode_cfemail(encoded):
+    """Cloudflare's XOR obfuscation: first byte is the key for the rest."""
+    try:
+        key = int(encoded[:2], 16)
+        return "".join(chr(int(encoded[i:i + 2], 16) ^ key) for i in range(2, len(encoded), 2))
+    except ValueError:
+        return None
+
+def _json_ld_emails(node):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key.lower() == 'email' and isinstance(value, str):
+                yield value.replace('mailto:', '')
+            else:
+                yield from _json_ld_emails(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _json_ld_emails(item)
+
+def extract_emails_from_html(html):
+    """
+    Every address in raw HTML, deduped, in this order: mailto links, Cloudflare
+    data-cfemail, JSON-LD "email" fields, "[at]/[dot]" forms and plain text
+    (after HTML entity decoding). Generic inboxes are kept; see is_personal_email.
+    """
+    if not html:
+        return []
+    found = []
+    found.extend(MAILTO_RE.findall(html))
+    found.extend(filter(None, (decode_cfemail(code) for code in CFEMAIL_RE.findall(html))))
+    for block in JSON_LD_RE.findall(html):
+        try:
+            found.extend(_json_ld_emails(json.loads(block.strip())))
+        except ValueError:
+            continue
+    text = html_lib.unescape(html)
+    for local, domain in AT_FORM_RE.findall(text):
+        found.append(f"{local}@{AT_DOT_RE.sub('.', domain)}")
+    found.extend(EMAIL_RE.findall(text))
+
+    cleaned = (_clean_email(email) for email in found)
+    return list(dict.fromkeys(email for email in cleaned if email))
 
 def extract_name_from_email(email):
     """
@@ -49,52 +116,36 @@ def extract_name_from_email(email):
         pass
     return None
 
-def find_email_on_website(base_url):
+def _rank_for_person(emails, first_name=None, last_name=None):
+    """Addresses matching the person's name first (first.last, flast, ...), page order otherwise."""
+    if not first_name:
+        return emails
+    from .email_patterns import infer_patterns
+    return sorted(emails, key=lambda email: not infer_patterns(email, first_name, last_name))
+
+def find_email_on_website(base_url, html=None, first_name=None, last_name=None):
     """
-    Scrape contact/about pages to find email addresses.
-    Uses in-house Playwright scraper (free, unlimited).
+    Finds personal email addresses on the homepage and contact/about pages
+    from raw HTML (pooled HTTP, or `html` already fetched for base_url), with
+    no browser render. Stops at the first page yielding a personal address.
     """
-    common_contact_paths = [
-        '/contact',
-        '/contact-us',
-        '/about',
-        '/about-us',
-        '/team',
-        '/our-story'
-    ]
-    
-    all_emails = []
-    
-    # Try scraping main page first
-    logging.info(f"Scraping {base_url} for emails...")
-    text = scrape_with_playwright(base_url)
-    if not text:
+    pages = [base_url] + [urljoin(base_url, path) for path in CONTACT_PATHS[:MAX_CONTACT_PAGES]]
+    personal = []
+    fetched_any = False
+
+    for url in pages:
+        page_html = html if (url == base_url and html) else fetch_html(url, timeout=5)[0]
+        if not page_html:
+            continue
+        fetched_any = True
+        personal = [email for email in extract_emails_from_html(page_html) if is_personal_email(email)]
+        if personal:  # Stop if we found emails
+            logging.info(f"✓ Found {len(personal)} email(s) on {url}: {personal}")
+            break
+
+    # Sites that refuse plain HTTP: one rendered-text pass through Jina instead of a browser
+    if not fetched_any:
         text = scrape_with_jina(base_url)
-    
-    if text:
-        emails = extract_emails_from_text(text)
-        all_emails.extend(emails)
-    
-    # Try common contact pages
-    for path in common_contact_paths[:2]:  # Limit to 2 pages
-        contact_url = urljoin(base_url, path)
-        logging.info(f"Trying {contact_url}...")
-        
-        text = scrape_with_playwright(contact_url)
-        if not text:
-            text = scrape_with_jina(contact_url)
-        
-        if text:
-            emails = extract_emails_from_text(text)
-            all_emails.extend(emails)
-            
-            if emails:  # Stop if we found emails
-                break
-    
-    # Deduplicate
-    unique_emails = list(set(all_emails))
-    
-    if unique_emails:
-        logging.info(f"✓ Found {len(unique_emails)} email(s) on website: {unique_emails}")
-    
-    return unique_emails
+        personal = list(dict.fromkeys(e.lower() for e in extract_emails_from_text(text or "")))
+
+    return _rank_for_person(personal, first_name, last_name)
@@ -0,0 +1,177 @@
+"""
+Per-domain email format learning.
+
+Every trustworthy address we see for a named person (Hunter results, SMTP
+Valid answers, emails scraped from the site, verified rows in
+Master_Leads.csv) reveals the local-part format the company uses
+(first.last, flast, ...). Observations are kept per domain under CACHE_DIR,
+and per MX provider as a weaker prior, so verify_lead can build the address
+from a known format before spending a Hunter credit or an SMTP session.
+"""
+
+import csv
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+from .cache_store import PersistentCache
+from .config import EMAIL_PATTERN_MIN_CONFIDENCE, EMAIL_PATTERN_TTL_DAYS, OUTPUT_FILE
+from .mail_knowledge import provider_for_mx
+
+# Ordered like the old generate_emails list (most common first); the last two are rarer
+EMAIL_FORMATS = {
+    "first": "{f}",
+    "first.last": "{f}.{l}",
+    "firstlast": "{f}{l}",
+    "first_last": "{f}_{l}",
+    "last.first": "{l}.{f}",
+    "flast": "{fi}{l}",
+    "f.last": "{fi}.{l}",
+    "firstl": "{f}{li}",
+    "last": "{l}",
+}
+SOURCE_WEIGHTS = {"smtp": 4, "hunter": 2, "scraped": 2, "history": 2}
+# Master_Leads.csv statuses whose email came from a real source, not a guess
+TRUSTED_STATUSES = ("Website Scrape", "Hunter.io", "SMTP Verified")
+PROVIDER_MAX_DOMAINS = 500
+PROVIDER_DAMPING = 5
+
+_cache = PersistentCache("email_patterns", max_entries=50000, default_ttl=EMAIL_PATTERN_TTL_DAYS * 86400)
+_lock = threading.Lock()
+_seeded = False
+_stats = {"observed": 0, "predictions": 0, "confident": 0}
+
+
+def _clean(name):
+    name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def render(pattern, first, last, domain):
+    """Email for a format name, or None when the name parts don't allow it."""
+    f, l = _clean(first), _clean(last)
+    template = EMAIL_FORMATS[pattern]
+    if not f or ("{l" in template and not l):
+        return None
+    return f"{template.format(f=f, l=l, fi=f[0], li=l[:1])}@{domain.lower()}"
+
+
+def formats_for(first, last):
+    """Format names that can be rendered for this person, in EMAIL_FORMATS order."""
+    return [p for p in EMAIL_FORMATS if render(p, first, last, "x")]
+
+
+def infer_patterns(email, first, last):
+    """Format names whose rendering equals the address's local part ([] if none match)."""
+    if not email or "@" not in email:
+        return []
+    local = email.lower().split("@")[0]
+    return [p for p in formats_for(first, last) if render(p, first, last, "x").split("@")[0] == local]
+
+
+def observe(email, first, last, source, mx_host=None):
+    """Records an address seen for a named person. Unrecognised formats are ignored."""
+    patterns = infer_patterns(email, first, last)
+    if not patterns:
+        return None
+    domain = email.lower().split("@")[1]
+    weight = SOURCE_WEIGHTS.get(source, 1)
+    with _lock:
+        entry = _cache.get(f"d:{domain}") or {"emails": {}}
+        # Keyed by address so re-observing the same email never inflates the count
+        previous = entry["emails"].get(email.lower(), [[], 0])
+        entry["emails"][email.lower()] = [patterns, max(weight, previous[1])]
+        _cache.set(f"d:{domain}", entry)
+        if mx_host:
+            key = f"p:{provider_for_mx(mx_host)}"
+            provider = _cache.get(key) or {"domains": {}}
+            provider["domains"][domain] = _top(entry)[0]
+            if len(provider["domains"]) > PROVIDER_MAX_DOMAINS:
+                provider["domains"].pop(next(iter(provider["domains"])))
+            _cache.set(key, provider)
+        _stats["observed"] += 1
+    return patterns
+
+
+def _top(entry):
+    """(best format, confidence) from a domain entry's observed emails."""
+    scores = {}
+    for patterns, weight in entry["emails"].values():
+        for pattern in patterns:  # ambiguous addresses split their weight
+            scores[pattern] = scores.get(pattern, 0) + weight / len(patterns)
+    if not scores:
+        return None, 0.0
+    best = max(scores, key=scores.get)
+    return best, scores[best] / (sum(scores.values()) + 1)
+
+
+def seed_from_history(path=OUTPUT_FILE):
+    """Learns from emails in past leads whose status shows they were found, not guessed (once per process)."""
+    global _seeded
+    with _lock:
+        if _seeded:
+            return
+        _seeded = True
+    if not os.path.exists(path):
+        return
+    learned = 0
+    try:
+        with open(path, mode="r", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                status = row.get("Status") or ""
+                if any(s in status for s in TRUSTED_STATUSES) and "Guess" not in status:
+                    if observe(row.get("Email"), row.get("First Name"), row.get("Last Name"), "history"):
+                        learned += 1
+    except Exception as e:
+        logging.warning(f"Email pattern seeding failed: {e}")
+        return
+    logging.info(f"📐 Email patterns: learned {learned} formats from {path}")
+
+
+def predict(first, last, domain, mx_host=None):
+    """
+    Most likely address for this person: (email, pattern, confidence, source)
+    where source is 'domain' or 'provider', or None without usable evidence.
+    Formats the name can't render (no last name) are skipped.
+    """
+    seed_from_history()
+    renderable = set(formats_for(first, last))
+    with _lock:
+        _stats["predictions"] += 1
+
+    entry = _cache.get(f"d:{domain.lower()}")
+    if entry:
+        pattern, confidence = _top(entry)
+        if pattern in renderable:
+            if confidence >= EMAIL_PATTERN_MIN_CONFIDENCE:
+                with _lock:
+                    _stats["confident"] += 1
+            return render(pattern, first, last, domain), pattern, round(confidence, 2), "domain"
+
+    if mx_host:
+        provider = _cache.get(f"p:{provider_for_mx(mx_host)}")
+        if provider and provider["domains"]:
+            counts = {}
+            for pattern in provider["domains"].values():
+                counts[pattern] = counts.get(pattern, 0) + 1
+            n = len(provider["domains"])
+            ranked = sorted((p for p in counts if p in renderable), key=counts.get, reverse=True)
+            if ranked:
+                # Share of the provider's domains using it, damped while few domains are known
+                confidence = counts[ranked[0]] / (n + PROVIDER_DAMPING)
+                return render(ranked[0], first, last, domain), ranked[0], round(confidence, 2), "provider"
+    return None
+
+
+def rank_candidates(candidates, prediction):
+    """Moves the predicted address to the front of a generate_emails list."""
+    if not prediction or prediction[0] not in candidates:
+        return candidates
+    return [prediction[0]] + [c for c in candidates if c != prediction[0]]
+
+
+def get_pattern_stats():
+    with _lock:
+        return dict(_stats)
@@ -1,15 +1,27 @@
 import csv
 import logging
+import math
 import os
+from collections import OrderedDict
 from urllib.parse import urlparse
 from datetime import datetime
 
-from .sheets_sync import sync_enriched_lead_to_sheet, get_enrichment_sheet_rows
-from .scraping import scrape_website
+from .sheets_sync import sync_enriched_lead_to_sheet, get_enrichment_sheet_rows, update_lead_in_sheet
+from .scrape_pool import scrape_website_isolated, shutdown_scrape_pool
 from .intelligence import analyze_lead
-from .verification import verify_lead
-from .identification import search_decision_maker   # ✅ FIXED
-from .config import check_config
+from .prequalification import prequalify, record_graded
+from .signal_extractor import extract_signals
+from .verification_stage import (
+    VERIFICATION_PENDING, submit_verification, drain_verification, shutdown_verification_stage, log_verification_stats
+)
+from .hunter_ledger import log_hunter_stats
+from .identification import search_decision_maker, shutdown_people_search, log_strategy_stats   # ✅ FIXED
+from .config import check_config, ENRICHMENT_PEOPLE_SEARCH_PARALLEL
+from .text_condenser import condense_scraped
+from .llm_cache import get_llm_cache_stats
+from .llm_telemetry import company_scope, write_llm_report
+from .dedup import get_run_timestamp
+from .memory_governor import register_cache, stage, start_governor, stop_governor, log_memory_summary
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import re
@@ -31,9 +43,40 @@ FIELDNAMES = [
 logging.basicConfig(level=logging.INFO,
     format="%(asctime)s — %(levelname)s — %(message)s")
 
-SCRAPE_CACHE = {}
+SCRAPE_CACHE = OrderedDict()  # url -> scraped data, LRU order
+SCRAPE_CACHE_MAX_ENTRIES = 200
 SCRAPE_LOCK = threading.Lock()
 MAX_WORKERS = 5
+SHEET_ROWS = {}  # id(result) -> Sheets range of its row, for in-place verification updates
+SHEET_LOCK = threading.Lock()
+
+
+def get_cached_scrape(url):
+    with SCRAPE_LOCK:
+        scraped = SCRAPE_CACHE.get(url)
+        if scraped is not None:
+            SCRAPE_CACHE.move_to_end(url)
+        return scraped
+
+
+def cache_scrape(url, scraped):
+    with SCRAPE_LOCK:
+        SCRAPE_CACHE[url] = scraped
+        SCRAPE_CACHE.move_to_end(url)
+        while len(SCRAPE_CACHE) > SCRAPE_CACHE_MAX_ENTRIES:
+            SCRAPE_CACHE.popitem(last=False)
+
+
+def evict_scrape_cache(fraction):
+    """Drops the least recently used fraction of SCRAPE_CACHE (memory governor hook)."""
+    with SCRAPE_LOCK:
+        count = min(len(SCRAPE_CACHE), math.ceil(len(SCRAPE_CACHE) * fraction))
+        for _ in range(count):
+            SCRAPE_CACHE.popitem(last=False)
+    return count
+
+
+register_cache("scrape_cache", evict_scrape_cache)
 
 
 # ---------------------------------------------------
@@ -131,15 +174,18 @@ def generate_from_company_row(row):
     logging.info(f"🔎 Generating lead for company: {company}")
 
     # 1️⃣ Discover website
-    website = discover_company_website(company)
+    with stage("discovery"):
+        website = discover_company_website(company)
     if not website:
         logging.warning(f"❌ Website not found for {company}")
         return build_blocked_record("", "", "", company, row, "Website Not Found")
 
     # 2️⃣ Scrape and Validate
-    scraped_preview = scrape_website(website)
+    with stage("scrape"):
+        scraped_preview = scrape_website_isolated(website)
     if not scraped_preview or not scraped_preview.get("text"):
         return build_blocked_record("", "", "", company, row, "Website Scrape Failed")
+    cache_scrape(website, scraped_preview)  # enrich_row reuses it instead of re-scraping
 
     if not validate_website_matches_company(
         company,
@@ -149,10 +195,12 @@ def generate_from_company_row(row):
         return build_blocked_record("", "", "", company, row, "Website Identity Mismatch")
 
     # 3️⃣ Find decision maker
-    person = search_decision_maker(
-        company_name=company,
-        company_url=website
-    )
+    with stage("people_search"):
+        person = search_decision_maker(
+            company_name=company,
+            company_url=website,
+            parallel=ENRICHMENT_PEOPLE_SEARCH_PARALLEL
+        )
 
     if not person:
         # We still want to log the company in the sheet even if no person is found
@@ -193,11 +241,7 @@ def split_name(full_name):
 
 
 def build_combined_text(scraped):
-    text = scraped.get("text", "")
-    for k in ["about_text", "press_text", "careers_text"]:
-        if scraped.get(k):
-            text += "\n" + scraped[k]
-    return text[:15000]
+    return condense_scraped(scraped, limit=15000)
 
 
 def build_blocked_record(first, last, title, company, row, reason):
@@ -242,40 +286,39 @@ def enrich_row(row):
     url = row.get("Discovered Website")
 
     # --- Scrape Logic ---
-    with SCRAPE_LOCK:
-        scraped = SCRAPE_CACHE.get(url)
+    scraped = get_cached_scrape(url)
     if not scraped:
-        scraped = scrape_website(url)
-        with SCRAPE_LOCK:
-            SCRAPE_CACHE[url] = scraped
+        with stage("scrape"):
+            scraped = scrape_website_isolated(url)
+        cache_scrape(url, scraped)
 
     if not scraped or not scraped.get("text"):
         return build_blocked_record(first, last, title, company, row, "Scrape Failed")
 
+    if prequalify(scraped, company_name=company)["reject"]:
+        return build_blocked_record(first, last, title, company, row, "Pre-Qualification Rejected")
+
     combined = build_combined_text(scraped)
     dm = {"first_name": first, "last_name": last, "title": title, "linkedin_url": linkedin_url}
 
     # --- Analysis Logic ---
-    analysis = analyze_lead(company, combined, dm)
+    with stage("analysis"):
+        analysis = analyze_lead(company, combined, dm,
+                                structured_facts=scraped.get("structured_facts"),
+                                signals=extract_signals(scraped))
     if not analysis:
         return build_blocked_record(first, last, title, company, row, "Analysis Failed")
 
     domain = urlparse(url).netloc.replace("www.", "")
-    email, status = verify_lead(first, last, domain, company_url=url)
-
-    # Validate email domain
-    if email:
-        email_domain = email.split("@")[-1].lower()
-        if email_domain != domain.lower():
-            logging.warning(f"❌ Email domain mismatch: {email_domain} vs {domain}")
-            return build_blocked_record(first, last, title, company, row, "Email Domain Mismatch")
+    record_graded(domain, scraped, analysis.get("qualification_grade"))
 
     # --- THE MAPPING (Must match FIELDNAMES exactly) ---
-    return {
+    # Email/Status are filled in by the verification stage (finish_verification)
+    lead = {
         "First Name": first,
         "Last Name": last,
         "Title": title,
-        "Email": email or "Not Found",
+        "Email": "",
         "LinkedIn URL": linkedin_url,
         "Company": company,
         "Company Info": analysis.get("company_info", ""),
@@ -283,7 +326,7 @@ def enrich_row(row):
         "Why Good?": analysis.get("why_good", ""),
         "Pain_Point": analysis.get("pain_point", ""),
         "Icebreaker": analysis.get("icebreaker", ""),
-        "Status": status or "Processed",
+        "Status": VERIFICATION_PENDING,
         "Recent updates": analysis.get("recent_updates", ""),
         "Keyword": "Enrichment",
         "Employee Count": analysis.get("employee_count", ""),
@@ -300,6 +343,35 @@ def enrich_row(row):
         "Shipping Locations": analysis.get("shipping_locations", ""),
         "Timestamp": datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
     }
+    submit_verification(
+        company, first, last, domain, url,
+        on_done=lambda email, status: finish_verification(lead, row, domain, email, status),
+        html=scraped.get("html")
+    )
+    return lead
+
+
+def finish_verification(lead, row, domain, email, status):
+    """
+    Verification callback: fills Email/Status in place (blocking the row on an
+    email domain mismatch) and rewrites its Sheets row if already synced.
+    """
+    # Validate email domain
+    if email and email.split("@")[-1].lower() != domain.lower():
+        logging.warning(f"❌ Email domain mismatch: {email.split('@')[-1].lower()} vs {domain}")
+        updates = build_blocked_record(lead["First Name"], lead["Last Name"], lead["Title"], lead["Company"],
+                                       row, "Email Domain Mismatch")
+    else:
+        updates = {"Email": email or "Not Found", "Status": status or "Processed"}
+
+    with SHEET_LOCK:
+        lead.update(updates)
+        sheet_range = SHEET_ROWS.get(id(lead))
+        snapshot = dict(lead)
+    if sheet_range:
+        update_lead_in_sheet(sheet_range, snapshot)
+
+
 def load_processed_companies():
     processed = set()
 
@@ -349,7 +421,7 @@ def run_enrichment():
                     continue
 
                 futures.append(
-                    pool.submit(generate_from_company_row, row)
+                    pool.submit(run_in_company_scope, generate_from_company_row, row)
                 )
 
         # -----------------------------
@@ -374,12 +446,12 @@ def run_enrichment():
                 }
 
                 futures.append(
-                    pool.submit(enrich_row, processing_row)
+                    pool.submit(run_in_company_scope, enrich_row, processing_row)
                 )
 
         else:
             logging.error("Unsupported CSV mode detected.")
-            return
+            return 0
 
         # -----------------------------
         # Sync Results
@@ -391,12 +463,25 @@ def run_enrichment():
                 continue
 
             logging.info(f"📤 Syncing to sheet: {result.get('Company')}")
-            sync_enriched_lead_to_sheet(result)
+            # Under SHEET_LOCK so a verification finishing now either lands in this write or updates the row after
+            with SHEET_LOCK:
+                SHEET_ROWS[id(result)] = sync_enriched_lead_to_sheet(result)
             out_rows.append(result)
 
+    # The CSV is written once, after pending verifications have filled in Email/Status
+    drain_verification()
     if out_rows:
         write_output(out_rows)
 
+    # Leads that made it through (blocked records are still written for the sheet)
+    return sum(1 for r in out_rows if not str(r.get("Status", "")).startswith("Blocked"))
+
+
+def run_in_company_scope(fn, row):
+    """Runs fn(row) with its LLM calls attributed to the row's company (llm_telemetry)."""
+    with company_scope(extract_company_from_row(row)):
+        return fn(row)
+
 
 def write_output(rows):
     exists = os.path.exists(OUTPUT_FILE)
@@ -410,7 +495,22 @@ def write_output(rows):
 def main():
     check_config()
     logging.info("🚀 Enrichment run started (Cloud Run)")
-    run_enrichment()
+    start_governor()
+    leads_saved = 0
+    try:
+        leads_saved = run_enrichment()
+    finally:
+        shutdown_verification_stage()
+        shutdown_scrape_pool()
+        shutdown_people_search()
+        stop_governor()
+        log_memory_summary()
+        log_strategy_stats()
+        log_verification_stats()
+        log_hunter_stats()
+        for prompt_type, cache in get_llm_cache_stats().items():
+            logging.info(f"💾 LLM cache [{prompt_type}]: {cache['hits']} hits / {cache['misses']} misses")
+        write_llm_report(f"logs/llm_report_enrichment_{get_run_timestamp()}.json", leads_saved)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+"""
+Hunter.io response cache and monthly credit ledger.
+
+Responses are cached per (domain, first, last) under CACHE_DIR, so reruns and
+repeated enrichment rows don't spend credits twice. Credits spent are counted
+in a per-month JSON ledger shared by every Cloud Run task: a GCS object in
+BUCKET_NAME updated with generation preconditions (compare-and-swap), or a
+local PersistentCache entry when GCS isn't available. Once the month's
+HUNTER_MONTHLY_LIMIT is reached, Hunter is skipped without a network call.
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from .cache_store import PersistentCache
+from .config import (
+    BUCKET_NAME, HUNTER_MONTHLY_LIMIT, HUNTER_CACHE_TTL_DAYS, HUNTER_NEGATIVE_TTL_DAYS,
+    HUNTER_LEDGER_BACKEND, HUNTER_LEDGER_PREFIX
+)
+
+LEDGER_RETRIES = 8  # compare-and-swap attempts before giving up on a ledger update
+
+_responses = PersistentCache("hunter_responses", max_entries=50000, default_ttl=HUNTER_CACHE_TTL_DAYS * 86400)
+_local_ledger = PersistentCache("hunter_ledger", max_entries=100, default_ttl=0)
+_lock = threading.Lock()
+_exhausted_month = None  # set once the ledger says the budget is gone; skips further ledger reads
+_bucket = None
+_stats = {"api_calls": 0, "cache_hits": 0, "quota_skips": 0}
+
+
+def _month():
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def response_key(domain, first_name, last_name):
+    return "|".join(part.strip().lower() for part in (domain or "", first_name or "", last_name or ""))
+
+
+def get_cached_response(domain, first_name, last_name):
+    """Cached {"email", "score"} (email None = Hunter found nothing), or None on a miss."""
+    cached = _responses.get(response_key(domain, first_name, last_name))
+    if cached is not None:
+        with _lock:
+            _stats["cache_hits"] += 1
+    return cached
+
+
+def cache_response(domain, first_name, last_name, email, score=0):
+    ttl_days = HUNTER_CACHE_TTL_DAYS if email else HUNTER_NEGATIVE_TTL_DAYS
+    _responses.set(response_key(domain, first_name, last_name), {"email": email, "score": score},
+                   ttl=ttl_days * 86400)
+
+
+def _get_bucket():
+    """GCS bucket for the shared ledger, or None (local ledger) when GCS isn't usable."""
+    global _bucket
+    if HUNTER_LEDGER_BACKEND != "gcs":
+        return None
+    if _bucket is None:
+        try:
+            # Imported here so local runs work without the GCS client installed
+            from google.cloud import storage
+            _bucket = storage.Client().bucket(BUCKET_NAME)
+        except Exception as e:
+            logging.warning(f"Hunter ledger: GCS unavailable ({e}), using local ledger")
+            _bucket = False
+    return _bucket or None
+
+
+def _update_gcs(bucket, month, delta):
+    """Applies delta to the month's count with if_generation_match. Returns the new count or None."""
+    from google.api_core.exceptions import NotFound, PreconditionFailed
+
+    blob = bucket.blob(f"{HUNTER_LEDGER_PREFIX}{month}.json")
+    for attempt in range(LEDGER_RETRIES):
+        try:
+            blob.reload()
+            generation = blob.generation
+            ledger = json.loads(blob.download_as_text(if_generation_match=generation))
+        except NotFound:
+            generation, ledger = 0, {"used": 0}  # 0 = only create if still missing
+        except PreconditionFailed:
+            continue  # rewritten between reload and download
+
+        if delta > 0 and ledger["used"] + delta > HUNTER_MONTHLY_LIMIT:
+            return None
+        ledger["used"] = max(0, ledger["used"] + delta)
+        ledger["updated_at"] = datetime.now(timezone.utc).isoformat()
+        try:
+            blob.upload_from_string(json.dumps(ledger), content_type="application/json",
+                                    if_generation_match=generation)
+            return ledger["used"]
+        except PreconditionFailed:
+            time.sleep(0.05 * (attempt + 1))  # another task won the race; re-read and retry
+    raise RuntimeError(f"ledger {month} still contended after {LEDGER_RETRIES} attempts")
+
+
+def _update_local(month, delta):
+    with _lock:
+        used = (_local_ledger.get(month) or {"used": 0})["used"]
+        if delta > 0 and used + delta > HUNTER_MONTHLY_LIMIT:
+            return None
+        used = max(0, used + delta)
+        _local_ledger.set(month, {"used": used})
+        return used
+
+
+def _update_ledger(month, delta):
+    bucket = _get_bucket()
+    if bucket:
+        try:
+            return _update_gcs(bucket, month, delta)
+        except Exception as e:
+            logging.warning(f"Hunter ledger: GCS update failed ({e}), using local ledger")
+    return _update_local(month, delta)
+
+
+def reserve_credit():
+    """
+    Claims one Hunter credit for this month before the API call. False (with
+    no further ledger reads this run) once HUNTER_MONTHLY_LIMIT is used up.
+    """
+    global _exhausted_month
+    month = _month()
+    if _exhausted_month == month:
+        with _lock:
+            _stats["quota_skips"] += 1
+        return False
+
+    used = _update_ledger(month, 1)
+    if used is None:
+        _exhausted_month = month
+        with _lock:
+            _stats["quota_skips"] += 1
+        logging.warning(f"🛑 Hunter monthly quota ({HUNTER_MONTHLY_LIMIT}) used up for {month}, skipping Hunter")
+        return False
+    with _lock:
+        _stats["api_calls"] += 1
+    logging.info(f"Hunter credit {used}/{HUNTER_MONTHLY_LIMIT} for {month}")
+    return True
+
+
+def mark_exhausted():
+    """Hunter itself reported the plan quota used up (HTTP 429); stop calling it this month."""
+    global _exhausted_month
+    _exhausted_month = _month()
+    logging.warning(f"🛑 Hunter reports its quota used up for {_exhausted_month}, skipping Hunter")
+
+
+def release_credit():
+    """Returns a reserved credit when the call failed before Hunter could charge it."""
+    _update_ledger(_month(), -1)
+    with _lock:
+        _stats["api_calls"] -= 1
+
+
+def get_hunter_stats():
+    with _lock:
+        return dict(_stats, credits_saved=_stats["cache_hits"])
+
+
+def log_hunter_stats():
+    stats = get_hunter_stats()
+    logging.info(f"🎯 Hunter: {stats['api_calls']} credits spent, {stats['credits_saved']} saved by cache, "
+                 f"{stats['quota_skips']} lookups skipped (monthly quota)")
@@ -1,8 +1,15 @@
 import requests
 import logging
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from urllib.parse import urlparse
-from .config import GOOGLE_SEARCH_API_KEY, GOOGLE_SEARCH_CX_PEOPLE
+from .config import (
+    GOOGLE_SEARCH_API_KEY, GOOGLE_SEARCH_CX_PEOPLE, PEOPLE_SEARCH_RESULTS,
+    PEOPLE_SEARCH_PARALLEL, PEOPLE_SEARCH_STRATEGY_TIMEOUT, PEOPLE_SEARCH_WORKERS
+)
+from .people_index import add_profiles, lookup_company, lookup_person, recently_empty, record_search, search_key
 from googleapiclient.discovery import build
 
 BAD_DOMAIN_KEYWORDS = [
@@ -93,181 +100,332 @@ def is_valid_name(name):
 
     return True
 
-def execute_search_strategy(service, query, domain, strategy_name):
-    """Helper to execute a single search strategy and process results."""
-    logging.info(f"Strategy [{strategy_name}]: {query}")
-    
-    try:
-        res = service.cse().list(q=query, cx=GOOGLE_SEARCH_CX_PEOPLE, num=3).execute()
-        items = res.get('items', [])
-        
-        if not items:
-            return None
+SENIORITY_RULES = [
+    (re.compile(r"\b(co-?founder|founder|founding)\b", re.I), 100),
+    (re.compile(r"\b(ceo|chief executive)\b", re.I), 90),
+    (re.compile(r"\b(owner|president|principal|managing director)\b", re.I), 85),
+    (re.compile(r"\b(coo|chief operating|head of operations|director of operations|vp,? (of )?operations)\b", re.I), 80),
+    (re.compile(r"\b(logistics|supply chain|fulfil?l?ment|operations)\b", re.I), 70),
+    (re.compile(r"\b(chief|cto|cfo|cmo)\b", re.I), 60),
+    (re.compile(r"\b(vp|vice president)\b", re.I), 55),
+    (re.compile(r"\b(director|head of)\b", re.I), 50),
+    (re.compile(r"\b(manager|lead)\b", re.I), 30),
+]
+JUNIOR_TITLE = re.compile(r"\b(former|ex-|intern|student|assistant|freelance|seeking)\b", re.I)
+DEFAULT_SENIORITY = 10
 
-        # Check items
-        for item in items:
-            title_snippet = item.get('title', '')
-            linkedin_url = item.get('link')
-            
-            # Parse name from snippet title: "Name - Title | Company"
-            parts = re.split(r' [-|] ', title_snippet)
-            name = parts[0].strip() if parts else "Unknown"
-            
-            # Clean suffixes
-            name = name.replace(' | LinkedIn', '').replace('LinkedIn', '').strip()
-            
-            # Validate name 
-            if not is_valid_name(name):
-                logging.info(f"Strategy [{strategy_name}] skipped vague name: {name}")
-                continue
-            
-            # 3. Validate LinkedIn URL (with benefit of doubt/snippet trust)
-            if not linkedin_url or not is_valid_linkedin_url(linkedin_url):
-                logging.info(f"Strategy [{strategy_name}] skipped invalid URL/Name mismatch: {name}")
-                continue
-                
-            # If we get here, we found a valid candidate!
-            job_title = parts[1].strip() if len(parts) > 1 else "Founder"
-            
-            name_parts = name.split(' ')
-            first_name = name_parts[0]
-            last_name = name_parts[-1] if len(name_parts) > 1 else ""
-            
-            logging.info(f"✓ Strategy [{strategy_name}] success: {name} ({job_title})")
-            
-            return {
-                "first_name": first_name,
-                "last_name": last_name,
-                "title": job_title,
-                "email": None,
-                "linkedin_url": linkedin_url
-            }
-            
-    except Exception as e:
-        logging.error(f"Error in strategy [{strategy_name}]: {e}")
-        return None
-        
-    return None
+EXEC_ROLES = '(Founder OR CEO OR Owner OR President OR "Head of Operations" OR Operations OR Logistics OR "Supply Chain" OR Director OR VP)'
+
+_search_local = threading.local()
+_strategy_executor = None
+_strategy_lock = threading.Lock()
+_strategy_stats = {}  # label -> {"runs", "wins", "timeouts", "latency_total"}
 
-def search_with_linkedin_xray_by_domain(domain):
 
+def get_people_search_service():
+    """One CSE client per thread (googleapiclient services are not thread-safe)."""
+    service = getattr(_search_local, "service", None)
+    if service is None:
+        service = build("customsearch", "v1", developerKey=GOOGLE_SEARCH_API_KEY)
+        _search_local.service = service
+    return service
+
+
+def people_search(query, num=PEOPLE_SEARCH_RESULTS):
+    """
+    Shared dispatcher for every people-search CSE query. Returns the result
+    items ([] when the query found nothing), or None when the API is not
+    configured or the call failed (quota, network) so callers never mistake
+    an error for "nobody found".
+    """
     if not GOOGLE_SEARCH_API_KEY or not GOOGLE_SEARCH_CX_PEOPLE:
         return None
+    try:
+        res = get_people_search_service().cse().list(q=query, cx=GOOGLE_SEARCH_CX_PEOPLE, num=num).execute()
+        return res.get("items", [])
+    except Exception as e:
+        logging.warning(f"People search failed for {query!r}: {e}")
+        return None
 
-    service = build("customsearch", "v1", developerKey=GOOGLE_SEARCH_API_KEY)
 
-    company_token = domain.split(".")[0]
+def _compact(text):
+    return re.sub(r"[^a-z0-9]", "", (text or "").lower())
 
-    strategies = [
 
-        # Executive
-        (f'site:linkedin.com/in "{company_token}" (Founder OR CEO OR Owner OR Principal)', "Exec"),
+def seniority_score(title):
+    score = DEFAULT_SENIORITY
+    for pattern, value in SENIORITY_RULES:
+        if pattern.search(title or ""):
+            score = value
+            break
+    if JUNIOR_TITLE.search(title or ""):
+        score -= 40
+    return score
 
-        # Ops
-        (f'site:linkedin.com/in "{company_token}" ("Head of Operations" OR Logistics OR "Supply Chain")', "Ops"),
 
-        # Senior fallback
-        (f'site:linkedin.com/in "{company_token}" (Director OR VP)', "Senior")
-    ]
+def company_match_score(item, company_tokens, company_words):
+    """
+    How strongly a result is tied to the company: full brand token in the
+    result title (40) > in the snippet (25) > a distinctive company word in
+    the title (15). 0 means unrelated.
+    """
+    title = _compact(item.get("title", ""))
+    snippet = _compact(item.get("snippet", ""))
+    if any(t and t in title for t in company_tokens):
+        return 40
+    if any(t and t in snippet for t in company_tokens):
+        return 25
+    title_words = set(re.findall(r"[a-z0-9]+", item.get("title", "").lower()))
+    if company_words & title_words:
+        return 15
+    return 0
 
-    for query, label in strategies:
 
-        logging.info(f"🔎 LinkedIn Strategy [{label}] → {query}")
+def _title_parts(item):
+    title_snippet = re.sub(r"\s*\|\s*LinkedIn.*$", "", item.get("title", ""), flags=re.I)
+    return [p.strip() for p in re.split(r"\s+[-–|]\s+", title_snippet) if p.strip()]
 
-        try:
-            res = service.cse().list(
-                q=query,
-                cx=GOOGLE_SEARCH_CX_PEOPLE,
-                num=5
-            ).execute()
 
-            items = res.get("items", [])
+def result_company(item):
+    """Company segment of a LinkedIn result title ('Name - Title - Company')."""
+    parts = _title_parts(item)
+    return parts[2] if len(parts) > 2 else ""
 
-            for item in items:
-                parsed = parse_linkedin_result(item, expected_company=company_token)
-                if parsed:
-                    logging.info(f"✓ Strategy [{label}] success: {parsed['first_name']} {parsed['last_name']}")
-                    return parsed
 
-        except Exception as e:
-            logging.warning(f"Strategy {label} failed: {e}")
+def parse_linkedin_candidate(item):
+    """'Jane Roe - Founder & CEO - Acme | LinkedIn' -> candidate dict, or None."""
+    link = item.get("link")
+    if not is_valid_linkedin_url(link):
+        return None
+    parts = _title_parts(item)
+    if not parts:
+        return None
+    name = parts[0].replace("LinkedIn", "").strip()
+    if not is_valid_name(name):
+        return None
+    name_parts = name.split()
+    return {
+        "first_name": name_parts[0],
+        "last_name": name_parts[-1] if len(name_parts) > 1 else "",
+        "title": parts[1] if len(parts) > 1 else "Founder",
+        "email": None,
+        "linkedin_url": link
+    }
+
+
+def parse_results(items, company_tokens, company_words):
+    """Every parseable profile as (candidate, company match score, company segment)."""
+    parsed = []
+    seen = set()
+    for item in items:
+        candidate = parse_linkedin_candidate(item)
+        if not candidate or candidate["linkedin_url"] in seen:
+            continue
+        seen.add(candidate["linkedin_url"])
+        parsed.append((candidate, company_match_score(item, company_tokens, company_words), result_company(item)))
+    return parsed
+
+
+def rank_candidates(parsed):
+    """
+    Ranks parsed profiles by seniority + company match.
+    Returns [(score, candidate)] best first; unrelated profiles are dropped.
+    """
+    ranked = [(seniority_score(c["title"]) + match, c) for c, match, _ in parsed if match]
+    ranked.sort(key=lambda pair: pair[0], reverse=True)
+    return ranked
 
-    return None
 
-from .intelligence import clean_name_with_vertex
+def _company_terms(company_name, domain=None):
+    company_tokens = {_compact(company_name)} if company_name else set()
+    if domain:
+        company_tokens.add(_compact(domain.split(".")[0]))
+    company_tokens = {t for t in company_tokens if len(t) >= 3}
+    company_words = {w for w in re.findall(r"[a-z0-9]+", (company_name or "").lower()) if len(w) >= 4}
+    return company_tokens, company_words
 
-def search_decision_maker(company_name, company_url=None):
+
+def plan_people_queries(company_name, domain=None):
     """
-    Decision maker search using LinkedIn X-Ray by domain (free).
-    Falls back to cleaned company name search if no URL provided.
+    At most two broad queries: roles x (domain token OR company name), then a
+    role-free company query only if the first finds nobody.
     """
-    # 1. Try by Domain (Best)
-    domain = None
-    if company_url:
-        domain = get_domain_from_url(company_url)
-    
+    names = []
     if domain:
-        logging.info(f"Searching LinkedIn for domain: {domain}")
-        dm_info = search_with_linkedin_xray_by_domain(domain)
-        if dm_info:
-            logging.info(f"✓ LinkedIn X-Ray (Domain) success: {dm_info.get('first_name')} {dm_info.get('last_name')}")
-            return dm_info
-    
-    if not GOOGLE_SEARCH_API_KEY or not GOOGLE_SEARCH_CX_PEOPLE:
-        return None
-        
-    service = build("customsearch", "v1", developerKey=GOOGLE_SEARCH_API_KEY)
-
-    # 2. Try by Provided Company Name (Already Cleaned)
+        names.append(domain.split(".")[0])
     if company_name and len(company_name) > 2 and company_name.lower() != "home":
-        logging.info(f"Trying LinkedIn X-Ray by Name: {company_name}")
-        query = f'site:linkedin.com/in "{company_name}" (Founder OR CEO OR "Head of Operations")'
-        
+        names.append(company_name)
+    if domain:
+        names.append(domain.split(".")[0].replace("-", " ").title())
+    unique = {}
+    for n in names:
+        # "buttahskin" / "Buttahskin" are one term; "Buttah Skin" is a different phrase to Google
+        unique.setdefault(n.lower(), n)
+    names = list(unique.values())
+    if not names:
+        return []
+
+    terms = " OR ".join(f'"{n}"' for n in names)
+    return [
+        (f"site:linkedin.com/in ({terms}) {EXEC_ROLES}", "Roles"),
+        (f"site:linkedin.com/in ({terms})", "Broad"),
+    ]
+
+
+def _get_strategy_executor():
+    global _strategy_executor
+    with _strategy_lock:
+        if _strategy_executor is None:
+            _strategy_executor = ThreadPoolExecutor(max_workers=PEOPLE_SEARCH_WORKERS,
+                                                    thread_name_prefix="people-search")
+        return _strategy_executor
+
+
+def _record_strategy(label, latency=None, won=False, timed_out=False):
+    with _strategy_lock:
+        entry = _strategy_stats.setdefault(label, {"runs": 0, "wins": 0, "timeouts": 0, "latency_total": 0.0})
+        if timed_out:
+            entry["timeouts"] += 1
+            return
+        entry["runs"] += 1
+        entry["latency_total"] += latency
+        if won:
+            entry["wins"] += 1
+
+
+def get_strategy_stats():
+    with _strategy_lock:
+        return {
+            label: dict(entry, latency_avg=round(entry["latency_total"] / entry["runs"], 3) if entry["runs"] else 0.0)
+            for label, entry in _strategy_stats.items()
+        }
+
+
+def log_strategy_stats():
+    for label, entry in get_strategy_stats().items():
+        logging.info(f"🔎 People strategy [{label}]: {entry['wins']}/{entry['runs']} wins, "
+                     f"{entry['timeouts']} timeouts, avg {entry['latency_avg']}s")
+
+
+def shutdown_people_search():
+    """Abandons queued strategy queries (in-flight ones finish in the background)."""
+    global _strategy_executor
+    with _strategy_lock:
+        if _strategy_executor is not None:
+            _strategy_executor.shutdown(wait=False, cancel_futures=True)
+            _strategy_executor = None
+
+
+def _run_strategy(query, label, domain, company_name, company_tokens, company_words):
+    """
+    One people-search query: indexes every parsed profile, returns
+    (ranked, result count, latency). Count is None when the query failed.
+    """
+    started = time.time()
+    items = people_search(query)
+    if items is None:
+        return [], None, time.time() - started
+    parsed = parse_results(items, company_tokens, company_words)
+    add_profiles(parsed, query, domain=domain, company_name=company_name)
+    return rank_candidates(parsed), len(items), time.time() - started
+
+
+def _run_strategies_sequential(queries, *args):
+    complete = True
+    for query, label in queries:
+        logging.info(f"🔎 LinkedIn Strategy [{label}] → {query}")
+        ranked, count, latency = _run_strategy(query, label, *args)
+        _record_strategy(label, latency, won=bool(ranked))
+        if count is None:
+            complete = False
+            continue
+        logging.info(f"Strategy [{label}]: {len(ranked)}/{count} profiles tied in {latency:.2f}s")
+        if ranked:
+            return label, ranked, True
+    return None, [], complete
+
+
+def _run_strategies_parallel(queries, *args):
+    """
+    Fires every strategy at once and walks the futures in priority order: the
+    first strategy with a ranked candidate wins once all higher-priority ones
+    have returned or timed out. Lower-priority strategies still queued are
+    cancelled; ones already running finish in the background (their profiles
+    still land in the people index). Returns (label, ranked, complete).
+    """
+    executor = _get_strategy_executor()
+    futures = [(label, executor.submit(_run_strategy, query, label, *args)) for query, label in queries]
+    logging.info(f"🔎 LinkedIn Strategies [{', '.join(label for label, _ in futures)}] fired in parallel")
+    deadline = time.time() + PEOPLE_SEARCH_STRATEGY_TIMEOUT
+
+    winner, best, complete = None, [], True
+    for idx, (label, future) in enumerate(futures):
         try:
-            res = service.cse().list(q=query, cx=GOOGLE_SEARCH_CX_PEOPLE, num=1).execute()
-            items = res.get('items', [])
-            
-            if items:
-                best_candidate = items[0]
-                dm_info = parse_linkedin_result(best_candidate) 
-                if dm_info:
-                     logging.info(f"✓ LinkedIn X-Ray (Name) success: {dm_info.get('first_name')}")
-                     return dm_info
-            
-            # 2b. Broader Fallback (If Founder/CEO search fails)
-            logging.info(f"Primary name search failed for {company_name}. Trying broader roles (Director, Manager)...")
-            query_broad = f'site:linkedin.com/in "{company_name}" (Director OR Manager OR VP OR Owner)'
-
-            res_broad = service.cse().list(q=query_broad, cx=GOOGLE_SEARCH_CX_PEOPLE, num=1).execute()
-            items_broad = res_broad.get('items', [])
-            if items_broad:
-                 dm_info = parse_linkedin_result(items_broad[0])
-                 if dm_info:
-                     logging.info(f"✓ LinkedIn X-Ray (Broader) success: {dm_info.get('first_name')} ({dm_info.get('title')})")
-                     return dm_info
-                     
+            ranked, count, latency = future.result(timeout=max(0.0, deadline - time.time()))
+        except FutureTimeout:
+            _record_strategy(label, timed_out=True)
+            complete = False
+            logging.warning(f"Strategy [{label}] timed out after {PEOPLE_SEARCH_STRATEGY_TIMEOUT}s")
+            continue
         except Exception as e:
-            logging.warning(f"name search failed: {e}")
+            logging.warning(f"Strategy [{label}] failed: {e}")
+            complete = False
+            continue
+        _record_strategy(label, latency, won=bool(ranked))
+        if count is None:
+            complete = False
+            continue
+        logging.info(f"Strategy [{label}]: {len(ranked)}/{count} profiles tied in {latency:.2f}s")
+        if ranked:
+            winner, best = label, ranked
+            for _, pending in futures[idx + 1:]:
+                pending.cancel()
+            break
+    return winner, best, complete
+
+
+def search_decision_maker(company_name, company_url=None, parallel=None):
+    """
+    Decision maker search using LinkedIn X-Ray (free).
+    Answers from the persistent people index when it has fresh profiles for
+    the company; otherwise issues one broad num=10 query (a second, role-free
+    one only if nothing matched), indexes every parsed profile and ranks them
+    locally by title seniority (Founder > CEO > Ops > Director) and
+    company-match strength. With parallel=True (default PEOPLE_SEARCH_PARALLEL)
+    both queries go out at once and the highest-priority hit wins.
+    """
+    domain = get_domain_from_url(company_url) if company_url else None
+
+    indexed = lookup_company(domain, company_name)
+    if indexed:
+        best = max(indexed, key=lambda p: seniority_score(p["title"]) + p["match_score"])
+        best.pop("match_score")
+        logging.info(f"📇 People index hit for {company_name or domain}: {best['first_name']} {best['last_name']} "
+                     f"({best['title']}) from {len(indexed)} indexed profiles")
+        return best
+
+    key = search_key(domain, company_name)
+    if recently_empty(key):
+        logging.info(f"📇 People index: {company_name or domain} searched recently with no match, skipping")
+        return None
 
-    # 3. Try by Domain-Derived Name (Fallback)
-    if domain:
-        derived_name = domain.split('.')[0].replace('-', ' ').title()
-        if derived_name and derived_name.lower() != company_name.lower():
-             logging.info(f"Trying LinkedIn X-Ray by Domain Name: {derived_name}")
-             query = f'"{derived_name}" (Founder OR CEO OR "Head of Operations")'
-             try:
-                res = service.cse().list(q=query, cx=GOOGLE_SEARCH_CX_PEOPLE, num=1).execute()
-                items = res.get('items', [])
-                if items:
-                    best_candidate = items[0]
-                    dm_info = parse_linkedin_result(best_candidate) 
-                    if dm_info:
-                        logging.info(f"✓ LinkedIn X-Ray (Derived) success: {dm_info.get('first_name')}")
-                        return dm_info
-             except Exception as e:
-                pass
-
-    return None
+    queries = plan_people_queries(company_name, domain)
+    if not queries:
+        return None
+
+    company_tokens, company_words = _company_terms(company_name, domain)
+    parallel = PEOPLE_SEARCH_PARALLEL if parallel is None else parallel
+    run = _run_strategies_parallel if parallel and len(queries) > 1 else _run_strategies_sequential
+    label, ranked, complete = run(queries, domain, company_name, company_tokens, company_words)
+
+    if ranked or complete:  # a failed or timed-out strategy doesn't prove the company has nobody
+        record_search(key, len(ranked))
+    if not ranked:
+        return None
+    score, best = ranked[0]
+    logging.info(f"✓ LinkedIn X-Ray [{label}] success: {best['first_name']} {best['last_name']} "
+                 f"({best['title']}, score {score})")
+    return best
 
 def parse_linkedin_result(item, expected_company=None):
     """
@@ -322,11 +480,17 @@ def parse_linkedin_result(item, expected_company=None):
 
 def search_person_linkedin(first_name=None, last_name=None, company=None, broad_search=False):
 
+    if first_name and last_name:
+        indexed = lookup_person(first_name, last_name, company)
+        if indexed:
+            indexed.pop("match_score")
+            logging.info(f"📇 People index hit: {first_name} {last_name} ({indexed['title']})")
+            return indexed
+
     if not GOOGLE_SEARCH_API_KEY or not GOOGLE_SEARCH_CX_PEOPLE:
         return None
 
-    service = build("customsearch", "v1", developerKey=GOOGLE_SEARCH_API_KEY)
-
+    company_tokens, company_words = _company_terms(company)
     queries = []
 
     # Exact search (person mode)
@@ -345,21 +509,11 @@ def search_person_linkedin(first_name=None, last_name=None, company=None, broad_
 
         logging.info(f"🔎 Person LinkedIn search: {query}")
 
-        try:
-            res = service.cse().list(
-                q=query,
-                cx=GOOGLE_SEARCH_CX_PEOPLE,
-                num=5
-            ).execute()
-
-            items = res.get("items", [])
-
-            for item in items:
-                parsed = parse_linkedin_result(item, expected_company=company)
-                if parsed:
-                    return parsed
-
-        except Exception as e:
-            logging.warning(f"LinkedIn search failed: {e}")
+        items = people_search(query, num=5) or []
+        add_profiles(parse_results(items, company_tokens, company_words), query, company_name=company)
+        for item in items:
+            parsed = parse_linkedin_result(item, expected_company=company)
+            if parsed:
+                return parsed
 
     return None
\ No newline at end of file
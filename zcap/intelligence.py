@@ -1,24 +1,29 @@
-import vertexai
-from vertexai.generative_models import GenerativeModel, SafetySetting
+import asyncio
 import logging
 import json
 import time
-from .config import GOOGLE_CLOUD_PROJECT, GOOGLE_CLOUD_LOCATION
+from .config import LLM_MODEL_NAME
+from .llm_client import generate_content, generate_content_async
+from .platform_extractor import format_structured_facts
+from .signal_extractor import format_signals
+from .llm_cache import get_cached_response, store_response
+from .llm_telemetry import record_cache_hit, record_parse
+from .title_parser import parse_title, is_confident, record_rule_resolved, record_escalated
 
-# Configure Vertex AI
+# The LLM backend (Vertex / record / replay) is created lazily by llm_client.py.
 # Ensure you have authenticated via `gcloud auth application-default login` or set GOOGLE_APPLICATION_CREDENTIALS
-try:
-    vertexai.init(project=GOOGLE_CLOUD_PROJECT, location=GOOGLE_CLOUD_LOCATION)
-except Exception as e:
-    logging.warning(f"Vertex AI init failed (might be delayed until usage): {e}")
-
-MODEL_NAME = "gemini-2.0-flash-001"  # Vertex AI Model ID
+MODEL_NAME = LLM_MODEL_NAME  # Vertex AI Model ID
+WEBSITE_TEXT_LIMIT = 15000
+STRUCTURED_WEBSITE_TEXT_LIMIT = 6000  # Structured facts already cover catalog/shipping
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
 
 PROMPT_TEMPLATE = """
 You are an expert B2B Logistics Sales Strategist for Shipcube. You are analyzing a prospect company to determine if they need 3PL (Third Party Logistics) services.
 
 Input Data:
 Company Name: {company_name}
+Structured Store Facts (from the store's platform APIs - treat as ground truth): {structured_facts}
+Extracted Site Signals (parsed from the site - treat as ground truth): {site_signals}
 Website Text: {website_text}
 Decision Maker: {decision_maker_name} ({decision_maker_title})
 
@@ -38,14 +43,8 @@ Generate a JSON object with the following fields:
 ⚠️ IMPORTANT: DO NOT FABRICATE OR GUESS ANY DATA. ONLY extract information that is EXPLICITLY STATED in the website text. If not found, return empty string "".
 
 **Enrichment Fields (Extract Explicitly):**
-- social_media (String): Comma-separated links found (e.g., "Instagram: @handle, LinkedIn: /company/xyz").
-- contact_details (String): Phone numbers or physical location (e.g., "Phone: 555-0199, HQ: Austin, TX").
-- logistics_signals (String): Shipping/Returns keywords (e.g., "Free Shipping", "30-day returns", "International shipping").
 - brand_vibe (String): 2-3 words describing the tone (e.g., "Luxury, Eco-friendly", "Industrial, Budget").
-- tech_stack (String): E-commerce platforms or tools mentioned (e.g., "Shopify", "WooCommerce", "Klaviyo", "Recharge").
 - product_profile (String): Key logistics traits: "Perishable", "Fragile", "Heavy/Bulky", or "Standard".
-- customer_focus (String): "B2B", "B2C", or "Both".
-- shipping_locations (String): Analyze shipping policy OR infer from HQ location (e.g., European HQ = International). Values: "US Only", "International", "Global", "North America".
 
 - employee_count (String): 
   * ONLY if EXPLICITLY mentioned (e.g., "We have 50 employees", "Team of 25", "100+ person company")
@@ -80,32 +79,123 @@ Analysis Matrix:
 - Grade 8-9: Growth signals, hiring Ops, expanding markets.
 - Grade 10: Supply chain failure signals, massive funding, direct 3PL match.
 
+{extra_instructions}Return ONLY the JSON.
+"""
+
+POC_SECTION_TEMPLATE = """**Decision Maker Extraction (additional field):**
+- decision_maker (Object): The key Decision Maker (POC) and their Role (POR) from the Team/About Text below.
+  1. Find the Highest Ranking Person (CEO, Founder, Owner, President).
+  2. If not found, find High Level Ops (Director of Ops, Logistics Manager).
+  3. If not found, find ANY specific contact person listed.
+  4. Ignore generic names (e.g. "Jane Doe" placeholders).
+  Format: {{ "first_name": "String", "last_name": "String", "title": "String", "confidence": "High/Medium/Low" }}
+  or {{}} if no specific person found.
+- Write the icebreaker for that person; if none is found, keep it addressed to the team.
+
+Team/About Text:
+{poc_text}
+
+"""
+
+PERSONALIZE_TEMPLATE = """
+You are an expert B2B Logistics Sales Strategist for Shipcube. A prospect has already been qualified:
+
+Company Name: {company_name}
+What they do: {company_info}
+Why they fit: {why_good}
+Pain point: {pain_point}
+Recent updates: {recent_updates}
+Decision Maker: {decision_maker_name} ({decision_maker_title})
+
+Rewrite the outreach fields for this decision maker. Return JSON:
+{{ "why_good": "String - the same strategic justification, framed for their role",
+   "icebreaker": "String - a hyper-personalized opening line for an email to {decision_maker_name}" }}
 Return ONLY the JSON.
 """
-def safe_extract_json(response_text):
+
+POC_TEXT_LIMIT = 10000
+# Filled by signal_extractor instead of Gemini
+SIGNAL_FIELDS = ["social_media", "contact_details", "logistics_signals", "shipping_locations", "customer_focus",
+                 "tech_stack"]
+NAME_BLOCKLIST = ['sales', 'support', 'info', 'admin', 'contact', 'team', 'marketing', 'media', 'press', 'inquiries']
+TITLE_BLOCKLIST = ['founder', 'ceo', 'owner', 'president', 'manager', 'director', 'team', 'staff', 'member', 'partner']
+def generate_text(prompt, prompt_type, generation_config=JSON_GENERATION_CONFIG):
+    """
+    Single entry point for Gemini calls. Opted-in prompt types are served from
+    the persistent response cache; misses call Vertex and store valid JSON answers.
+    Vertex errors propagate so callers keep their own fallbacks.
+    """
+    cached = get_cached_response(prompt_type, MODEL_NAME, prompt, generation_config)
+    if cached is not None:
+        record_cache_hit(prompt_type)
+        return cached
+
+    text = generate_content(prompt, generation_config=generation_config, prompt_type=prompt_type)
+    _check_and_store(prompt_type, prompt, text, generation_config)
+    return text
+
+async def generate_text_async(prompt, prompt_type, generation_config=JSON_GENERATION_CONFIG):
+    """Async twin of generate_text (same cache, shared concurrency limit)."""
+    cached = get_cached_response(prompt_type, MODEL_NAME, prompt, generation_config)
+    if cached is not None:
+        record_cache_hit(prompt_type)
+        return cached
+
+    text = await generate_content_async(prompt, generation_config=generation_config, prompt_type=prompt_type)
+    _check_and_store(prompt_type, prompt, text, generation_config)
+    return text
+
+def _check_and_store(prompt_type, prompt, text, generation_config):
+    """Records the JSON-parse outcome; only non-empty JSON answers are cached."""
+    try:
+        data = json.loads(_strip_code_fences(text))
+        record_parse(prompt_type, True)
+    except Exception:
+        record_parse(prompt_type, False)
+        return
+    if data:
+        store_response(prompt_type, MODEL_NAME, prompt, text, generation_config)
+
+def _strip_code_fences(response_text):
+    text = response_text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text
+
+def safe_extract_json(response_text, log_errors=True):
     """
     Helper to clean markdown and handle both dict/list returns from LLM.
     """
     try:
-        text = response_text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
-        
-        data = json.loads(text)
+        data = json.loads(_strip_code_fences(response_text))
         
         # If LLM returns a list [{}], extract the first dictionary
         if isinstance(data, list) and len(data) > 0:
             return data[0]
         return data if isinstance(data, dict) else {}
     except Exception as e:
-        logging.error(f"JSON Parsing failed: {e}")
+        if log_errors:
+            logging.error(f"JSON Parsing failed: {e}")
         return {}
 
-def analyze_lead(company_name, website_text, decision_maker_info):
+def _json_flag(value, default=True):
+    """LLM booleans sometimes arrive as strings: "false" / "0" / "no" are False."""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() not in ("false", "0", "no", "")
+    return bool(value)
+
+def build_analysis_prompt(company_name, website_text, decision_maker_info, structured_facts=None, poc_text=None,
+                          signals=None):
     """
-    Sends data to Vertex AI Gemini to get qualification metrics.
+    structured_facts: Optional dict from platform_extractor (Shopify/WooCommerce);
+    when present the raw website text is cut down since the facts carry the signal.
+    poc_text: Team/About text; when given the prompt also asks for a decision_maker block.
+    signals: Output of signal_extractor.extract_signals; given to the model as
+    grading context only (those fields are no longer generated).
     """
     dm_name = "Prospect"
     dm_title = "Founder"
@@ -113,40 +203,116 @@ def analyze_lead(company_name, website_text, decision_maker_info):
         dm_name = f"{decision_maker_info.get('first_name', '')} {decision_maker_info.get('last_name', '')}".strip()
         dm_title = decision_maker_info.get('title', 'Founder')
         
-    prompt = PROMPT_TEMPLATE.format(
+    facts_text = format_structured_facts(structured_facts) if structured_facts else ""
+    signals_text = format_signals(signals) if signals else ""
+    text_limit = STRUCTURED_WEBSITE_TEXT_LIMIT if facts_text else WEBSITE_TEXT_LIMIT
+
+    return PROMPT_TEMPLATE.format(
         company_name=company_name,
-        website_text=website_text[:15000], 
+        structured_facts=f"\n{facts_text}\n" if facts_text else "None",
+        site_signals=f"\n{signals_text}\n" if signals_text else "None",
+        website_text=website_text[:text_limit], 
         decision_maker_name=dm_name,
-        decision_maker_title=dm_title
+        decision_maker_title=dm_title,
+        extra_instructions=POC_SECTION_TEMPLATE.format(poc_text=poc_text[:POC_TEXT_LIMIT]) if poc_text else ""
     )
+
+def merge_signals(analysis, signals):
+    """Fills the locally extracted fields into a Gemini analysis dict."""
+    for field in SIGNAL_FIELDS:
+        analysis[field] = (signals or {}).get(field) or analysis.get(field, "")
+    return analysis
+
+def analyze_lead(company_name, website_text, decision_maker_info, structured_facts=None, signals=None):
+    """
+    Sends data to Vertex AI Gemini to get qualification metrics.
+    Rate limits are handled by the shared client's backoff, not fixed sleeps.
+    """
+    prompt = build_analysis_prompt(company_name, website_text, decision_maker_info, structured_facts,
+                                   signals=signals)
     
     try:
-        model = GenerativeModel(MODEL_NAME)
-        
-        # Vertex AI generation
-        # Adding a small delay just in case of tight loops, though Vertex quotas are usually per minute
-        time.sleep(1) 
-        
-        response = model.generate_content(
-            prompt,
-            generation_config={"response_mime_type": "application/json"}
-        )
+        text = generate_text(prompt, "analyze_lead")
         
-        if response.text:
-            return safe_extract_json(response.text)
+        if text:
+            return merge_signals(safe_extract_json(text), signals)
         
     except Exception as e:
         logging.error(f"Vertex AI analysis failed: {e}")
         return None
 
-def clean_name_with_vertex(raw_name, strict=False):
+def analyze_lead_with_poc(company_name, website_text, poc_text, structured_facts=None, signals=None):
+    """
+    Combined mode: extracts the decision maker from poc_text AND qualifies the lead
+    in a single Gemini request (saves the separate extract_contacts round trip).
+    Returns (analysis, dm_info); dm_info is None when no valid person was returned,
+    analysis is None when the call failed. The icebreaker is written for the
+    extracted person, so callers falling back to another contact pass the
+    analysis through personalize_outreach.
+    """
+    decision_maker_info = {"first_name": "the", "last_name": "Decision Maker", "title": "see Team/About Text"}
+    prompt = build_analysis_prompt(company_name, website_text, decision_maker_info, structured_facts,
+                                   poc_text=poc_text, signals=signals)
+
+    try:
+        text = generate_text(prompt, "analyze_lead_poc")
+        if text:
+            analysis = safe_extract_json(text)
+            if not analysis:
+                return None, None
+            dm_data = analysis.pop("decision_maker", None)
+            dm_info = _validate_poc(dm_data if isinstance(dm_data, dict) else {}, company_name)
+            return merge_signals(analysis, signals), dm_info
+    except Exception as e:
+        logging.error(f"Vertex AI combined analysis failed: {e}")
+    return None, None
+
+def personalize_outreach(company_name, analysis, decision_maker_info):
+    """
+    Rewrites only icebreaker / why_good of an existing analysis for another
+    contact (e.g. the X-ray result after the combined call's person was
+    rejected); the qualification fields are kept. Returns the analysis,
+    unchanged if the call fails.
+    """
+    prompt = PERSONALIZE_TEMPLATE.format(
+        company_name=company_name,
+        company_info=analysis.get("company_info", ""),
+        why_good=analysis.get("why_good", ""),
+        pain_point=analysis.get("pain_point", ""),
+        recent_updates=analysis.get("recent_updates", ""),
+        decision_maker_name=f"{decision_maker_info.get('first_name', '')} {decision_maker_info.get('last_name', '')}".strip(),
+        decision_maker_title=decision_maker_info.get("title", "")
+    )
+    try:
+        text = generate_text(prompt, "personalize_outreach")
+        data = safe_extract_json(text) if text else {}
+        for field in ("icebreaker", "why_good"):
+            if data.get(field):
+                analysis[field] = data[field]
+    except Exception as e:
+        logging.error(f"Vertex AI outreach personalization failed: {e}")
+    return analysis
+
+def clean_name_with_vertex(raw_name, strict=False, url=None):
     """
     Uses Vertex AI Gemini to extract the CLEAN company name from a messy title.
     If strict=True, returns None if the title does not appear to be a company/brand.
+    When the result URL is given, the rule-based title parser answers first and
+    Gemini is only called for low-confidence titles.
     """
     if not raw_name:
         return ""
+
+    if url:
+        parsed = parse_title(raw_name, url)
+        if is_confident(parsed):
+            record_rule_resolved()
+            if strict and not parsed["is_company"]:
+                logging.info(f"Title parser: '{raw_name}' is NOT a company.")
+                return None
+            return parsed["company_name"] or raw_name.split('|')[0].strip()
         
+
     prompt = f"""
     You are a data cleaning assistant.
     Task: "Analyze and extract company name from: {raw_name}. Return JSON: {{'company_name': 'string', 'is_company': boolean}}"
@@ -170,14 +336,13 @@ def clean_name_with_vertex(raw_name, strict=False):
     """
     
     try:
-        model = GenerativeModel("gemini-2.0-flash-001")
-        response = model.generate_content(
-            prompt,
-            generation_config={"response_mime_type": "application/json"}
-        )
-        if response.text:
-            data = safe_extract_json(response.text)
-            is_company = data.get("is_company", True)
+        started = time.time()
+        text = generate_text(prompt, "clean_name")
+        if url:
+            record_escalated(1, time.time() - started)
+        if text:
+            data = safe_extract_json(text)
+            is_company = _json_flag(data.get("is_company"))
             name = data.get("company_name", "").strip()
             
             if strict and not is_company:
@@ -191,6 +356,97 @@ def clean_name_with_vertex(raw_name, strict=False):
         
     return raw_name.split('|')[0].split('-')[0].strip()
 
+NAME_BATCH_CHUNK_SIZE = 25  # titles per request; keeps prompt + JSON output well inside limits
+
+async def _generate_all(prompts, prompt_type):
+    """[(text or the raised exception, seconds)] for each prompt, all requests concurrent."""
+    async def one(prompt):
+        started = time.time()
+        try:
+            text = await generate_text_async(prompt, prompt_type)
+        except Exception as e:
+            text = e
+        return text, time.time() - started
+    return await asyncio.gather(*(one(prompt) for prompt in prompts))
+
+def clean_names_batch(companies, chunk_size=NAME_BATCH_CHUNK_SIZE):
+    """
+    Batch version of clean_name_with_vertex(strict=True) for a whole SERP batch.
+    companies: list of dicts with "title", "link" and "snippet".
+    Returns a list aligned with the input of {"company_name", "is_company"} dicts,
+    or None for items whose chunk failed (callers fall back to the single call).
+    """
+    results = [None] * len(companies)
+
+    # Rule-based fast path; only ambiguous titles are sent to Gemini
+    pending = []
+    for idx, company in enumerate(companies):
+        parsed = parse_title(company.get("title", ""), company.get("link", ""))
+        if is_confident(parsed):
+            results[idx] = {"company_name": parsed["company_name"], "is_company": parsed["is_company"]}
+        else:
+            pending.append(idx)
+    record_rule_resolved(len(companies) - len(pending))
+
+    chunks = []
+    for start in range(0, len(pending), chunk_size):
+        chunk_ids = pending[start:start + chunk_size]
+        chunk = [companies[i] for i in chunk_ids]
+        items = [
+            {"id": i, "title": c.get("title", ""), "url": c.get("link", ""), "snippet": (c.get("snippet") or "")[:200]}
+            for i, c in enumerate(chunk)
+        ]
+
+        prompt = f"""
+    You are a data cleaning assistant.
+    Task: For EACH search result below, extract the clean company/brand name and decide if it is a company.
+
+    Input (JSON list):
+    {json.dumps(items, ensure_ascii=False)}
+
+    Rules:
+    1. is_company=true only if the result represents a specific COMPANY, BRAND, or WEBSITE (the URL domain usually confirms the brand).
+    2. Generic lists ("Top 10..."), directory categories, or purely informational pages -> is_company=false.
+    3. EXTRACT ONLY the brand/company name. REMOVE seo keywords, pipes, hyphens, "Home", "Welcome to".
+
+    Examples:
+    "Polish Vitamins & Minerals – Daily Wellness Supplements USA ..." -> {{ "company_name": "Polish Vitamins & Minerals", "is_company": true }}
+    "Best 10 Running Shoes in 2025" -> {{ "company_name": "", "is_company": false }}
+    "General Health - LoveBug Probiotics USA" -> {{ "company_name": "LoveBug Probiotics", "is_company": true }}
+
+    Output JSON (one entry per input id, same ids):
+    {{ "results": [ {{ "id": 0, "company_name": "string", "is_company": boolean }} ] }}
+    """
+        chunks.append((chunk_ids, chunk, prompt))
+
+    # Every chunk's request is in flight at once (bounded by LLM_MAX_CONCURRENCY)
+    answers = asyncio.run(_generate_all([prompt for _, _, prompt in chunks], "clean_name_batch")) if chunks else []
+
+    for (chunk_ids, chunk, _), (text, seconds) in zip(chunks, answers):
+        try:
+            if isinstance(text, Exception):
+                raise text
+            record_escalated(len(chunk), seconds)
+            data = safe_extract_json(text) if text else {}
+            for entry in data.get("results", []):
+                idx = entry.get("id")
+                if not isinstance(idx, int) or not 0 <= idx < len(chunk):
+                    continue
+                raw_name = chunk[idx].get("title", "")
+                name = (entry.get("company_name") or "").strip()
+                results[chunk_ids[idx]] = {
+                    "company_name": name if name else raw_name.split('|')[0].strip(),
+                    "is_company": _json_flag(entry.get("is_company"))
+                }
+        except Exception as e:
+            logging.warning(f"Vertex batch name clean failed for {len(chunk)} titles: {e}")
+
+    resolved = sum(1 for r in results if r)
+    logging.info(f"Batch-cleaned {resolved}/{len(companies)} titles "
+                 f"({len(companies) - len(pending)} by rules, {len(pending)} via "
+                 f"{(len(pending) + chunk_size - 1) // chunk_size} Vertex request(s))")
+    return results
+
 def extract_contacts_from_text(text, company_name=""):
     """
     Extracts the BEST point of contact (POC) and their Role (POR) from raw website text.
@@ -229,63 +485,64 @@ def extract_contacts_from_text(text, company_name=""):
     """
     
     try:
-        model = GenerativeModel("gemini-2.0-flash-001")
-        response = model.generate_content(
-            prompt,
-            generation_config={"response_mime_type": "application/json"}
-        )
-        if response.text:
-            data = safe_extract_json(response.text)
-            if data.get("first_name"):
-                first = (data.get("first_name") or "").strip()
-                last = (data.get("last_name") or "").strip()
-                
-                # Validation Blocklist
-                blocklist = ['sales', 'support', 'info', 'admin', 'contact', 'team', 'marketing', 'media', 'press', 'inquiries']
-                if first.lower() in blocklist:
-                    logging.info(f"Vertex returned generic name '{first}'. Rejecting.")
-                    return None
-                    
-                # Heuristic: Name shouldn't be the company name
-                if first.lower() in company_name.lower().split():
-                     logging.info(f"Vertex returned company-like name '{first}' (Company: {company_name}). Rejecting.")
-                     return None
-                
-                # Rigid Validation: 
-                # 1. Must not look like an email
-                if "@" in first or ".com" in first:
-                    logging.info(f"Vertex returned email-like name '{first}'. Rejecting.")
-                    return None
-                    
-                # 2. Must not contain numbers
-                if any(char.isdigit() for char in first):
-                    logging.info(f"Vertex returned name with numbers '{first}'. Rejecting.")
-                    return None
-                    
-                # 3. Must be reasonable length (2-30 chars)
-                if len(first) < 2 or len(first) > 30:
-                    logging.info(f"Vertex returned suspect length name '{first}'. Rejecting.")
-                    return None
-
-                # 4. Check against extended blocklist of titles often mistaken for names
-                title_blocklist = ['founder', 'ceo', 'owner', 'president', 'manager', 'director', 'team', 'staff', 'member', 'partner']
-                if first.lower() in title_blocklist:
-                    logging.info(f"Vertex returned title '{first}' as name. Rejecting.")
-                    return None
-                    
-                logging.info(f"Vertex Extracted POC from text: {first} ({data.get('title')})")
-                return {
-                    "first_name": first,
-                    "last_name": last,
-                    "title": data.get("title") or "Contact",
-                    "email": None, 
-                    "linkedin_url": ""
-                }
+        text = generate_text(prompt, "extract_contacts")
+        if text:
+            return _validate_poc(safe_extract_json(text), company_name)
     except Exception as e:
         logging.warning(f"Vertex POC Extraction failed: {e}")
         
     return None
 
+def _validate_poc(data, company_name=""):
+    """
+    Applies the blocklist / sanity checks to a POC returned by Gemini.
+    Returns the normalised contact dict or None.
+    """
+    first = (data.get("first_name") or "").strip()
+    if not first:
+        return None
+    last = (data.get("last_name") or "").strip()
+
+    # Validation Blocklist
+    if first.lower() in NAME_BLOCKLIST:
+        logging.info(f"Vertex returned generic name '{first}'. Rejecting.")
+        return None
+
+    # Heuristic: Name shouldn't be the company name
+    if first.lower() in company_name.lower().split():
+        logging.info(f"Vertex returned company-like name '{first}' (Company: {company_name}). Rejecting.")
+        return None
+
+    # Rigid Validation:
+    # 1. Must not look like an email
+    if "@" in first or ".com" in first:
+        logging.info(f"Vertex returned email-like name '{first}'. Rejecting.")
+        return None
+
+    # 2. Must not contain numbers
+    if any(char.isdigit() for char in first):
+        logging.info(f"Vertex returned name with numbers '{first}'. Rejecting.")
+        return None
+
+    # 3. Must be reasonable length (2-30 chars)
+    if len(first) < 2 or len(first) > 30:
+        logging.info(f"Vertex returned suspect length name '{first}'. Rejecting.")
+        return None
+
+    # 4. Check against extended blocklist of titles often mistaken for names
+    if first.lower() in TITLE_BLOCKLIST:
+        logging.info(f"Vertex returned title '{first}' as name. Rejecting.")
+        return None
+
+    logging.info(f"Vertex Extracted POC from text: {first} ({data.get('title')})")
+    return {
+        "first_name": first,
+        "last_name": last,
+        "title": data.get("title") or "Contact",
+        "email": None,
+        "linkedin_url": ""
+    }
+
 def generate_keywords_from_icp(icp_row, variation_seed=None):
     """
     Generates tailored search keywords based on an Ideal Customer Profile (ICP).
@@ -333,13 +590,9 @@ def generate_keywords_from_icp(icp_row, variation_seed=None):
     """
     
     try:
-        model = GenerativeModel("gemini-2.0-flash-001")
-        response = model.generate_content(
-            prompt,
-            generation_config={"response_mime_type": "application/json"}
-        )
-        if response.text:
-            data = safe_extract_json(response.text)
+        text = generate_text(prompt, "keyword_generation")
+        if text:
+            data = safe_extract_json(text)
             keywords = data.get("keywords", [])
             logging.info(f"Vertex Generated {len(keywords)} keywords for ICP: {industry}")
             return data.get("keywords", [])
@@ -0,0 +1,206 @@
+"""
+Persistent per-ICP keyword pool with background refill.
+
+The discovery loop used to call generate_keywords_from_icp synchronously for
+every ICP on every iteration and then drop most of the output as stale. Now:
+  - each ICP has a pool persisted under CACHE_DIR (survives between runs),
+  - Gemini generation for all ICPs starts in parallel at startup and is
+    re-triggered in the background whenever a pool drops below the watermark,
+  - cheap local expansions (industry / product noun x modifier x store
+    template, derived from Input_ICP.csv) top the pool up so take_keywords()
+    rarely waits on the LLM.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache_store import PersistentCache
+from .config import (
+    KEYWORD_POOL_LOW_WATERMARK, KEYWORD_POOL_WORKERS, KEYWORD_POOL_TTL_DAYS, KEYWORD_MAX_USAGE
+)
+from .intelligence import generate_keywords_from_icp
+from .keyword_tracker import get_keyword_usage
+
+STORE_TEMPLATES = [
+    "{modifier} {noun} shopify store",
+    "{modifier} {noun} brand official site",
+    "{noun} DTC brand {geo}",
+    "{modifier} {noun} online store {geo}",
+    "buy {modifier} {noun} direct from brand",
+    "{noun} brand free shipping {geo}",
+]
+DEFAULT_MODIFIERS = ["premium", "handmade", "sustainable", "small batch", "family owned", "luxury", "organic"]
+MODIFIER_VOCAB = {
+    "sustainable", "eco-friendly", "organic", "luxury", "premium", "handmade", "artisan", "heavy",
+    "bulky", "perishable", "fresh", "vegan", "natural", "custom", "vintage", "modern", "subscription",
+}
+# Product nouns picked out of the free-text ICP description (anything else there is
+# business jargon, order volumes or regions, not something a store sells)
+PRODUCT_VOCAB = [
+    "furniture", "fitness equipment", "home decor", "mattresses", "appliances", "electronics",
+    "apparel", "fashion", "footwear", "jewelry", "accessories", "cosmetics", "skincare", "beauty",
+    "supplements", "food", "snacks", "coffee", "tea", "beverages", "wine", "plants", "pet supplies",
+    "toys", "baby products", "outdoor gear", "sporting goods", "candles", "kitchenware",
+]
+STOPWORDS = {"and", "or", "the", "a", "an", "of", "for", "with", "that", "their", "to", "e-commerce", "ecommerce",
+             "brands", "brand", "companies", "company", "items", "goods", "d2c", "dtc", "cross-border",
+             "shopify", "shopify plus", "bigcommerce", "woocommerce", "magento"}
+GLOBAL_GEOS = {"global", "worldwide", "international"}  # not useful as a search term
+LOCAL_EXPANSION_BATCH = 60  # local keywords added per top-up
+
+_cache = PersistentCache("keyword_pool", max_entries=500, default_ttl=KEYWORD_POOL_TTL_DAYS * 86400)
+_lock = threading.Lock()
+_pools = {}        # icp key -> {"keywords": [...], "generations": n, "local_seed": n}
+_refilling = set()
+_executor = None
+
+
+def icp_key(icp):
+    raw = "|".join(icp.get(k, "") for k in ("ICP Description", "Target Industry", "Target Geography"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _load(key):
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _cache.get(key) or {"keywords": [], "generations": 0, "local_seed": 0}
+        _pools[key] = pool
+    return pool
+
+
+def _persist(key):
+    _cache.set(key, _pools[key])
+
+
+def _split_terms(text):
+    return [t.strip(" .").lower() for t in re.split(r",|&|/|\band\b", text or "") if t.strip(" .")]
+
+
+def _geo_term(icp):
+    """'Global (US Expansion)' -> ''; 'USA' -> 'USA'."""
+    geo = re.sub(r"\([^)]*\)", "", icp.get("Target Geography", "USA") or "USA").strip()
+    return "" if geo.lower() in GLOBAL_GEOS else geo
+
+
+def local_expansions(icp, seed=0, limit=LOCAL_EXPANSION_BATCH):
+    """
+    Combinatorial keywords from the ICP row alone: Target Industry terms and
+    PRODUCT_VOCAB nouns named in the description, crossed with modifiers and
+    store templates. [] when the row names no product (the LLM covers it).
+    """
+    description = icp.get("ICP Description", "")
+    geo = _geo_term(icp)
+
+    nouns = _split_terms(icp.get("Target Industry", ""))
+    nouns += [n for n in PRODUCT_VOCAB if re.search(rf"\b{re.escape(n)}\b", description, re.I)]
+    nouns = [n for n in dict.fromkeys(nouns) if n and n not in STOPWORDS and not re.search(r"\d", n)]
+    if not nouns:
+        return []
+
+    words = {w.lower() for w in re.findall(r"[A-Za-z-]+", description)}
+    modifiers = sorted(words & MODIFIER_VOCAB) + DEFAULT_MODIFIERS
+    modifiers = list(dict.fromkeys(modifiers))
+
+    combos = [
+        re.sub(r"\s+", " ", template.format(modifier=modifier, noun=noun, geo=geo)).strip()
+        for noun in nouns for modifier in modifiers for template in STORE_TEMPLATES
+    ]
+    combos = list(dict.fromkeys(combos))
+    random.Random(f"{icp_key(icp)}:{seed}").shuffle(combos)
+    return combos[:limit]
+
+
+def _add_keywords(key, keywords, front=False):
+    """
+    Adds unseen, not-yet-exhausted keywords. LLM keywords go to the front so
+    they are searched before local expansions. Caller holds _lock.
+    """
+    pool = _load(key)
+    usage = get_keyword_usage()
+    existing = set(pool["keywords"])
+    added = [kw for kw in dict.fromkeys(keywords) if kw and kw not in existing and usage.get(kw, 0) < KEYWORD_MAX_USAGE]
+    pool["keywords"] = added + pool["keywords"] if front else pool["keywords"] + added
+    _persist(key)
+    return len(added)
+
+
+def _refill_from_llm(icp, key):
+    try:
+        with _lock:
+            seed = _load(key)["generations"]
+        keywords = generate_keywords_from_icp(icp, variation_seed=seed) or []
+        with _lock:
+            added = _add_keywords(key, keywords, front=True)
+            _pools[key]["generations"] = seed + 1
+            _persist(key)
+        logging.info(f"🔑 Keyword pool [{icp.get('Target Industry', 'General')}]: +{added} LLM keywords "
+                     f"(pool {len(_pools[key]['keywords'])})")
+    except Exception as e:
+        logging.error(f"Background keyword generation failed: {e}")
+    finally:
+        with _lock:
+            _refilling.discard(key)
+
+
+def _schedule_refill(icp, key):
+    """Starts a background LLM refill unless one is already running. Caller holds _lock."""
+    if key in _refilling or _executor is None:
+        return
+    _refilling.add(key)
+    _executor.submit(_refill_from_llm, icp, key)
+
+
+def start_keyword_pool(icps):
+    """Loads persisted pools and starts Gemini generation for every ICP in parallel."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=KEYWORD_POOL_WORKERS, thread_name_prefix="keywords")
+    with _lock:
+        for icp in icps:
+            key = icp_key(icp)
+            pool = _load(key)
+            logging.info(f"🔑 Keyword pool [{icp.get('Target Industry', 'General')}]: "
+                         f"{len(pool['keywords'])} keywords carried over")
+            _schedule_refill(icp, key)
+
+
+def take_keywords(icp, count):
+    """
+    Pops up to `count` fresh keywords for an ICP without waiting on the LLM.
+    Below the watermark a background refill starts; an empty pool is topped up
+    with local expansions immediately.
+    """
+    key = icp_key(icp)
+    with _lock:
+        pool = _load(key)
+        if len(pool["keywords"]) < count:
+            pool["local_seed"] += 1
+            added = _add_keywords(key, local_expansions(icp, seed=pool["local_seed"]))
+            logging.info(f"🔑 Keyword pool [{icp.get('Target Industry', 'General')}]: +{added} local expansions")
+
+        usage = get_keyword_usage()
+        taken = []
+        while pool["keywords"] and len(taken) < count:
+            kw = pool["keywords"].pop(0)
+            if usage.get(kw, 0) < KEYWORD_MAX_USAGE:
+                taken.append(kw)
+
+        if len(pool["keywords"]) < KEYWORD_POOL_LOW_WATERMARK:
+            _schedule_refill(icp, key)
+        _persist(key)
+    return taken
+
+
+def shutdown_keyword_pool():
+    """Persists pools and abandons queued refills (in-flight ones finish in the background)."""
+    global _executor
+    with _lock:
+        for key in _pools:
+            _persist(key)
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
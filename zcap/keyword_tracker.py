@@ -47,21 +47,25 @@ def mark_keyword_used(keyword, companies_found):
         for kw, data in keyword_data.items():
             writer.writerow([kw, data['last_used'], data['times_used'], data['companies_found']])
 
-def filter_fresh_keywords(keywords, max_usage=3):
-    """
-    Filter out keywords that have been overused.
-    Returns keywords that have been used < max_usage times.
-    """
+def get_keyword_usage():
+    """Returns {keyword: times_used} from the tracking file."""
     init_keyword_tracker()
     
-    if not os.path.exists(KEYWORD_TRACKING_FILE):
-        return keywords  # All fresh if no tracking yet
-    
     keyword_usage = {}
+    if not os.path.exists(KEYWORD_TRACKING_FILE):
+        return keyword_usage
     with open(KEYWORD_TRACKING_FILE, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
             keyword_usage[row['keyword']] = int(row['times_used'])
+    return keyword_usage
+
+def filter_fresh_keywords(keywords, max_usage=3):
+    """
+    Filter out keywords that have been overused.
+    Returns keywords that have been used < max_usage times.
+    """
+    keyword_usage = get_keyword_usage()
     
     # Filter keywords
     fresh_keywords = [kw for kw in keywords if keyword_usage.get(kw, 0) < max_usage]
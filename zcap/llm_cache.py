@@ -0,0 +1,62 @@
+"""
+Prompt-hash response cache for Vertex AI calls.
+
+Keyed by model + prompt + generation config, so identical requests (recurring
+SERP titles, the same team page on an enrichment rerun...) cost no LLM
+latency or quota. Each prompt type opts in via LLM_CACHE_PROMPT_TYPES.
+"""
+
+import hashlib
+import json
+import threading
+
+from .cache_store import PersistentCache
+from .config import LLM_CACHE_ENABLED, LLM_CACHE_PROMPT_TYPES, LLM_CACHE_TTL_DAYS, LLM_CACHE_MAX_ENTRIES
+
+_cache = PersistentCache("llm_responses", max_entries=LLM_CACHE_MAX_ENTRIES, default_ttl=LLM_CACHE_TTL_DAYS * 86400)
+
+_stats_lock = threading.Lock()
+_stats = {}  # prompt_type -> {"hits": n, "misses": n}
+
+
+def is_cacheable(prompt_type):
+    return LLM_CACHE_ENABLED and prompt_type in LLM_CACHE_PROMPT_TYPES
+
+
+def cache_key(model_name, prompt, generation_config=None):
+    payload = json.dumps(
+        {"model": model_name, "prompt": prompt, "config": generation_config or {}},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _record(prompt_type, outcome):
+    with _stats_lock:
+        entry = _stats.setdefault(prompt_type, {"hits": 0, "misses": 0})
+        entry[outcome] += 1
+
+
+def get_cached_response(prompt_type, model_name, prompt, generation_config=None):
+    """Returns cached response text, or None on miss / when the prompt type is not opted in."""
+    if not is_cacheable(prompt_type):
+        return None
+    text = _cache.get(cache_key(model_name, prompt, generation_config))
+    _record(prompt_type, "hits" if text is not None else "misses")
+    return text
+
+
+def store_response(prompt_type, model_name, prompt, text, generation_config=None):
+    if not text or not is_cacheable(prompt_type):
+        return
+    _cache.set(cache_key(model_name, prompt, generation_config), text)
+
+
+def get_llm_cache_stats():
+    """{prompt_type: {"hits", "misses", "hit_rate"}} for this process."""
+    with _stats_lock:
+        stats = {k: dict(v) for k, v in _stats.items()}
+    for entry in stats.values():
+        total = entry["hits"] + entry["misses"]
+        entry["hit_rate"] = round(entry["hits"] / total, 3) if total else 0.0
+    return stats
@@ -0,0 +1,118 @@
+"""
+Shared, concurrency-limited Gemini client.
+
+One provider instance (llm_providers.py: Vertex, recording or replay) serves
+every function in intelligence.py.
+Sync callers (threads) and async callers share the same concurrency budget
+(LLM_MAX_CONCURRENCY), and 429 / RESOURCE_EXHAUSTED responses are retried
+with jittered exponential backoff instead of fixed sleeps.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from .config import LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES, LLM_BACKOFF_BASE_SECONDS, LLM_BACKOFF_MAX_SECONDS
+from .llm_providers import create_provider
+from .llm_telemetry import record_call
+
+RATE_LIMIT_ERRORS = ("ResourceExhausted", "TooManyRequests")  # google.api_core.exceptions
+
+_provider = None
+_init_lock = threading.Lock()
+
+SLOT_POLL_SECONDS = 0.05  # async callers poll for a free slot instead of parking a thread on it
+
+# Counts in-flight calls across threads *and* event loops
+_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+def get_provider():
+    """Lazily creates the shared provider (LLM_PROVIDER)."""
+    global _provider
+    with _init_lock:
+        if _provider is None:
+            _provider = create_provider()
+            logging.info(f"🤖 LLM provider: {_provider.name} ({_provider.model_name})")
+        return _provider
+
+
+def set_provider(provider):
+    """Swaps the backend (e.g. a ReplayProvider with custom latency in a load test)."""
+    global _provider
+    with _init_lock:
+        _provider = provider
+
+
+def is_rate_limited(error):
+    """429 / RESOURCE_EXHAUSTED, by exception type or HTTP status (never by message text)."""
+    if any(cls.__name__ in RATE_LIMIT_ERRORS for cls in type(error).__mro__):
+        return True
+    code = getattr(error, "code", None)
+    code = getattr(error, "status_code", None) if code is None else code
+    return isinstance(code, int) and code == 429
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with 'equal jitter' (half fixed, half random)."""
+    ceiling = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def generate_content(prompt, generation_config=None, prompt_type="unknown"):
+    """
+    Blocking Gemini call. Returns response text; raises on non-retryable errors
+    or when retries are exhausted. Each call (with its retries) is recorded in
+    llm_telemetry under prompt_type.
+    """
+    provider = get_provider()
+    started = time.time()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            with _slots:
+                text, usage = provider.generate(prompt, generation_config)
+            record_call(prompt_type, time.time() - started, retries=attempt, **usage)
+            return text
+        except Exception as e:
+            if not is_rate_limited(e) or attempt == LLM_MAX_RETRIES:
+                record_call(prompt_type, time.time() - started, retries=attempt, error=e)
+                raise
+            delay = backoff_delay(attempt)
+            logging.warning(f"Vertex rate limited (attempt {attempt + 1}/{LLM_MAX_RETRIES}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def _acquire_slot():
+    """
+    Takes a _slots slot without blocking the event loop. Polling (rather than
+    to_thread(_slots.acquire)) means a cancelled caller never ends up owning a
+    slot it can't release.
+    """
+    while not _slots.acquire(blocking=False):
+        await asyncio.sleep(SLOT_POLL_SECONDS)
+
+
+async def generate_content_async(prompt, generation_config=None, prompt_type="unknown"):
+    """
+    Async Gemini call (provider.generate_async) sharing the same concurrency
+    budget, retry policy and telemetry as generate_content.
+    """
+    provider = get_provider()
+    started = time.time()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        await _acquire_slot()
+        try:
+            text, usage = await provider.generate_async(prompt, generation_config)
+            record_call(prompt_type, time.time() - started, retries=attempt, **usage)
+            return text
+        except Exception as e:
+            if not is_rate_limited(e) or attempt == LLM_MAX_RETRIES:
+                record_call(prompt_type, time.time() - started, retries=attempt, error=e)
+                raise
+            delay = backoff_delay(attempt)
+            logging.warning(f"Vertex rate limited (attempt {attempt + 1}/{LLM_MAX_RETRIES}), retrying in {delay:.1f}s")
+        finally:
+            _slots.release()
+        await asyncio.sleep(delay)
@@ -0,0 +1,177 @@
+"""
+LLM provider backends used by llm_client.py (selected with LLM_PROVIDER).
+
+  vertex  - live Vertex AI Gemini (default)
+  record  - Vertex, plus every prompt/response pair appended to LLM_RECORD_FILE
+  replay  - serves responses from LLM_RECORD_FILE with simulated latency;
+            no network or credentials needed
+
+Providers return (text, usage) where usage is {"input_tokens", "output_tokens"}.
+
+record/replay make it possible to load-test run.py / enrichment_runner.py
+concurrency deterministically on a laptop or CI box. Set LLM_CACHE_ENABLED=false
+for both the recording and the replay run, otherwise cache hits never reach
+the provider.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from .config import (
+    GOOGLE_CLOUD_PROJECT, GOOGLE_CLOUD_LOCATION, LLM_MODEL_NAME, LLM_PROVIDER, LLM_RECORD_FILE,
+    LLM_REPLAY_LATENCY_MS, LLM_REPLAY_JITTER_MS, LLM_REPLAY_MISS
+)
+from .llm_cache import cache_key
+
+
+class ReplayMiss(LookupError):
+    """No recorded response for this prompt (LLM_REPLAY_MISS=error)."""
+
+
+def _usage(response):
+    meta = getattr(response, "usage_metadata", None)
+    return {
+        "input_tokens": getattr(meta, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(meta, "candidates_token_count", 0) or 0,
+    }
+
+
+class VertexProvider:
+    name = "vertex"
+
+    def __init__(self, model_name=LLM_MODEL_NAME):
+        # Imported here so record-less replay runs don't need the Vertex SDK
+        import vertexai
+        from vertexai.generative_models import GenerativeModel
+
+        try:
+            vertexai.init(project=GOOGLE_CLOUD_PROJECT, location=GOOGLE_CLOUD_LOCATION)
+        except Exception as e:
+            logging.warning(f"Vertex AI init failed (might be delayed until usage): {e}")
+        self.model_name = model_name
+        self.model = GenerativeModel(model_name)
+
+    def generate(self, prompt, generation_config=None):
+        response = self.model.generate_content(prompt, generation_config=generation_config)
+        return response.text, _usage(response)
+
+    async def generate_async(self, prompt, generation_config=None):
+        response = await self.model.generate_content_async(prompt, generation_config=generation_config)
+        return response.text, _usage(response)
+
+
+class RecordingProvider:
+    """Wraps another provider and appends {key, prompt, response, usage, latency} lines to a JSONL file."""
+    name = "record"
+
+    def __init__(self, inner, path=LLM_RECORD_FILE):
+        self.inner = inner
+        self.model_name = inner.model_name
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _record(self, prompt, generation_config, response, usage, latency):
+        entry = {
+            "key": cache_key(self.model_name, prompt, generation_config),
+            "model": self.model_name,
+            "prompt": prompt,
+            "config": generation_config or {},
+            "response": response,
+            "usage": usage,
+            "latency": round(latency, 3),
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def generate(self, prompt, generation_config=None):
+        started = time.time()
+        response, usage = self.inner.generate(prompt, generation_config)
+        self._record(prompt, generation_config, response, usage, time.time() - started)
+        return response, usage
+
+    async def generate_async(self, prompt, generation_config=None):
+        started = time.time()
+        response, usage = await self.inner.generate_async(prompt, generation_config)
+        self._record(prompt, generation_config, response, usage, time.time() - started)
+        return response, usage
+
+
+class ReplayProvider:
+    """
+    Serves recorded responses keyed like the LLM cache (model + prompt + config).
+    Repeated prompts cycle through their recorded responses in order.
+    Latency: LLM_REPLAY_LATENCY_MS +/- LLM_REPLAY_JITTER_MS; a negative base
+    latency replays each pair's recorded latency instead.
+    """
+    name = "replay"
+
+    def __init__(self, path=LLM_RECORD_FILE, latency_ms=LLM_REPLAY_LATENCY_MS,
+                 jitter_ms=LLM_REPLAY_JITTER_MS, on_miss=LLM_REPLAY_MISS, model_name=LLM_MODEL_NAME):
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.on_miss = on_miss
+        self._lock = threading.Lock()
+        self._responses = {}  # key -> [(response, usage, latency)]
+        self._cursor = {}
+        self.misses = 0
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._responses.setdefault(entry["key"], []).append(
+                        (entry["response"], entry.get("usage") or {}, entry.get("latency", 0)))
+        logging.info(f"🎞️ LLM replay: {sum(len(v) for v in self._responses.values())} recorded responses "
+                     f"from {path}")
+
+    def _lookup(self, prompt, generation_config):
+        key = cache_key(self.model_name, prompt, generation_config)
+        with self._lock:
+            recorded = self._responses.get(key)
+            if not recorded:
+                self.misses += 1
+                if self.on_miss == "empty":
+                    return "{}", {}, self._delay(0)
+                raise ReplayMiss(f"No recorded LLM response for prompt {key[:12]}")
+            idx = self._cursor.get(key, 0)
+            self._cursor[key] = idx + 1
+        response, usage, recorded_latency = recorded[idx % len(recorded)]
+        return response, usage, self._delay(recorded_latency)
+
+    def _delay(self, recorded_latency):
+        if self.latency_ms < 0:
+            return recorded_latency
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, (self.latency_ms + jitter) / 1000)
+
+    def generate(self, prompt, generation_config=None):
+        response, usage, delay = self._lookup(prompt, generation_config)
+        time.sleep(delay)
+        return response, usage
+
+    async def generate_async(self, prompt, generation_config=None):
+        response, usage, delay = self._lookup(prompt, generation_config)
+        await asyncio.sleep(delay)
+        return response, usage
+
+
+def create_provider(kind=LLM_PROVIDER):
+    kind = (kind or "vertex").lower()
+    if kind == "replay":
+        return ReplayProvider()
+    if kind == "record":
+        return RecordingProvider(VertexProvider())
+    if kind != "vertex":
+        logging.warning(f"Unknown LLM_PROVIDER '{kind}', using vertex")
+    return VertexProvider()
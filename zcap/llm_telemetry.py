@@ -0,0 +1,141 @@
+"""
+Per-call telemetry for Gemini requests.
+
+Every call made through llm_client records prompt type, latency, retries,
+input/output tokens (usage_metadata) and errors; intelligence.generate_text
+adds cache hits and the JSON-parse outcome. Calls are attributed to the
+company being processed via company_scope(), and write_llm_report() dumps an
+aggregated JSON report (p50/p95 latency, tokens per saved lead, calls per
+company) next to the run log.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+_current_company = contextvars.ContextVar("llm_company", default=None)
+
+_lock = threading.Lock()
+_by_type = {}       # prompt_type -> counters + latencies
+_by_company = {}    # company -> {"calls": n, "cache_hits": n, "tokens": n}
+
+
+def _entry(prompt_type):
+    return _by_type.setdefault(prompt_type, {
+        "calls": 0, "errors": 0, "retries": 0, "cache_hits": 0,
+        "json_ok": 0, "json_failed": 0,
+        "input_tokens": 0, "output_tokens": 0, "latencies": [],
+    })
+
+
+def _company_entry():
+    company = _current_company.get()
+    if company is None:
+        return None
+    return _by_company.setdefault(company, {"calls": 0, "cache_hits": 0, "tokens": 0})
+
+
+@contextmanager
+def company_scope(company):
+    """Attributes LLM calls made inside the block (same thread/task) to `company`."""
+    token = _current_company.set(company)
+    try:
+        yield
+    finally:
+        _current_company.reset(token)
+
+
+def record_call(prompt_type, latency, retries=0, input_tokens=0, output_tokens=0, error=None):
+    """One provider request (including its retries) finished or gave up."""
+    with _lock:
+        entry = _entry(prompt_type)
+        entry["calls"] += 1
+        entry["retries"] += retries
+        entry["input_tokens"] += input_tokens or 0
+        entry["output_tokens"] += output_tokens or 0
+        entry["latencies"].append(latency)
+        if error is not None:
+            entry["errors"] += 1
+        company = _company_entry()
+        if company is not None:
+            company["calls"] += 1
+            company["tokens"] += (input_tokens or 0) + (output_tokens or 0)
+
+
+def record_cache_hit(prompt_type):
+    with _lock:
+        _entry(prompt_type)["cache_hits"] += 1
+        company = _company_entry()
+        if company is not None:
+            company["cache_hits"] += 1
+
+
+def record_parse(prompt_type, ok):
+    with _lock:
+        _entry(prompt_type)["json_ok" if ok else "json_failed"] += 1
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return round(ordered[idx], 3)
+
+
+def get_llm_report(leads_saved=0):
+    with _lock:
+        by_type = {k: dict(v, latencies=list(v["latencies"])) for k, v in _by_type.items()}
+        by_company = {k: dict(v) for k, v in _by_company.items()}
+
+    prompt_types = {}
+    totals = {"calls": 0, "cache_hits": 0, "errors": 0, "retries": 0, "input_tokens": 0, "output_tokens": 0}
+    all_latencies = []
+    for prompt_type, entry in sorted(by_type.items()):
+        latencies = entry.pop("latencies")
+        all_latencies.extend(latencies)
+        entry["latency_p50"] = _percentile(latencies, 50)
+        entry["latency_p95"] = _percentile(latencies, 95)
+        entry["latency_total"] = round(sum(latencies), 2)
+        prompt_types[prompt_type] = entry
+        for key in totals:
+            totals[key] += entry[key]
+
+    totals["latency_p50"] = _percentile(all_latencies, 50)
+    totals["latency_p95"] = _percentile(all_latencies, 95)
+    total_tokens = totals["input_tokens"] + totals["output_tokens"]
+    calls_per_company = [c["calls"] for c in by_company.values()]
+
+    return {
+        "leads_saved": leads_saved,
+        "totals": totals,
+        "tokens_per_saved_lead": round(total_tokens / leads_saved, 1) if leads_saved else None,
+        "companies": len(by_company),
+        "calls_per_company": {
+            "mean": round(sum(calls_per_company) / len(calls_per_company), 2) if calls_per_company else 0.0,
+            "p95": _percentile(calls_per_company, 95),
+            "max": max(calls_per_company) if calls_per_company else 0,
+        },
+        "prompt_types": prompt_types,
+    }
+
+
+def write_llm_report(path, leads_saved=0):
+    """Writes the aggregated report as JSON and logs a one-line summary."""
+    report = get_llm_report(leads_saved)
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    except Exception as e:
+        logging.warning(f"Could not write LLM report {path}: {e}")
+
+    totals = report["totals"]
+    logging.info(f"📈 LLM: {totals['calls']} calls ({totals['cache_hits']} cache hits, {totals['errors']} errors, "
+                 f"{totals['retries']} retries), p50 {totals['latency_p50']}s / p95 {totals['latency_p95']}s, "
+                 f"{totals['input_tokens'] + totals['output_tokens']} tokens, "
+                 f"{report['calls_per_company']['mean']} calls/company → {path}")
+    return report
@@ -0,0 +1,101 @@
+"""
+Persistent knowledge of how mail domains and MX providers answer SMTP probes.
+
+Replaces the per-process catch_all_domains set. Each SMTP session's outcome
+is recorded per domain (catch_all / greylisting / blocks_probes, each with its
+own TTL) and aggregated per MX provider (aspmx.l.google.com -> google.com),
+so once a provider is seen to accept every RCPT or refuse probes, domains
+hosted there are skipped without opening a session. Stored under CACHE_DIR.
+"""
+
+import logging
+import threading
+import time
+
+from .cache_store import PersistentCache
+from .config import (
+    MAIL_KB_CATCH_ALL_TTL_DAYS, MAIL_KB_GREYLIST_TTL_DAYS, MAIL_KB_BLOCKED_TTL_DAYS,
+    MAIL_KB_PROVIDER_MIN_SESSIONS, MAIL_KB_PROVIDER_RATIO, MAIL_KB_PROVIDER_TTL_DAYS
+)
+
+# Behaviors worth remembering, and how long a domain keeps each one
+DOMAIN_TTL_DAYS = {
+    "catch_all": MAIL_KB_CATCH_ALL_TTL_DAYS,
+    "greylisting": MAIL_KB_GREYLIST_TTL_DAYS,
+    "blocks_probes": MAIL_KB_BLOCKED_TTL_DAYS,
+}
+# Provider behavior when enough of its sessions end the same way
+PROVIDER_BEHAVIORS = {"catch_all": "accepts_all", "blocks_probes": "blocks_probes"}
+# Multi-label public suffixes seen on MX hosts (mail.example.co.uk -> example.co.uk)
+TWO_LABEL_SUFFIXES = {"co.uk", "com.au", "co.nz", "co.jp", "com.br", "co.za", "com.mx"}
+
+_domains = PersistentCache("mail_domains", max_entries=50000, default_ttl=MAIL_KB_CATCH_ALL_TTL_DAYS * 86400)
+_providers = PersistentCache("mail_providers", max_entries=5000, default_ttl=MAIL_KB_PROVIDER_TTL_DAYS * 86400)
+_lock = threading.Lock()
+_stats = {"domain_skips": 0, "provider_skips": 0, "recorded": 0}
+
+
+def provider_for_mx(mx_host):
+    """'aspmx.l.google.com' -> 'google.com'; 'brand-com.mail.protection.outlook.com' -> 'outlook.com'."""
+    labels = (mx_host or "").lower().rstrip(".").split(".")
+    if len(labels) >= 3 and ".".join(labels[-2:]) in TWO_LABEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def known_behavior(domain, mx_host=None):
+    """
+    Reason to skip SMTP for this domain ('catch_all', 'greylisting',
+    'blocks_probes', 'provider accepts_all', ...) or None if worth probing.
+    """
+    entry = _domains.get(domain)
+    if entry:
+        with _lock:
+            _stats["domain_skips"] += 1
+        return entry["behavior"]
+
+    provider = provider_for_mx(mx_host) if mx_host else None
+    profile = _providers.get(provider) if provider else None
+    if profile and profile.get("behavior"):
+        with _lock:
+            _stats["provider_skips"] += 1
+        return f"provider {profile['behavior']}"
+    return None
+
+
+def _update_provider(provider, behavior):
+    """
+    Session counts per outcome; the provider earns a behavior once it dominates.
+    Counts restart every MAIL_KB_PROVIDER_TTL_DAYS so providers can change policy.
+    """
+    now = time.time()
+    with _lock:
+        profile = _providers.get(provider) or {"sessions": 0, "outcomes": {}, "behavior": None, "since": now}
+        profile["sessions"] += 1
+        profile["outcomes"][behavior] = profile["outcomes"].get(behavior, 0) + 1
+        profile["behavior"] = None
+        if profile["sessions"] >= MAIL_KB_PROVIDER_MIN_SESSIONS:
+            for outcome, provider_behavior in PROVIDER_BEHAVIORS.items():
+                if profile["outcomes"].get(outcome, 0) / profile["sessions"] >= MAIL_KB_PROVIDER_RATIO:
+                    profile["behavior"] = provider_behavior
+        _providers.set(provider, profile, ttl=max(1, profile["since"] + MAIL_KB_PROVIDER_TTL_DAYS * 86400 - now))
+    return profile["behavior"]
+
+
+def record_outcome(domain, mx_host, behavior):
+    """Records one SMTP session outcome ('normal', 'catch_all', 'greylisting', 'blocks_probes')."""
+    ttl_days = DOMAIN_TTL_DAYS.get(behavior)
+    if ttl_days:
+        _domains.set(domain, {"behavior": behavior, "mx": mx_host}, ttl=ttl_days * 86400)
+    if mx_host:
+        provider = provider_for_mx(mx_host)
+        learned = _update_provider(provider, behavior)
+        if learned:
+            logging.info(f"📚 Mail provider {provider} marked {learned}")
+    with _lock:
+        _stats["recorded"] += 1
+
+
+def get_mail_kb_stats():
+    with _lock:
+        return dict(_stats)
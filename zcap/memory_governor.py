@@ -0,0 +1,310 @@
+"""
+Job-wide memory governor.
+
+Cloud Run kills the whole task on OOM, throwing away every in-flight lead.
+The governor samples RSS of this process plus its children (Chromium) and,
+as usage approaches the configured ceiling, shrinks browser concurrency,
+evicts registered caches and recycles browser processes. It also tracks the
+high-water mark per pipeline stage for the run summary.
+"""
+
+import gc
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import psutil
+
+from .config import (
+    MEMORY_LIMIT_MB, MEMORY_SOFT_LIMIT_RATIO, MEMORY_HARD_LIMIT_RATIO,
+    MEMORY_SAMPLE_INTERVAL, BROWSER_MAX_CONCURRENCY
+)
+
+DEFAULT_MEMORY_LIMIT_MB = 2048
+CGROUP_LIMIT_FILES = ["/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"]
+BROWSER_PROCESS_NAMES = ["chrome", "chromium", "headless_shell"]
+BROWSER_MAX_AGE_SECONDS = 180  # Per-page browsers never live this long unless hung
+
+_lock = threading.Lock()
+_browser_cond = threading.Condition()
+_stop_event = threading.Event()
+_sampler_thread = None
+
+_state = {
+    "limit_mb": None,
+    "peak_mb": 0.0,
+    "last_mb": 0.0,
+    "stage_peaks": {},
+    "active_stages": {},
+    "soft_events": 0,
+    "hard_events": 0,
+    "browser_limit": BROWSER_MAX_CONCURRENCY,
+    "browser_active": 0
+}
+
+_caches = {}      # name -> evict_fn(fraction) -> entries evicted
+_recyclers = {}   # name -> recycle_fn() -> processes recycled
+_browser_owners = set()  # pids whose long-lived browsers the reaper must leave alone
+
+
+def detect_memory_limit_mb():
+    """
+    Configured limit, else the container's cgroup limit, else a 2 GiB default.
+    """
+    if MEMORY_LIMIT_MB:
+        return MEMORY_LIMIT_MB
+
+    for path in CGROUP_LIMIT_FILES:
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+            if raw.isdigit():
+                limit = int(raw) // (1024 * 1024)
+                if 0 < limit < 1024 * 1024:  # ignore "unlimited" sentinels
+                    return limit
+        except OSError:
+            continue
+
+    return DEFAULT_MEMORY_LIMIT_MB
+
+
+def sample_rss_mb():
+    """RSS of this process plus all descendants (browsers, worker processes)."""
+    try:
+        proc = psutil.Process()
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / (1024 * 1024)
+    except Exception as e:
+        logging.warning(f"RSS sampling failed: {e}")
+        return 0.0
+
+
+# ---------------------------------------------------
+# Registration
+# ---------------------------------------------------
+def register_cache(name, evict_fn):
+    """evict_fn(fraction) drops that fraction (0-1] of the cache; returns entries evicted."""
+    with _lock:
+        _caches[name] = evict_fn
+
+
+def register_recycler(name, recycle_fn):
+    """recycle_fn() restarts/kills browser processes; returns how many were recycled."""
+    with _lock:
+        _recyclers[name] = recycle_fn
+
+
+def register_browser_owner(pid):
+    """Marks a process (e.g. a scrape worker) that legitimately keeps a browser open."""
+    with _lock:
+        _browser_owners.add(pid)
+
+
+def unregister_browser_owner(pid):
+    with _lock:
+        _browser_owners.discard(pid)
+
+
+def _owned_browser_pids():
+    with _lock:
+        owners = list(_browser_owners)
+    owned = set()
+    for pid in owners:
+        try:
+            owned.update(c.pid for c in psutil.Process(pid).children(recursive=True))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return owned
+
+
+@contextmanager
+def stage(name):
+    """Attributes memory samples taken while the block runs to `name`."""
+    with _lock:
+        _state["active_stages"][name] = _state["active_stages"].get(name, 0) + 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _state["active_stages"][name] -= 1
+            if _state["active_stages"][name] <= 0:
+                del _state["active_stages"][name]
+
+
+@contextmanager
+def browser_slot():
+    """
+    Blocks until the governor allows another concurrent browser.
+    Wrap every Chromium launch in this.
+    """
+    with _browser_cond:
+        while _state["browser_active"] >= _state["browser_limit"]:
+            _browser_cond.wait(timeout=5)
+        _state["browser_active"] += 1
+    try:
+        yield
+    finally:
+        with _browser_cond:
+            _state["browser_active"] -= 1
+            _browser_cond.notify_all()
+
+
+def _set_browser_limit(limit):
+    with _browser_cond:
+        limit = max(1, min(BROWSER_MAX_CONCURRENCY, limit))
+        if limit != _state["browser_limit"]:
+            logging.info(f"🧠 Browser concurrency {_state['browser_limit']} → {limit}")
+            _state["browser_limit"] = limit
+            _browser_cond.notify_all()
+
+
+# ---------------------------------------------------
+# Pressure handling
+# ---------------------------------------------------
+def _evict_caches(fraction):
+    with _lock:
+        caches = list(_caches.items())
+    evicted = 0
+    for name, evict_fn in caches:
+        try:
+            evicted += evict_fn(fraction) or 0
+        except Exception as e:
+            logging.warning(f"Cache eviction failed for {name}: {e}")
+    return evicted
+
+
+def _recycle_browsers():
+    with _lock:
+        recyclers = list(_recyclers.items())
+    recycled = 0
+    for name, recycle_fn in recyclers:
+        try:
+            recycled += recycle_fn() or 0
+        except Exception as e:
+            logging.warning(f"Browser recycle failed for {name}: {e}")
+    return recycled
+
+
+def reap_stray_browsers():
+    """
+    Kills Chromium descendants older than BROWSER_MAX_AGE_SECONDS.
+    Per-page browsers are closed within seconds, so old ones are hung sessions.
+    Browsers under registered owners (scrape workers) are recycled by their pool.
+    """
+    reaped = 0
+    now = time.time()
+    owned = _owned_browser_pids()
+    try:
+        for child in psutil.Process().children(recursive=True):
+            if child.pid in owned:
+                continue
+            try:
+                name = child.name().lower()
+                if any(b in name for b in BROWSER_PROCESS_NAMES) and now - child.create_time() > BROWSER_MAX_AGE_SECONDS:
+                    child.kill()
+                    reaped += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    except Exception as e:
+        logging.warning(f"Browser reaping failed: {e}")
+    if reaped:
+        logging.warning(f"🧹 Killed {reaped} stray browser process(es)")
+    return reaped
+
+
+def _record_sample():
+    rss = sample_rss_mb()
+    limit = _state["limit_mb"] or detect_memory_limit_mb()
+
+    with _lock:
+        _state["limit_mb"] = limit
+        _state["last_mb"] = rss
+        _state["peak_mb"] = max(_state["peak_mb"], rss)
+        for name in _state["active_stages"]:
+            _state["stage_peaks"][name] = max(_state["stage_peaks"].get(name, 0.0), rss)
+
+    return rss, limit
+
+
+def check_pressure():
+    """
+    Takes one sample, updates high-water marks and reacts to memory pressure.
+    Called by the sampler thread; safe to call directly.
+    """
+    rss, limit = _record_sample()
+
+    if rss >= limit * MEMORY_HARD_LIMIT_RATIO:
+        _state["hard_events"] += 1
+        logging.warning(f"🧠 HARD memory pressure: {rss:.0f}/{limit} MB")
+        _set_browser_limit(1)
+        evicted = _evict_caches(1.0)
+        recycled = _recycle_browsers()
+        gc.collect()
+        logging.warning(f"🧠 Flushed {evicted} cache entries, recycled {recycled} browser process(es)")
+    elif rss >= limit * MEMORY_SOFT_LIMIT_RATIO:
+        _state["soft_events"] += 1
+        logging.info(f"🧠 Soft memory pressure: {rss:.0f}/{limit} MB")
+        _set_browser_limit(_state["browser_limit"] - 1)
+        _evict_caches(0.5)
+    elif rss < limit * MEMORY_SOFT_LIMIT_RATIO * 0.8:
+        # Hysteresis: only give concurrency back well below the soft line
+        _set_browser_limit(_state["browser_limit"] + 1)
+
+    return rss
+
+
+def _sampler_loop():
+    while not _stop_event.wait(MEMORY_SAMPLE_INTERVAL):
+        try:
+            check_pressure()
+        except Exception as e:
+            logging.warning(f"Memory governor sample failed: {e}")
+
+
+def start_governor():
+    global _sampler_thread
+    if _sampler_thread and _sampler_thread.is_alive():
+        return
+    _state["limit_mb"] = detect_memory_limit_mb()
+    register_recycler("stray_browsers", reap_stray_browsers)
+    _stop_event.clear()
+    _sampler_thread = threading.Thread(target=_sampler_loop, name="memory-governor", daemon=True)
+    _sampler_thread.start()
+    logging.info(f"🧠 Memory governor started (limit {_state['limit_mb']} MB, "
+                 f"browsers ≤ {BROWSER_MAX_CONCURRENCY})")
+
+
+def stop_governor():
+    _stop_event.set()
+    if _sampler_thread:
+        _sampler_thread.join(timeout=MEMORY_SAMPLE_INTERVAL + 1)
+
+
+# ---------------------------------------------------
+# Reporting
+# ---------------------------------------------------
+def get_memory_summary():
+    _record_sample()
+    with _lock:
+        return {
+            "limit_mb": _state["limit_mb"],
+            "peak_mb": round(_state["peak_mb"], 1),
+            "stage_peaks_mb": {k: round(v, 1) for k, v in _state["stage_peaks"].items()},
+            "soft_pressure_events": _state["soft_events"],
+            "hard_pressure_events": _state["hard_events"]
+        }
+
+
+def log_memory_summary():
+    summary = get_memory_summary()
+    logging.info(f"🧠 Memory peak: {summary['peak_mb']} / {summary['limit_mb']} MB "
+                 f"(soft events: {summary['soft_pressure_events']}, hard events: {summary['hard_pressure_events']})")
+    for name, peak in sorted(summary["stage_peaks_mb"].items(), key=lambda kv: -kv[1]):
+        logging.info(f"   • {name}: {peak} MB high-water")
+    return summary
@@ -0,0 +1,195 @@
+"""
+Persistent index of every LinkedIn profile seen in people-search results.
+
+A num=10 X-ray query returns several valid profiles but only the best one
+becomes the lead; the rest used to be thrown away, so reruns, enrichment
+person_mode and alternative-contact lookups paid for fresh searches. Every
+parsed profile is stored here (SQLite under CACHE_DIR) keyed by canonical
+domain and normalized company name, and identification.py answers from the
+index first, searching only on a miss or when entries are stale.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from .config import CACHE_DIR, PEOPLE_INDEX_TTL_DAYS, PEOPLE_INDEX_NEGATIVE_TTL_DAYS
+
+DB_PATH = os.path.join(CACHE_DIR, "people_index.sqlite3")
+COMPANY_SUFFIXES = re.compile(r"\b(inc|llc|ltd|limited|co|corp|corporation|company|gmbh|plc|the)\b\.?", re.I)
+
+_lock = threading.Lock()
+_conn = None
+_stats = {"hits": 0, "misses": 0, "negative_hits": 0, "profiles_indexed": 0}
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10)
+        _conn.executescript("""
+            CREATE TABLE IF NOT EXISTS people (
+                linkedin_url TEXT PRIMARY KEY,
+                first_name TEXT, last_name TEXT, title TEXT,
+                domain TEXT, company_key TEXT, company_token TEXT,
+                match_score INTEGER, source_query TEXT, seen_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_people_domain ON people(domain);
+            CREATE INDEX IF NOT EXISTS idx_people_company ON people(company_key);
+            CREATE INDEX IF NOT EXISTS idx_people_name ON people(first_name, last_name);
+            CREATE TABLE IF NOT EXISTS searches (
+                key TEXT PRIMARY KEY, searched_at REAL, profiles INTEGER
+            );
+        """)
+        _conn.commit()
+    return _conn
+
+
+def canonical_domain(domain):
+    domain = (domain or "").lower().strip()
+    domain = re.sub(r"^https?://", "", domain).split("/")[0].split(":")[0]
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def normalize_company(name):
+    """'The Buttah Skin Co.' -> 'buttahskin'."""
+    name = COMPANY_SUFFIXES.sub(" ", (name or "").lower())
+    return re.sub(r"[^a-z0-9]", "", name)
+
+
+def _row_to_person(row):
+    first, last, title, url, match = row
+    return {
+        "first_name": first,
+        "last_name": last,
+        "title": title,
+        "email": None,
+        "linkedin_url": url,
+        "match_score": match or 0,
+    }
+
+
+def add_profiles(profiles, source_query, domain=None, company_name=None):
+    """
+    profiles: [(candidate, match_score, company_token)]. Profiles tied to the
+    searched company (match_score > 0) are keyed by its domain/name; the rest
+    keep only the company segment parsed from their own result title.
+    """
+    now = time.time()
+    domain = canonical_domain(domain)
+    company_key = normalize_company(company_name)
+    rows = []
+    for candidate, match, company_token in profiles:
+        tied = match > 0
+        rows.append((
+            candidate["linkedin_url"], candidate["first_name"], candidate["last_name"], candidate["title"],
+            domain if tied else None,
+            company_key if tied and company_key else normalize_company(company_token),
+            company_token or "", match, source_query, now
+        ))
+    if not rows:
+        return
+    try:
+        with _lock:
+            db = _db()
+            # Keep the strongest company tie when a profile shows up for another query
+            db.executemany("""
+                INSERT INTO people (linkedin_url, first_name, last_name, title, domain, company_key,
+                                    company_token, match_score, source_query, seen_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(linkedin_url) DO UPDATE SET
+                    title = excluded.title, seen_at = excluded.seen_at,
+                    domain = COALESCE(excluded.domain, people.domain),
+                    company_key = CASE WHEN excluded.match_score >= people.match_score
+                                       THEN excluded.company_key ELSE people.company_key END,
+                    match_score = MAX(excluded.match_score, people.match_score)
+            """, rows)
+            db.commit()
+            _stats["profiles_indexed"] += len(rows)
+    except Exception as e:
+        logging.warning(f"People index write failed: {e}")
+
+
+def record_search(key, profiles):
+    """Remembers that `key` was searched (so empty results aren't re-queried immediately)."""
+    try:
+        with _lock:
+            db = _db()
+            db.execute("INSERT OR REPLACE INTO searches (key, searched_at, profiles) VALUES (?, ?, ?)",
+                       (key, time.time(), profiles))
+            db.commit()
+    except Exception as e:
+        logging.warning(f"People index write failed: {e}")
+
+
+def search_key(domain=None, company_name=None, person=None):
+    return "|".join([canonical_domain(domain), normalize_company(company_name), (person or "").lower()])
+
+
+def recently_empty(key):
+    """True if this exact search ran within PEOPLE_INDEX_NEGATIVE_TTL_DAYS and found nobody."""
+    cutoff = time.time() - PEOPLE_INDEX_NEGATIVE_TTL_DAYS * 86400
+    try:
+        with _lock:
+            row = _db().execute("SELECT searched_at, profiles FROM searches WHERE key = ?", (key,)).fetchone()
+    except Exception:
+        return False
+    hit = bool(row and row[0] >= cutoff and not row[1])
+    if hit:
+        with _lock:
+            _stats["negative_hits"] += 1
+    return hit
+
+
+def lookup_company(domain=None, company_name=None):
+    """Fresh profiles tied to a company (by domain, else normalized name)."""
+    cutoff = time.time() - PEOPLE_INDEX_TTL_DAYS * 86400
+    domain = canonical_domain(domain)
+    company_key = normalize_company(company_name)
+    if not domain and not company_key:
+        return []
+    try:
+        with _lock:
+            rows = _db().execute("""
+                SELECT first_name, last_name, title, linkedin_url, match_score FROM people
+                WHERE seen_at >= ? AND match_score > 0
+                  AND ((? != '' AND domain = ?) OR (? != '' AND company_key = ?))
+            """, (cutoff, domain, domain, company_key, company_key)).fetchall()
+            _stats["hits" if rows else "misses"] += 1
+    except Exception as e:
+        logging.warning(f"People index read failed: {e}")
+        return []
+    return [_row_to_person(r) for r in rows]
+
+
+def lookup_person(first_name, last_name, company_name=None, domain=None):
+    """
+    A fresh profile for a named person at this company (by domain or
+    normalized name). None without a company: a bare name match could be anyone.
+    """
+    cutoff = time.time() - PEOPLE_INDEX_TTL_DAYS * 86400
+    domain = canonical_domain(domain)
+    company_key = normalize_company(company_name)
+    if not domain and not company_key:
+        return None
+    try:
+        with _lock:
+            row = _db().execute("""
+                SELECT first_name, last_name, title, linkedin_url, match_score FROM people
+                WHERE seen_at >= ? AND lower(first_name) = lower(?) AND lower(last_name) = lower(?)
+                  AND ((? != '' AND domain = ?) OR (? != '' AND company_key = ?))
+            """, (cutoff, first_name or "", last_name or "", domain, domain, company_key, company_key)).fetchone()
+            _stats["hits" if row else "misses"] += 1
+    except Exception as e:
+        logging.warning(f"People index read failed: {e}")
+        return None
+    return _row_to_person(row) if row else None
+
+
+def get_people_index_stats():
+    with _lock:
+        return dict(_stats)
@@ -0,0 +1,311 @@
+"""
+Platform-aware structured extraction for Shopify / WooCommerce storefronts.
+
+Instead of rendering the store in Chromium and letting Gemini infer catalog size,
+price points and shipping policy from 15k chars of body text, we pull the public
+platform endpoints over plain HTTP and hand analyze_lead a compact fact block.
+"""
+
+import json
+import logging
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from .scraping import HTTP_SESSION, fetch_html, html_to_text
+
+SHOPIFY_PRODUCTS_PAGE_LIMIT = 250
+SHOPIFY_MAX_PAGES = 4          # 1,000 products is plenty to size a catalog
+WOO_PRODUCTS_PER_PAGE = 100
+SHIPPING_POLICY_MAX_CHARS = 1500
+
+SHOPIFY_HTML_SIGNALS = ["cdn.shopify.com", "shopify.theme", "window.shopify", "myshopify.com", "shopify-section"]
+SHOPIFY_HEADER_SIGNALS = ["x-shopid", "x-shopify-stage", "x-shardid"]
+# Markup only a WooCommerce store emits (a page merely mentioning WooCommerce isn't one)
+WOO_HTML_SIGNALS = ["/wp-json/wc/", "wp-content/plugins/woocommerce", "wc_add_to_cart_params"]
+WOO_BODY_CLASS = re.compile(r"<body[^>]*\bclass=[\"'][^\"']*\bwoocommerce(-page)?\b", re.I)
+
+SHOPIFY_POLICY_PATHS = ["/policies/shipping-policy", "/pages/shipping", "/pages/shipping-policy", "/pages/shipping-returns"]
+
+
+def detect_platform(html, headers=None):
+    """
+    Detects the storefront platform from raw HTML and response headers.
+    Returns "shopify", "woocommerce" or None.
+    """
+    headers = {k.lower(): str(v).lower() for k, v in (headers or {}).items()}
+    page = (html or "").lower()
+
+    if any(h in headers for h in SHOPIFY_HEADER_SIGNALS) or "shopify" in headers.get("powered-by", ""):
+        return "shopify"
+    if any(sig in page for sig in SHOPIFY_HTML_SIGNALS):
+        return "shopify"
+
+    if "/wp-json/wc/" in headers.get("link", "") or any(sig in page for sig in WOO_HTML_SIGNALS):
+        return "woocommerce"
+    if WOO_BODY_CLASS.search(page):
+        return "woocommerce"
+
+    return None
+
+
+def _get_json(url, params=None, timeout=8):
+    try:
+        response = HTTP_SESSION.get(url, params=params, timeout=timeout)
+        if response.status_code != 200:
+            return None, {}
+        return response.json(), response.headers
+    except Exception as e:
+        logging.info(f"Structured fetch failed for {url}: {e}")
+        return None, {}
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _summarize_prices(prices):
+    prices = [p for p in prices if p is not None and p > 0]
+    if not prices:
+        return {}
+    return {"price_min": round(min(prices), 2), "price_max": round(max(prices), 2)}
+
+
+def _top_values(values, limit=5):
+    counts = {}
+    for v in values:
+        v = (v or "").strip()
+        if v:
+            counts[v] = counts.get(v, 0) + 1
+    return [v for v, _ in sorted(counts.items(), key=lambda kv: -kv[1])[:limit]]
+
+
+def fetch_shopify_facts(base_url):
+    """
+    Pulls /products.json (paged), /meta.json and the shipping policy page.
+    """
+    facts = {"platform": "Shopify"}
+    products = []
+
+    for page in range(1, SHOPIFY_MAX_PAGES + 1):
+        data, _ = _get_json(urljoin(base_url, "/products.json"),
+                            params={"limit": SHOPIFY_PRODUCTS_PAGE_LIMIT, "page": page})
+        batch = (data or {}).get("products") or []
+        products.extend(batch)
+        if len(batch) < SHOPIFY_PRODUCTS_PAGE_LIMIT:
+            break
+
+    if products:
+        variants = [v for p in products for v in (p.get("variants") or [])]
+        weights = [v.get("grams") for v in variants if v.get("grams")]
+
+        facts["product_count"] = len(products)
+        facts["sku_count"] = len(variants)
+        facts["catalog_truncated"] = len(products) >= SHOPIFY_PRODUCTS_PAGE_LIMIT * SHOPIFY_MAX_PAGES
+        facts.update(_summarize_prices([_to_float(v.get("price")) for v in variants]))
+        if weights:
+            facts["avg_weight_g"] = int(sum(weights) / len(weights))
+            facts["max_weight_g"] = max(weights)
+        facts["product_types"] = _top_values(p.get("product_type") for p in products)
+        facts["vendors"] = _top_values([p.get("vendor") for p in products], limit=3)
+
+    meta, _ = _get_json(urljoin(base_url, "/meta.json"))
+    if meta:
+        facts["currency"] = meta.get("currency", "")
+        location = ", ".join(x for x in [meta.get("city"), meta.get("province"), meta.get("country")] if x)
+        if location:
+            facts["store_location"] = location
+        ships_to = meta.get("ships_to_countries") or []
+        if ships_to:
+            facts["ships_to"] = ships_to[:20]
+
+    for path in SHOPIFY_POLICY_PATHS:
+        html, _ = fetch_html(urljoin(base_url, path))
+        text = html_to_text(_main_content(html))
+        if text and "shipping" in text.lower():
+            facts["shipping_policy"] = text[:SHIPPING_POLICY_MAX_CHARS]
+            break
+
+    return facts
+
+
+def fetch_woocommerce_facts(base_url):
+    """
+    Uses the public WooCommerce Store API and WP pages API.
+    """
+    facts = {"platform": "WooCommerce"}
+
+    data, headers = _get_json(urljoin(base_url, "/wp-json/wc/store/v1/products"),
+                              params={"per_page": WOO_PRODUCTS_PER_PAGE})
+    if isinstance(data, list) and data:
+        total = headers.get("X-WP-Total")
+        facts["product_count"] = int(total) if total and total.isdigit() else len(data)
+
+        prices = []
+        for p in data:
+            price_info = p.get("prices") or {}
+            minor = int(price_info.get("currency_minor_unit") or 0)
+            raw = _to_float(price_info.get("price"))
+            if raw is not None:
+                prices.append(raw / (10 ** minor))
+            if price_info.get("currency_code"):
+                facts["currency"] = price_info["currency_code"]
+        facts.update(_summarize_prices(prices))
+        facts["product_types"] = _top_values(
+            c.get("name") for p in data for c in (p.get("categories") or [])
+        )
+
+    pages, _ = _get_json(urljoin(base_url, "/wp-json/wp/v2/pages"),
+                         params={"search": "shipping", "per_page": 3, "_fields": "title,content"})
+    for page in pages or []:
+        rendered = ((page.get("content") or {}).get("rendered")) or ""
+        text = html_to_text(rendered)
+        if text and "shipping" in text.lower():
+            facts["shipping_policy"] = text[:SHIPPING_POLICY_MAX_CHARS]
+            break
+
+    return facts
+
+
+def _main_content(html):
+    """Narrows a policy page down to its main element when the theme has one."""
+    if not html:
+        return html
+    try:
+        soup = BeautifulSoup(html, "lxml")
+        main = soup.find("main") or soup.find(class_=re.compile("shopify-policy__body|rte"))
+        return str(main) if main else html
+    except Exception:
+        return html
+
+
+def extract_jsonld_products(html):
+    """
+    Parses JSON-LD blocks for Product / Offer / Organization data.
+    """
+    facts = {}
+    if not html:
+        return facts
+
+    try:
+        soup = BeautifulSoup(html, "lxml")
+        blocks = soup.find_all("script", type="application/ld+json")
+    except Exception:
+        return facts
+
+    nodes = []
+    for block in blocks:
+        try:
+            data = json.loads(block.string or block.get_text() or "")
+        except Exception:
+            continue
+        stack = data if isinstance(data, list) else [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, dict):
+                nodes.append(node)
+                if "@graph" in node:
+                    stack.extend(node["@graph"] if isinstance(node["@graph"], list) else [node["@graph"]])
+
+    prices, names, weights = [], [], []
+    for node in nodes:
+        node_type = node.get("@type")
+        types = node_type if isinstance(node_type, list) else [node_type]
+
+        if "Product" in types:
+            names.append(node.get("name", ""))
+            offers = node.get("offers") or []
+            for offer in offers if isinstance(offers, list) else [offers]:
+                if isinstance(offer, dict):
+                    prices.append(_to_float(offer.get("price") or offer.get("lowPrice")))
+                    if offer.get("priceCurrency"):
+                        facts["currency"] = offer["priceCurrency"]
+            weight = node.get("weight")
+            if isinstance(weight, dict) and weight.get("value"):
+                weights.append(f"{weight.get('value')} {weight.get('unitCode', '')}".strip())
+
+        if "Organization" in types or "OnlineStore" in types:
+            address = node.get("address")
+            if isinstance(address, dict):
+                location = ", ".join(str(address.get(k)) for k in ["addressLocality", "addressRegion", "addressCountry"] if address.get(k))
+                if location:
+                    facts["store_location"] = location
+
+    if names:
+        facts["jsonld_products"] = [n for n in names if n][:5]
+    facts.update(_summarize_prices(prices))
+    if weights:
+        facts["jsonld_weights"] = weights[:5]
+    return facts
+
+
+def extract_structured_facts(base_url, html=None, headers=None):
+    """
+    Entry point used by scrape_website.
+    Returns a facts dict (always containing "platform") or None if the site
+    is not a recognised storefront platform.
+    """
+    if html is None:
+        html, headers = fetch_html(base_url)
+    platform = detect_platform(html, headers)
+    if not platform:
+        return None
+
+    try:
+        if platform == "shopify":
+            facts = fetch_shopify_facts(base_url)
+        else:
+            facts = fetch_woocommerce_facts(base_url)
+    except Exception as e:
+        logging.warning(f"Structured extraction failed for {base_url}: {e}")
+        facts = {"platform": platform.title()}
+
+    # JSON-LD fills gaps the platform APIs didn't cover
+    for key, value in extract_jsonld_products(html).items():
+        facts.setdefault(key, value)
+
+    logging.info(f"🛒 {facts['platform']} facts for {base_url}: "
+                 f"{facts.get('sku_count', facts.get('product_count', '?'))} SKUs, "
+                 f"price {facts.get('price_min', '?')}-{facts.get('price_max', '?')}")
+    return facts
+
+
+def format_structured_facts(facts):
+    """
+    Renders facts as a compact text block for the analyze_lead prompt.
+    """
+    if not facts:
+        return ""
+
+    lines = [f"Platform: {facts.get('platform', '')}"]
+    if facts.get("product_count"):
+        suffix = "+" if facts.get("catalog_truncated") else ""
+        lines.append(f"Products: {facts['product_count']}{suffix}")
+    if facts.get("sku_count"):
+        lines.append(f"SKUs (variants): {facts['sku_count']}")
+    if facts.get("price_min") is not None and facts.get("price_max") is not None:
+        lines.append(f"Price range: {facts['price_min']}-{facts['price_max']} {facts.get('currency', '')}".strip())
+    if facts.get("avg_weight_g"):
+        lines.append(f"Weight (g): avg {facts['avg_weight_g']}, max {facts.get('max_weight_g')}")
+    if facts.get("jsonld_weights"):
+        lines.append(f"Listed weights: {', '.join(facts['jsonld_weights'])}")
+    if facts.get("product_types"):
+        lines.append(f"Product types: {', '.join(facts['product_types'])}")
+    if facts.get("vendors"):
+        # Several vendors = reseller / multi-brand store rather than one brand's own catalog
+        lines.append(f"Top vendors: {', '.join(facts['vendors'])}")
+    if facts.get("jsonld_products"):
+        lines.append(f"Sample products: {', '.join(facts['jsonld_products'])}")
+    if facts.get("store_location"):
+        lines.append(f"Store location: {facts['store_location']}")
+    if facts.get("ships_to"):
+        lines.append(f"Ships to: {', '.join(facts['ships_to'])}")
+    if facts.get("shipping_policy"):
+        lines.append(f"Shipping policy: {facts['shipping_policy']}")
+    return "\n".join(lines)
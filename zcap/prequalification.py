@@ -0,0 +1,222 @@
+"""
+Deterministic pre-qualification gate (runs before analyze_lead).
+
+The analysis matrix grades dropshippers, digital-goods sellers and sites with
+no physical presence 1-4; Gemini needs a full 15k-char call to tell us that.
+This scores the scraped text/metadata locally with weighted keyword/regex
+features (optionally blended with a small Naive Bayes model trained on the
+scraped text of previously graded sites) and only rejects when the estimated
+probability of a low grade clears PREQUAL_REJECT_THRESHOLD. Borderline
+sites still go to the LLM.
+"""
+
+import logging
+import math
+import re
+import threading
+from collections import Counter
+
+from .cache_store import PersistentCache
+from .tech_fingerprint import detect_technologies, tech_categories
+from .config import (
+    PREQUAL_ENABLED, PREQUAL_REJECT_THRESHOLD, PREQUAL_MODEL_ENABLED,
+    PREQUAL_LOW_GRADE_MAX, PREQUAL_EXAMPLES_TTL_DAYS
+)
+
+# (name, weight, pattern). Positive weights push towards a low grade.
+FEATURES = [
+    ("dropshipping", 3.0, re.compile(
+        r"\b(dropship(ping|per)?|aliexpress|oberlo|dsers|cj ?dropshipping|spocket|"
+        r"ships? (directly )?from (china|our overseas (warehouse|supplier)s?)|"
+        r"(allow|takes?|please allow) (\d+ ?[-–] ?)?\d+ ?(business )?(days|weeks) for (delivery|shipping))\b", re.I)),
+    ("digital_goods", 2.0, re.compile(
+        r"\b(instant(ly)? download|digital (download|product|file)s?|downloadable|printables?|"
+        r"e-?books?|pdf (guide|download|template)s?|lightroom presets?|svg files?|"
+        r"online courses?|video courses?|license key|no physical (product|item)s? will be shipped)\b", re.I)),
+    ("software_service", 1.5, re.compile(
+        r"\b(saas|free trial|start your trial|book a demo|request a demo|api docs|"
+        r"per (user|seat)/month|download (the|our) app|sign up free)\b", re.I)),
+    ("physical_commerce", -1.5, re.compile(
+        r"\b(add to (cart|bag|basket)|shipping (policy|rates|info)|free shipping|"
+        r"returns? (policy|& exchanges)|track (your )?order|in stock|ships? within)\b", re.I)),
+    ("physical_address", -1.0, re.compile(
+        r"\b\d{2,5}\s+[A-Za-z0-9.' ]{2,40}\s(st|street|ave|avenue|rd|road|blvd|boulevard|dr|drive|ln|lane|way|suite|ste)\b|"
+        r"\b[A-Z]{2}\s\d{5}(-\d{4})?\b|"
+        r"\b(warehouse|headquarters|hq|showroom|flagship store|visit us at)\b", re.I)),
+    ("wholesale_ops", -1.0, re.compile(
+        r"\b(wholesale|stockists?|retail partners|distributors?|fulfillment|pallets?|bulk orders?)\b", re.I)),
+]
+FEATURE_CAP = 3          # matches counted per feature (repeated banners shouldn't dominate)
+BIAS = -2.0              # prior log-odds of a low grade with no evidence
+NO_COMMERCE_WEIGHT = 1.5  # no cart/shipping/product language anywhere
+STRUCTURED_FACTS_WEIGHT = -2.5  # platform APIs returned a physical catalog
+# Fingerprinted stack (tech_fingerprint.py) by category
+TECH_CATEGORY_WEIGHTS = {
+    "Dropshipping": 3.0,
+    "Digital Delivery": 2.5,
+    "Print on Demand": 1.0,
+    "Ecommerce": -1.0,
+    "Shipping": -1.5,
+    "Fulfillment": -1.5,
+    "Returns": -1.0,
+    "Subscriptions": -0.5,
+}
+MODEL_WEIGHT = 5.0       # scales the NB mean per-token log-ratio
+MODEL_MAX = 2.0          # model term clamped to +/- this, the range of a single strong rule
+MODEL_MIN_PER_CLASS = 5  # don't trust the model with fewer graded examples
+EXAMPLE_MAX_TOKENS = 2000  # distinct tokens kept per graded site
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9']{2,}")
+SCRAPED_TEXT_KEYS = ("text", "about_text", "team_text", "careers_text", "press_text")
+
+# Graded sites' scraped text (as distinct tokens), keyed by domain: the model
+# is trained on the same kind of text it scores
+_examples = PersistentCache("prequal_examples", max_entries=5000, default_ttl=PREQUAL_EXAMPLES_TTL_DAYS * 86400)
+_model = None
+_model_lock = threading.Lock()
+_model_loaded = False
+
+_stats_lock = threading.Lock()
+_stats = {"checked": 0, "rejected": 0}
+
+
+def _tokens(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def _scraped_text(scraped):
+    return " ".join(scraped.get(key) or "" for key in SCRAPED_TEXT_KEYS)
+
+
+class NaiveBayesGrader:
+    """Two-class NB over distinct tokens (low grade vs. plausible) with Laplace smoothing."""
+
+    def __init__(self):
+        self.counts = {True: Counter(), False: Counter()}
+        self.docs = {True: 0, False: 0}
+
+    def fit(self, rows):
+        """rows: (tokens, is_low) pairs."""
+        for tokens, is_low in rows:
+            self.counts[is_low].update(set(tokens))
+            self.docs[is_low] += 1
+        self.vocab = set(self.counts[True]) | set(self.counts[False])
+        self.totals = {label: sum(c.values()) for label, c in self.counts.items()}
+        return self
+
+    def is_usable(self):
+        return min(self.docs.values()) >= MODEL_MIN_PER_CLASS
+
+    def log_odds_low(self, text):
+        """
+        Mean per-token log likelihood ratio of a low grade given the text, so
+        page length doesn't scale the evidence. The class prior is left out on
+        purpose: BIAS already carries it in score_features.
+        """
+        score, known = 0.0, 0
+        vocab_size = len(self.vocab) or 1
+        for token in set(_tokens(text)):
+            if token not in self.vocab:
+                continue
+            p_low = (self.counts[True][token] + 1) / (self.totals[True] + vocab_size)
+            p_ok = (self.counts[False][token] + 1) / (self.totals[False] + vocab_size)
+            score += math.log(p_low / p_ok)
+            known += 1
+        return score / known if known else 0.0
+
+
+def record_graded(domain, scraped, grade):
+    """Stores a site's scraped text with its LLM grade as a training example (used from the next run)."""
+    try:
+        grade = int(float(grade or 0))
+    except (TypeError, ValueError):
+        return
+    if not domain or grade <= 0:  # 0 = blocked/unanalysed, not a real grade
+        return
+    tokens = list(dict.fromkeys(_tokens(_scraped_text(scraped))))[:EXAMPLE_MAX_TOKENS]
+    if tokens:
+        _examples.set(domain, {"tokens": tokens, "low": grade <= PREQUAL_LOW_GRADE_MAX})
+
+
+def train_model():
+    """Trains the NB grader on previously graded sites. Returns None if data is too thin."""
+    rows = [(example["tokens"], example["low"]) for example in _examples.values()]
+    model = NaiveBayesGrader().fit(rows)
+    if not model.is_usable():
+        logging.info(f"Pre-qualification model skipped: {model.docs[True]} low / {model.docs[False]} ok examples")
+        return None
+    logging.info(f"🧮 Pre-qualification model trained on {len(rows)} graded sites "
+                 f"({model.docs[True]} low-grade)")
+    return model
+
+
+def get_model():
+    global _model, _model_loaded
+    if not PREQUAL_MODEL_ENABLED:
+        return None
+    with _model_lock:
+        if not _model_loaded:
+            _model = train_model()
+            _model_loaded = True
+        return _model
+
+
+def score_features(text, structured_facts=None, technologies=None):
+    """Returns (rule log-odds of a low grade, list of fired feature names)."""
+    score = BIAS
+    reasons = []
+    for name, weight, pattern in FEATURES:
+        hits = min(len(pattern.findall(text)), FEATURE_CAP)
+        if hits:
+            score += weight * (1 + 0.25 * (hits - 1))
+            reasons.append(name)
+
+    categories = tech_categories(technologies)
+    for category in sorted(categories):
+        if category in TECH_CATEGORY_WEIGHTS:
+            score += TECH_CATEGORY_WEIGHTS[category]
+            reasons.append(f"tech:{category}")
+
+    if "physical_commerce" not in reasons and not structured_facts and "Ecommerce" not in categories:
+        score += NO_COMMERCE_WEIGHT
+        reasons.append("no_commerce_signals")
+    if structured_facts and (structured_facts.get("product_count") or structured_facts.get("jsonld_products")):
+        score += STRUCTURED_FACTS_WEIGHT
+        reasons.append("structured_catalog")
+    return score, reasons
+
+
+def prequalify(scraped, company_name=""):
+    """
+    scraped: scrape_website result. Returns
+    {"reject": bool, "p_low": float, "reasons": [...]}; reject is only True when
+    p_low >= PREQUAL_REJECT_THRESHOLD.
+    """
+    if not PREQUAL_ENABLED:
+        return {"reject": False, "p_low": 0.0, "reasons": []}
+
+    text = _scraped_text(scraped)
+    technologies = scraped.get("technologies") or detect_technologies(scraped.get("html"), scraped.get("headers"))
+    score, reasons = score_features(text, scraped.get("structured_facts"), technologies)
+
+    model = get_model()
+    if model:
+        score += max(-MODEL_MAX, min(MODEL_MAX, MODEL_WEIGHT * model.log_odds_low(text)))
+
+    p_low = 1 / (1 + math.exp(-score))
+    reject = p_low >= PREQUAL_REJECT_THRESHOLD
+
+    with _stats_lock:
+        _stats["checked"] += 1
+        _stats["rejected"] += int(reject)
+
+    if reject:
+        logging.info(f"🚫 Pre-qualification rejected {company_name} (p_low={p_low:.2f}: {', '.join(reasons)})")
+    return {"reject": reject, "p_low": round(p_low, 3), "reasons": reasons}
+
+
+def get_prequal_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["reject_rate"] = round(stats["rejected"] / stats["checked"], 3) if stats["checked"] else 0.0
+    return stats
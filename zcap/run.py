@@ -4,16 +4,34 @@ import os
 import random
 import time
 import csv
-from .sheets_sync import sync_lead_to_sheet
-from .config import check_config, DAILY_LEAD_TARGET, INPUT_ICP_FILE, MIN_QUALIFICATION_GRADE,GOOGLE_SEARCH_DAILY_LIMIT
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .sheets_sync import sync_lead_to_sheet, update_lead_in_sheet
+from .config import check_config, DAILY_LEAD_TARGET, INPUT_ICP_FILE, MIN_QUALIFICATION_GRADE,GOOGLE_SEARCH_DAILY_LIMIT, COMBINED_ANALYSIS_ENABLED, KEYWORD_BATCH_SIZE, DISCOVERY_WORKERS
 from .discovery import search_companies, search_shopify_stores_broad, search_with_keywords_shuffled
-from .scraping import scrape_website
-from .identification import search_decision_maker, is_valid_company_url
-from .intelligence import analyze_lead, clean_name_with_vertex, extract_contacts_from_text, generate_keywords_from_icp
-from .verification import verify_lead
-from .storage import get_keywords, init_storage, save_lead
+from .scrape_pool import scrape_website_isolated, shutdown_scrape_pool
+from .identification import search_decision_maker, is_valid_company_url, shutdown_people_search, log_strategy_stats
+from .intelligence import analyze_lead, analyze_lead_with_poc, personalize_outreach, clean_name_with_vertex, clean_names_batch, extract_contacts_from_text
+from .verification import get_smtp_stats
+from .verification_stage import (
+    VERIFICATION_PENDING, submit_verification, shutdown_verification_stage, log_verification_stats
+)
+from .dns_resolver import resolve_mx_bulk, get_dns_stats
+from .mail_knowledge import get_mail_kb_stats
+from .email_patterns import get_pattern_stats
+from .hunter_ledger import log_hunter_stats
+from .storage import get_keywords, init_storage, save_lead, update_lead
 from .dedup import init_dedup_db, is_domain_processed, mark_domain_processed, get_domain, get_run_timestamp
-from .keyword_tracker import init_keyword_tracker, filter_fresh_keywords, mark_keyword_used
+from .keyword_tracker import init_keyword_tracker, mark_keyword_used
+from .keyword_pool import start_keyword_pool, take_keywords, shutdown_keyword_pool
+from .text_condenser import condense_scraped, get_condense_stats
+from .llm_cache import get_llm_cache_stats
+from .llm_telemetry import company_scope, write_llm_report
+from .prequalification import prequalify, record_graded, get_prequal_stats
+from .people_index import get_people_index_stats
+from .signal_extractor import extract_signals
+from .title_parser import log_title_parser_stats
+from .memory_governor import stage, start_governor, stop_governor, log_memory_summary
 from urllib.parse import urlparse
 
 # Configure logging
@@ -42,8 +60,6 @@ def main():
     init_dedup_db()
     init_keyword_tracker()
 
-    leads_count = 0
-    searches_made_today = 0
     logging.info(f"🚀 Starting run at {RUN_TIMESTAMP}")
 
     icps = []
@@ -54,27 +70,76 @@ def main():
         logging.error(f"ICP File not found: {INPUT_ICP_FILE}")
         return
 
+    start_governor()
+    start_keyword_pool(icps)  # Gemini generation for every ICP runs in the background
+    leads_count = 0
+    try:
+        leads_count = run_discovery(icps)
+    finally:
+        shutdown_keyword_pool()
+        shutdown_verification_stage()  # waits for pending leads to be updated
+        shutdown_scrape_pool()
+        shutdown_people_search()
+        stop_governor()
+        log_run_summary(leads_count)
+
+def log_run_summary(leads_count):
+    """
+    End-of-run report: lead totals plus resource high-water marks.
+    """
+    logging.info(f"\n=== Run {RUN_TIMESTAMP} summary: {leads_count} leads saved ===")
+    condense = get_condense_stats()
+    logging.info(f"✂️ LLM input condensed {condense['chars_in']} → {condense['chars_out']} chars "
+                 f"({condense['reduction_pct']}% smaller over {condense['calls']} companies)")
+    for prompt_type, cache in get_llm_cache_stats().items():
+        logging.info(f"💾 LLM cache [{prompt_type}]: {cache['hits']} hits / {cache['misses']} misses "
+                     f"({cache['hit_rate']:.0%} hit rate)")
+    prequal = get_prequal_stats()
+    logging.info(f"🚫 Pre-qualification: {prequal['rejected']}/{prequal['checked']} companies rejected "
+                 f"without an LLM call ({prequal['reject_rate']:.0%})")
+    people = get_people_index_stats()
+    logging.info(f"📇 People index: {people['hits']} hits / {people['misses']} misses, "
+                 f"{people['negative_hits']} skipped as recently empty, {people['profiles_indexed']} profiles indexed")
+    smtp = get_smtp_stats()
+    logging.info(f"📬 SMTP: {smtp['sessions']} sessions across {smtp['mx_hosts']} MX hosts, "
+                 f"{smtp['rcpt_probes']} RCPT probes, {smtp['limited']} skipped at the per-MX limit, {smtp['errors']} errors")
+    mail_kb = get_mail_kb_stats()
+    logging.info(f"📚 Mail knowledge: {mail_kb['domain_skips']} domain skips, {mail_kb['provider_skips']} provider skips, "
+                 f"{mail_kb['recorded']} sessions recorded")
+    patterns = get_pattern_stats()
+    logging.info(f"📐 Email patterns: {patterns['confident']}/{patterns['predictions']} leads served from a learned format, "
+                 f"{patterns['observed']} addresses observed")
+    dns_stats = get_dns_stats()
+    logging.info(f"📮 DNS: {dns_stats['lookups']} MX lookups, {dns_stats['hits']} cache hits, "
+                 f"{dns_stats['negative_hits']} negative hits, {dns_stats['failures']} failures")
+    log_verification_stats()
+    log_hunter_stats()
+    log_strategy_stats()
+    log_title_parser_stats()
+    write_llm_report(f"logs/llm_report_{TIMESTAMP}.json", leads_count)
+    log_memory_summary()
+
+def run_discovery(icps):
+    """
+    Main ICP -> keywords -> search -> process loop. Returns the number of leads saved.
+    """
+    leads_count = 0
+    searches_made_today = 0
     icp_iteration = 0 
     while leads_count < DAILY_LEAD_TARGET:
-        for icp_idx, icp in enumerate(icps):
+        for icp in icps:
             if leads_count >= DAILY_LEAD_TARGET: break
                 
             logging.info(f"\n=== Processing ICP: {icp.get('Target Industry', 'General')} (Iteration {icp_iteration}) ===")
             
-            # Generate and Filter Keywords
-            variation_seed = icp_iteration * len(icps) + icp_idx
-            try:
-                keywords = generate_keywords_from_icp(icp, variation_seed=variation_seed)
-            except Exception as e:
-                logging.error(f"Failed to generate keywords: {e}")
-                keywords = []
-            
-            fresh_keywords = filter_fresh_keywords(keywords, max_usage=3)
+            # Fresh keywords from the pool (refilled in the background, never blocks on Gemini)
+            with stage("keyword_generation"):
+                fresh_keywords = take_keywords(icp, KEYWORD_BATCH_SIZE)
             remaining_searches = GOOGLE_SEARCH_DAILY_LIMIT - searches_made_today
             
             if remaining_searches <= 0:
                 logging.info(f"🛑 Daily search limit reached. Shutting down.")
-                return
+                return leads_count
 
             if len(fresh_keywords) > remaining_searches:
                 fresh_keywords = fresh_keywords[:remaining_searches]
@@ -82,7 +147,8 @@ def main():
             if not fresh_keywords: continue
 
             # Search Companies
-            new_batch = search_with_keywords_shuffled(fresh_keywords, market=icp.get("Target Geography", "USA"), limit_per_keyword=3)
+            with stage("discovery"):
+                new_batch = search_with_keywords_shuffled(fresh_keywords, market=icp.get("Target Geography", "USA"), limit_per_keyword=3)
             searches_made_today += len(fresh_keywords)
             
             # Keyword Tracking
@@ -91,27 +157,90 @@ def main():
                 mark_keyword_used(kw, len(results_for_kw))
 
             # Add broad variety search occasionally 
-            broad_companies = search_shopify_stores_broad(market="USA", limit=5)
+            with stage("discovery"):
+                broad_companies = search_shopify_stores_broad(market="USA", limit=5)
             all_companies = new_batch + broad_companies
+
+            # One batched Gemini call cleans every new title up front
+            prepare_company_names(all_companies)
+            # Warm the MX cache for the whole batch so verification never waits on DNS
+            with stage("dns_preflight"):
+                resolve_mx_bulk([
+                    get_domain(c.get("link", "")) for c in all_companies
+                    if is_valid_company_url(c.get("link", "")) and not is_domain_processed(get_domain(c.get("link", "")))
+                ])
             
             # --- . Process Discovered Companies ---
-            # Replace the discovery processing loop with this:
-            for company in all_companies:
-                if leads_count >= DAILY_LEAD_TARGET: break
-                
-                try:
-                    # If this company hangs, the 'except' block will catch it
-                    if process_single_company(company):
-                        leads_count += 1
-                        logging.info(f"Lead saved! Total Progress: {leads_count}/{DAILY_LEAD_TARGET}")
-                except Exception as e:
-                    logging.error(f"⚠️ Skipping company due to timeout/error: {company.get('title')} -> {e}")
-                    continue
+            leads_count = process_companies(all_companies, leads_count)
 
         # Increment iteration counter after completing all ICPs
         icp_iteration += 1
         logging.info(f"\n=== Completed ICP iteration {icp_iteration}. Leads: {leads_count}/{DAILY_LEAD_TARGET} ===")
 
+    return leads_count
+
+def process_companies(companies, leads_count):
+    """
+    Runs process_single_company for a discovery batch, DISCOVERY_WORKERS at a
+    time, so several companies' scrapes and Gemini analyses are in flight at
+    once (all LLM calls share llm_client's LLM_MAX_CONCURRENCY slots). A
+    company only starts while saved + in-flight leads are below
+    DAILY_LEAD_TARGET, so the target is never overshot. Returns the updated
+    lead count.
+    """
+    # Same domain twice in one batch would race past the is_domain_processed check
+    unique = list({get_domain(c.get("link", "")) or c.get("title"): c for c in reversed(companies)}.values())[::-1]
+    progress = {"leads": leads_count, "in_flight": 0}
+    lock = threading.Condition()
+
+    def work(company):
+        with lock:
+            # Wait while in-flight companies could still fill the target on their own
+            while progress["leads"] < DAILY_LEAD_TARGET <= progress["leads"] + progress["in_flight"]:
+                lock.wait()
+            if progress["leads"] >= DAILY_LEAD_TARGET:
+                return
+            progress["in_flight"] += 1
+        saved = False
+        try:
+            # If this company hangs, the 'except' block will catch it
+            with company_scope(get_domain(company.get("link", "")) or company.get("title")):
+                saved = process_single_company(company)
+        except Exception as e:
+            logging.error(f"⚠️ Skipping company due to timeout/error: {company.get('title')} -> {e}")
+        finally:
+            with lock:
+                progress["in_flight"] -= 1
+                if saved:
+                    progress["leads"] += 1
+                    logging.info(f"Lead saved! Total Progress: {progress['leads']}/{DAILY_LEAD_TARGET}")
+                lock.notify_all()
+
+    with ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS, thread_name_prefix="discovery") as pool:
+        list(pool.map(work, unique))
+    return progress["leads"]
+
+def prepare_company_names(companies):
+    """
+    Batch name cleaning for a discovery batch. Annotates each fresh candidate
+    with "clean_name" / "is_company" so process_single_company can skip its
+    per-company Vertex call; failed items are left for the single-call path.
+    """
+    fresh = [
+        c for c in companies
+        if is_valid_company_url(c.get("link", "")) and not is_domain_processed(get_domain(c.get("link", "")))
+    ]
+    if not fresh:
+        return
+
+    with stage("name_cleaning"):
+        results = clean_names_batch(fresh)
+
+    for company, result in zip(fresh, results):
+        if result:
+            company["clean_name"] = result["company_name"]
+            company["is_company"] = result["is_company"]
+
 def process_single_company(company):
     """
     Consolidated Pipeline: Handles deep scraping, POC discovery, 
@@ -128,8 +257,13 @@ def process_single_company(company):
         logging.info(f"⊘ Skipping {c_name} - Already processed.")
         return False
 
-    # 2. Early Name Clean (Gemini)
-    cleaned_title = clean_name_with_vertex(c_name, strict=True)
+    # 2. Early Name Clean (batched up front; single Gemini call as fallback)
+    if "is_company" in company:
+        cleaned_title = company.get("clean_name") if company["is_company"] else None
+        if not cleaned_title:
+            logging.info(f"Vertex: '{c_name}' is NOT a company.")
+    else:
+        cleaned_title = clean_name_with_vertex(c_name, strict=True, url=c_link)
     if not cleaned_title: return False
     c_name = cleaned_title
 
@@ -144,51 +278,69 @@ def process_single_company(company):
 
     try:
         # 3. Deep Scraping
-        scraped_data = scrape_website(c_link)
+        with stage("scrape"):
+            scraped_data = scrape_website_isolated(c_link)
         if not scraped_data.get("text") or scraped_data.get("error"):
             current_lead["Status"] = scraped_data.get("error", "Scraping Failed")
             logging.info(f"⛔ Skipping {c_name} — {current_lead['Status']}")
             return False
 
-        # 4. POC Discovery (Website -> LinkedIn)
+        # 4. Pre-qualification: obvious rejects (dropship, digital goods, no physical presence)
+        # never reach Gemini or people search
+        prequal = prequalify(scraped_data, company_name=c_name)
+        if prequal["reject"]:
+            current_lead["Status"] = f"Pre-Qualification Rejected ({', '.join(prequal['reasons'])})"
+            current_lead["Qualification Grade"] = 0
+            save_lead(current_lead)
+            return False
+
+        # 4b. Aggregate Text for AI Analysis
+        # (boilerplate and cross-page repeats stripped before truncation)
+        combined_text = condense_scraped(scraped_data)
+        structured_facts = scraped_data.get('structured_facts')
+        signals = extract_signals(scraped_data)  # explicit facts parsed locally, not by Gemini
+
+        # 5. POC Discovery (Website -> LinkedIn)
+        # With a team/about page, POC extraction and qualification share one Gemini call
         dm_info = None
+        analysis = None
         text_for_poc = (scraped_data.get('team_text', '') + scraped_data.get('about_text', ''))
         if len(text_for_poc) > 100:
-            dm_info = extract_contacts_from_text(text_for_poc, company_name=c_name)
+            with stage("analysis"):
+                if COMBINED_ANALYSIS_ENABLED:
+                    analysis, dm_info = analyze_lead_with_poc(c_name, combined_text, text_for_poc,
+                                                              structured_facts=structured_facts, signals=signals)
+                else:
+                    dm_info = extract_contacts_from_text(text_for_poc, company_name=c_name)
         
         if not dm_info:
-            dm_info = search_decision_maker(c_name, company_url=c_link)
+            with stage("people_search"):
+                dm_info = search_decision_maker(c_name, company_url=c_link)
+            if dm_info and analysis:
+                # The combined call's qualification stands; only the icebreaker / why-good
+                # were written for someone else, so just those are redone for the X-ray contact
+                with stage("analysis"):
+                    analysis = personalize_outreach(c_name, analysis, dm_info)
 
         if not dm_info:
             current_lead["Status"] = "No Decision Maker Found"
             save_lead(current_lead)
             return False
 
-        # 5. Aggregate Text for AI Analysis
-        combined_text = f"HOMEPAGE:\n{scraped_data['text']}"
-        if scraped_data.get('about_text'): combined_text += f"\n\nABOUT:\n{scraped_data['about_text']}"
-        if scraped_data.get('careers_text'): combined_text += f"\n\nCAREERS:\n{scraped_data['careers_text']}"
-        if scraped_data.get('press_text'): combined_text += f"\n\nPRESS:\n{scraped_data['press_text']}"
-
-        # 6. AI Intelligence Analysis
-        analysis = analyze_lead(c_name, combined_text, dm_info)
+        # 6. AI Intelligence Analysis (skipped if the combined call already qualified the lead)
+        if not analysis:
+            with stage("analysis"):
+                analysis = analyze_lead(c_name, combined_text, dm_info, structured_facts=structured_facts,
+                                        signals=signals)
         if not analysis:
             current_lead["Status"] = "Analysis Failed"
             save_lead(current_lead)
             return False
+        record_graded(domain, scraped_data, analysis.get('qualification_grade'))
 
-        # 7. Verification (CRITICAL: Define email/v_status before updating current_lead)
+        # 7. Verification runs in its own pool (step 9); the lead is saved as pending first
         # Extract domain safely
         domain_for_verify = urlparse(c_link).netloc.replace("www.", "")
-        
-        email, v_status = verify_lead(
-            dm_info.get('first_name', ''), 
-            dm_info.get('last_name', ''), 
-            domain_for_verify, 
-            company_url=c_link
-        )
-        if not v_status:
-            v_status = "Verification Unknown"
 
         # 8. Data Mapping (The "Update" Block)
         current_lead.update({
@@ -196,7 +348,7 @@ def process_single_company(company):
             "First Name": dm_info.get('first_name', ''),
             "Last Name": dm_info.get('last_name', ''),
             "Title": dm_info.get('title', ''),
-            "Email": email or "No Email Found",
+            "Email": "",
             "LinkedIn URL": dm_info.get('linkedin_url', ''),
             
             # Company Details
@@ -205,7 +357,7 @@ def process_single_company(company):
             "Why Good?": analysis.get('why_good', ''),
             "Pain_Point": analysis.get('pain_point', ''),
             "Icebreaker": analysis.get('icebreaker', ''),
-            "Status": v_status, 
+            "Status": VERIFICATION_PENDING,
             "Recent updates": analysis.get('recent_updates', ''),
             
             # Firmographics
@@ -225,20 +377,36 @@ def process_single_company(company):
             "Shipping Locations": analysis.get('shipping_locations', '')
         })
 
-        # 9. Final Actions: Sync, Save, and Mark Processed
+        # 9. Final Actions: Sync, Save, Mark Processed, then queue verification
+        sheet_range = None
         try:
-            sync_lead_to_sheet(current_lead)
+            sheet_range = sync_lead_to_sheet(current_lead)
             logging.info(f"🚀 SUCCESS: {c_name} synced to Sheets.")
         except Exception as e:
             logging.error(f"❌ Sheets sync failed: {e}")
 
         save_lead(current_lead) 
         mark_domain_processed(domain, c_name)
+        submit_verification(
+            c_name,
+            dm_info.get('first_name', ''),
+            dm_info.get('last_name', ''),
+            domain_for_verify,
+            c_link,
+            on_done=lambda email, v_status: finish_verification(current_lead, sheet_range, email, v_status),
+            html=scraped_data.get("html")
+        )
         return True 
 
     except Exception as e:
         logging.error(f"Pipeline crashed for {c_name}: {e}")
         return False
 
+def finish_verification(lead, sheet_range, email, v_status):
+    """Verification callback: fills Email/Status on the saved CSV row and the Sheets row."""
+    updates = {"Email": email or "No Email Found", "Status": v_status or "Verification Unknown"}
+    update_lead(lead, updates, match_status=VERIFICATION_PENDING)
+    update_lead_in_sheet(sheet_range, dict(lead, **updates))
+
 if __name__ == "__main__":
     main()
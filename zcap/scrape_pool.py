@@ -0,0 +1,290 @@
+"""
+Process-isolated scraper worker pool.
+
+A Chromium crash or a hung sync_playwright session inside scrape_website used
+to block (or poison) the calling thread. Here every scrape runs in a worker
+process that owns one browser. The parent enforces a hard per-job timeout by
+killing the worker's whole process tree, replaces dead workers, and recycles
+workers that exceed an RSS cap or a job count.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+
+import psutil
+
+from .config import (
+    SCRAPE_ISOLATION, SCRAPE_WORKERS, SCRAPE_JOB_TIMEOUT,
+    SCRAPE_WORKER_MAX_RSS_MB, SCRAPE_WORKER_MAX_JOBS
+)
+from .memory_governor import browser_slot, register_recycler, register_browser_owner, unregister_browser_owner
+from .scraping import scrape_website, new_scraped_data
+
+# Playwright's sync API is not fork-safe; always spawn clean interpreters.
+_mp = multiprocessing.get_context("spawn")
+
+
+def _start_browser():
+    """Starts Playwright and one Chromium for this worker; returns (playwright, browser)."""
+    from playwright.sync_api import sync_playwright
+    from .scraping import BROWSER_LAUNCH_ARGS
+
+    playwright = sync_playwright().start()
+    try:
+        return playwright, playwright.chromium.launch(headless=True, args=BROWSER_LAUNCH_ARGS)
+    except Exception:
+        playwright.stop()
+        raise
+
+
+def _stop_browser(playwright, browser):
+    for closer in (getattr(browser, "close", None), getattr(playwright, "stop", None)):
+        if closer:
+            try:
+                closer()
+            except Exception:
+                pass
+
+
+def _worker_main(request_q, response_q):
+    """
+    Worker process loop: one browser, many scrape_website jobs.
+    The browser is relaunched if it disconnects (crash) between jobs; if it
+    cannot be launched at all, pages fall back to per-call launches.
+    """
+    from .scraping import set_shared_browser
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - [scrape-worker] %(message)s')
+
+    playwright, browser = None, None
+    while True:
+        job = request_q.get()
+        if job is None:
+            break
+        job_id, url = job
+
+        if browser is None or not browser.is_connected():
+            _stop_browser(playwright, browser)
+            try:
+                playwright, browser = _start_browser()
+            except Exception as e:
+                logging.error(f"Worker browser launch failed: {e}")
+                playwright, browser = None, None
+            set_shared_browser(browser)
+
+        try:
+            result = scrape_website(url)
+        except Exception as e:
+            result = new_scraped_data(url, error=f"Scrape crashed: {e}")
+        response_q.put((job_id, result))
+
+    _stop_browser(playwright, browser)
+
+
+class ScrapeWorker:
+    """Handle on one worker process and its private request/response queues."""
+
+    def __init__(self):
+        self.request_q = _mp.Queue()
+        self.response_q = _mp.Queue()
+        self.process = _mp.Process(target=_worker_main, args=(self.request_q, self.response_q), daemon=True)
+        self.process.start()
+        self.jobs_done = 0
+        register_browser_owner(self.process.pid)
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def rss_mb(self):
+        """Worker RSS including its browser processes."""
+        try:
+            proc = psutil.Process(self.pid)
+            total = proc.memory_info().rss
+            for child in proc.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return total / (1024 * 1024)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0.0
+
+    def kill(self):
+        """Kills the worker and every process under it (Chromium would otherwise be orphaned)."""
+        unregister_browser_owner(self.pid)
+        try:
+            proc = psutil.Process(self.pid)
+            for child in proc.children(recursive=True):
+                try:
+                    child.kill()
+                except psutil.NoSuchProcess:
+                    pass
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+        self.process.join(timeout=5)
+        self._close_queues()
+
+    def stop(self):
+        """Graceful shutdown; falls back to kill()."""
+        try:
+            self.request_q.put(None)
+            self.process.join(timeout=10)
+        except Exception:
+            pass
+        if self.process.is_alive():
+            self.kill()
+        else:
+            unregister_browser_owner(self.pid)
+            self._close_queues()
+
+    def _close_queues(self):
+        for q in (self.request_q, self.response_q):
+            try:
+                q.close()
+                q.cancel_join_thread()
+            except Exception:
+                pass
+
+
+class ScrapePool:
+    """
+    Fixed-size pool of ScrapeWorkers. scrape() is thread-safe and blocks until
+    a worker is free; each job holds one memory-governor browser slot.
+    """
+
+    def __init__(self, size=SCRAPE_WORKERS):
+        self.size = max(1, size)
+        self._idle = queue.Queue()
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {"jobs": 0, "timeouts": 0, "crashes": 0, "recycled": 0}
+
+        for _ in range(self.size):
+            self._idle.put(ScrapeWorker())
+        logging.info(f"🧰 Scrape pool started with {self.size} worker process(es)")
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _replace(self, worker, reason, graceful=False):
+        logging.warning(f"♻️ Replacing scrape worker {worker.pid}: {reason}")
+        if graceful:
+            worker.stop()
+        else:
+            worker.kill()
+        self._count("recycled")
+        return ScrapeWorker()
+
+    def _checkout(self):
+        worker = self._idle.get()
+        if not worker.is_alive():
+            self._count("crashes")
+            worker = self._replace(worker, "found dead")
+        return worker
+
+    def _checkin(self, worker):
+        if worker.jobs_done >= SCRAPE_WORKER_MAX_JOBS:
+            worker = self._replace(worker, f"{worker.jobs_done} jobs done", graceful=True)
+        else:
+            rss = worker.rss_mb()
+            if rss > SCRAPE_WORKER_MAX_RSS_MB:
+                worker = self._replace(worker, f"RSS {rss:.0f} MB > {SCRAPE_WORKER_MAX_RSS_MB} MB", graceful=True)
+        self._idle.put(worker)
+
+    def _run_job(self, worker, url, timeout):
+        job_id = next(self._job_ids)
+        worker.request_q.put((job_id, url))
+        deadline = time.monotonic() + timeout
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count("timeouts")
+                logging.error(f"⏱️ Scrape of {url} exceeded {timeout}s — killing worker {worker.pid}")
+                return new_scraped_data(url, error="Scrape Timeout"), self._replace(worker, "job timeout")
+
+            try:
+                resp_id, result = worker.response_q.get(timeout=min(1.0, remaining))
+            except queue.Empty:
+                if not worker.is_alive():
+                    self._count("crashes")
+                    return new_scraped_data(url, error="Scrape Worker Crashed"), self._replace(worker, "crashed mid-job")
+                continue
+
+            if resp_id != job_id:
+                continue  # stale response from an earlier job; keep waiting
+            worker.jobs_done += 1
+            return result, worker
+
+    def scrape(self, url, timeout=SCRAPE_JOB_TIMEOUT):
+        """scrape_website(url) in a worker process, with a hard timeout."""
+        self._count("jobs")
+        with browser_slot():
+            worker = self._checkout()
+            try:
+                result, worker = self._run_job(worker, url, timeout)
+            finally:
+                self._checkin(worker)
+        return result
+
+    def recycle_idle(self):
+        """Memory governor hook: restart every idle worker (frees browser memory)."""
+        drained = []
+        while True:
+            try:
+                drained.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in drained:
+            self._idle.put(self._replace(worker, "memory pressure", graceful=True))
+        return len(drained)
+
+    def shutdown(self):
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+        logging.info(f"🧰 Scrape pool stopped: {self.stats}")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_scrape_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScrapePool(SCRAPE_WORKERS)
+            register_recycler("scrape_pool", _pool.recycle_idle)
+        return _pool
+
+
+def scrape_website_isolated(url):
+    """
+    Drop-in replacement for scrape_website that runs in the worker pool.
+    Set SCRAPE_ISOLATION=false to scrape in-process.
+    """
+    if not SCRAPE_ISOLATION:
+        return scrape_website(url)
+    return get_scrape_pool().scrape(url)
+
+
+def shutdown_scrape_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
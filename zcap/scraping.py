@@ -1,9 +1,57 @@
 import requests
 import logging
 import time
+from contextlib import contextmanager
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 from urllib.parse import urljoin, urlparse
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+from .memory_governor import browser_slot
+
+# Shared pooled HTTP session for plain (non-browser) fetches
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9"
+}
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.headers.update(HTTP_HEADERS)
+HTTP_SESSION.mount("http://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
+HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
+MAX_HTML_CHARS = 300000
+
+BROWSER_LAUNCH_ARGS = ["--disable-dev-shm-usage", "--no-sandbox", "--disable-gpu"]
+
+# Set inside scrape worker processes (see scrape_pool.py) so every page reuses
+# the worker's browser instead of launching Chromium per URL.
+_SHARED_BROWSER = None
+
+def set_shared_browser(browser):
+    global _SHARED_BROWSER
+    _SHARED_BROWSER = browser
+
+@contextmanager
+def browser_context(**context_options):
+    """
+    Yields a fresh Playwright browser context and always closes it.
+    Reuses the process-wide shared browser when one is set, otherwise
+    launches (and closes) a browser for this call within a governor slot.
+    """
+    if _SHARED_BROWSER is not None and _SHARED_BROWSER.is_connected():
+        context = _SHARED_BROWSER.new_context(**context_options)
+        try:
+            yield context
+        finally:
+            context.close()
+        return
+
+    with browser_slot(), sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=BROWSER_LAUNCH_ARGS)
+        try:
+            yield browser.new_context(**context_options)
+        finally:
+            browser.close()
 
 PARKING_SIGNALS = [
     "domain is for sale",
@@ -36,6 +84,48 @@ def looks_like_commerce_site(text: str) -> bool:
     t = text.lower()
     return any(sig in t for sig in COMMERCE_SIGNALS)
 
+def fetch_html(url, timeout=8):
+    """
+    Plain HTTP GET through the shared session (no browser).
+    Returns (html, headers) or (None, {}) on failure / non-HTML responses.
+    """
+    try:
+        response = HTTP_SESSION.get(url, timeout=timeout, allow_redirects=True)
+        if response.status_code >= 400:
+            return None, {}
+        if "html" not in response.headers.get("Content-Type", "").lower():
+            return None, {}
+        return response.text[:MAX_HTML_CHARS], dict(response.headers)
+    except Exception as e:
+        logging.info(f"HTTP fetch failed for {url}: {e}")
+        return None, {}
+
+def html_to_text(html):
+    """Visible text from raw HTML (scripts, styles and templates removed)."""
+    if not html:
+        return ""
+    try:
+        soup = BeautifulSoup(html, "lxml")
+        for tag in soup(["script", "style", "noscript", "template", "svg"]):
+            tag.decompose()
+        lines = (line.strip() for line in soup.get_text(separator="\n").splitlines())
+        return "\n".join(line for line in lines if line)
+    except Exception as e:
+        logging.warning(f"HTML text extraction failed: {e}")
+        return ""
+
+def scrape_with_http(url):
+    """
+    Fast path for server-rendered storefronts (Shopify/WooCommerce themes).
+    Returns visible text or None.
+    """
+    html, _ = fetch_html(url)
+    text = html_to_text(html)
+    if text and len(text) > 100:
+        logging.info(f"✓ HTTP scraped: {len(text)} chars from {url}")
+        return text[:15000]
+    return None
+
 def scrape_pages_with_single_browser(urls: dict):
     """
     Opens ONE browser and scrapes multiple pages.
@@ -44,19 +134,7 @@ def scrape_pages_with_single_browser(urls: dict):
     results = {}
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,
-                args=[
-                    "--disable-dev-shm-usage",
-                    "--no-sandbox",
-                    "--disable-gpu"
-                ]
-            )
-
-            context = browser.new_context(
-                viewport={"width": 1280, "height": 800}
-            )
+        with browser_context(viewport={"width": 1280, "height": 800}) as context:
 
             # block heavy assets
             context.route("**/*", lambda route, request:
@@ -76,8 +154,6 @@ def scrape_pages_with_single_browser(urls: dict):
                     logging.warning(f"Playwright failed {url}: {e}")
                     results[name] = None
 
-            browser.close()
-
     except Exception as e:
         logging.error(f"Playwright session failed: {e}")
 
@@ -91,12 +167,9 @@ def scrape_with_playwright_enhanced(url, scroll_for_dynamic=True):
     - Extracts structured metadata
     """
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            # Set viewport for consistent rendering
-            page.set_viewport_size({"width": 1920, "height": 1080})
+        # Set viewport for consistent rendering
+        with browser_context(viewport={"width": 1920, "height": 1080}) as context:
+            page = context.new_page()
             
             # Navigate with multiple wait strategies
 
@@ -147,8 +220,6 @@ def scrape_with_playwright_enhanced(url, scroll_for_dynamic=True):
             except:
                 pass
             
-            browser.close()
-            
             if text and len(text) > 100:
                 logging.info(f"✓ Playwright scraped: {len(text)} chars from {url}")
                 return text[:15000], metadata  # Return text and metadata
@@ -193,6 +264,24 @@ def scrape_with_jina(url):
         logging.error(f"Jina AI error for {url}: {e}")
         return None
 
+def new_scraped_data(url, error=None):
+    """Empty result in the shape scrape_website returns."""
+    return {
+        "url": url,
+        "text": "",
+        "about_text": "",
+        "team_text": "",
+        "press_text": "",
+        "careers_text": "",
+        "metadata": {},
+        "html": "",
+        "headers": {},
+        "platform": None,
+        "structured_facts": None,
+        "technologies": [],
+        "error": error
+    }
+
 def scrape_website(url):
     """
     ENHANCED exhaustive scraping for modern dynamic websites.
@@ -206,35 +295,52 @@ def scrape_website(url):
     6. Contact pages (for email finding)
     
     Uses both Playwright (dynamic) and Jina AI (fallback).
+    Shopify/WooCommerce stores take a plain-HTTP fast path: structured facts
+    come from the platform APIs and pages are read without a browser render.
     """
     from urllib.parse import urljoin
+    from .platform_extractor import detect_platform, extract_structured_facts
+    from .tech_fingerprint import detect_technologies
     
-    scraped_data = {
-        "url": url,
-        "text": "",
-        "about_text": "",
-        "team_text": "",
-        "press_text": "",
-        "careers_text": "",
-        "metadata": {},
-        "error": None
-    }
+    scraped_data = new_scraped_data(url)
     
     logging.info(f"🔍 Exhaustive scraping: {url}")
     
+    # 0. RAW HTML + PLATFORM DETECTION (plain HTTP, no browser)
+    html, headers = fetch_html(url)
+    if html:
+        scraped_data["html"] = html
+        scraped_data["headers"] = headers
+        scraped_data["technologies"] = detect_technologies(html, headers)
+        platform = detect_platform(html, headers)
+        if platform:
+            scraped_data["platform"] = platform
+            scraped_data["structured_facts"] = extract_structured_facts(url, html=html, headers=headers)
+
+    fast_path = bool(scraped_data["platform"])
+
     # 1. HOMEPAGE - Primary content
-    text, metadata = scrape_with_playwright_enhanced(url, scroll_for_dynamic=True)
-    if text:
-        scraped_data["text"] = text
-        scraped_data["metadata"] = metadata
-        logging.info(f"✓ Homepage: {len(text)} chars")
-    else:
-        logging.info(f"Playwright failed, trying Jina AI for homepage...")
-        text = scrape_with_jina(url)
-        
-    if text:
-        scraped_data["text"] = text
-        logging.info(f"✓ Homepage (Jina): {len(text)} chars")
+    text = None
+    if fast_path:
+        text = html_to_text(html)[:15000]
+        if len(text) >= 800:
+            scraped_data["text"] = text
+            logging.info(f"✓ Homepage (HTTP fast path): {len(text)} chars")
+        else:
+            text = None
+
+    if not text:
+        text, metadata = scrape_with_playwright_enhanced(url, scroll_for_dynamic=True)
+        if text:
+            scraped_data["text"] = text
+            scraped_data["metadata"] = metadata
+            logging.info(f"✓ Homepage: {len(text)} chars")
+        else:
+            logging.info(f"Playwright failed, trying Jina AI for homepage...")
+            text = scrape_with_jina(url)
+            if text:
+                scraped_data["text"] = text
+                logging.info(f"✓ Homepage (Jina): {len(text)} chars")
 
     # If homepage failed completely, return error
     if not scraped_data["text"]:
@@ -266,7 +372,11 @@ def scrape_website(url):
         about_url = urljoin(url, path)
         logging.info(f"  → Trying: {path}")
         
-        about_text, about_meta = scrape_with_playwright_enhanced(about_url, scroll_for_dynamic=False)
+        about_text, about_meta = None, {}
+        if fast_path:
+            about_text = scrape_with_http(about_url)
+        if not about_text:
+            about_text, about_meta = scrape_with_playwright_enhanced(about_url, scroll_for_dynamic=False)
         if not about_text:
             about_text = scrape_with_jina(about_url)
         
@@ -280,7 +390,9 @@ def scrape_website(url):
     team_paths = ['/team', '/our-team', '/leadership', '/people']
     for path in team_paths[:2]:  # Try top 2
         team_url = urljoin(url, path)
-        team_text, _ = scrape_with_playwright_enhanced(team_url, scroll_for_dynamic=False)
+        team_text = scrape_with_http(team_url) if fast_path else None
+        if not team_text:
+            team_text, _ = scrape_with_playwright_enhanced(team_url, scroll_for_dynamic=False)
         if not team_text:
             team_text = scrape_with_jina(team_url)
         
@@ -293,7 +405,9 @@ def scrape_website(url):
     press_paths = ['/press', '/news', '/newsroom', '/media', '/blog']
     for path in press_paths[:2]:  # Try top 2
         press_url = urljoin(url, path)
-        press_text = scrape_with_jina(press_url)  # Jina is faster for simple pages
+        press_text = scrape_with_http(press_url) if fast_path else None
+        if not press_text:
+            press_text = scrape_with_jina(press_url)  # Jina is faster for simple pages
         if not press_text:
             press_text, _ = scrape_with_playwright_enhanced(press_url, scroll_for_dynamic=False)
         
@@ -306,7 +420,9 @@ def scrape_website(url):
     careers_paths = ['/careers', '/jobs', '/join-us', '/join-our-team']
     for path in careers_paths[:2]:  # Try top 2
         careers_url = urljoin(url, path)
-        careers_text = scrape_with_jina(careers_url)  # Fast scrape
+        careers_text = scrape_with_http(careers_url) if fast_path else None
+        if not careers_text:
+            careers_text = scrape_with_jina(careers_url)  # Fast scrape
         
         if careers_text and len(careers_text) > 100:
             scraped_data["careers_text"] = careers_text[:2000]
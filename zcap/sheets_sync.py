@@ -9,6 +9,7 @@ from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import time
+import threading
 from google import auth 
 
 # Scopes required for Google Sheets API
@@ -22,6 +23,16 @@ FIELDNAMES = [
     "Tech Stack","Product Profile","Customer Focus","Shipping Locations",
     "Timestamp"
 ]
+
+# The googleapiclient/httplib2 service is not thread-safe, and verification
+# workers update rows while the main thread appends them: every API call on
+# the shared service goes through _execute.
+_api_lock = threading.RLock()
+
+def _execute(request):
+    with _api_lock:
+        return request.execute()
+
 class SheetsSync:
     def __init__(self, spreadsheet_id, credentials):
         """
@@ -42,20 +53,20 @@ class SheetsSync:
         try:
             headers = FIELDNAMES
             range_name = f"{sheet_name}!A1:AA1"
-            result = self.service.spreadsheets().values().get(
+            result = _execute(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=range_name
-            ).execute()
+            ))
             
             values = result.get('values', [])
             if not values or values[0] != headers:
                 body = {'values': [headers]}
-                self.service.spreadsheets().values().update(
+                _execute(self.service.spreadsheets().values().update(
                     spreadsheetId=self.spreadsheet_id,
                     range=f"{sheet_name}!A1",
                     valueInputOption='RAW',
                     body=body
-                ).execute()
+                ))
                 logging.info(f"✅ Initialized headers in sheet: {sheet_name}")
         except HttpError as e:
             logging.error(f"Failed to initialize headers: {e}")
@@ -93,13 +104,13 @@ class SheetsSync:
             
             # Append to sheet (rest of the logic remains the same)
             body = {'values': [row]}
-            result = self.service.spreadsheets().values().append(
+            result = _execute(self.service.spreadsheets().values().append(
                 spreadsheetId=self.spreadsheet_id,
                 range=f"{sheet_name}!A:AA",
                 valueInputOption='RAW',
                 insertDataOption='INSERT_ROWS',
                 body=body
-            ).execute()
+            ))
             
             logging.info(f" Synced lead to Google Sheets: {lead_data.get('Company', 'Unknown')}")
             return result.get('updates', {}).get('updatedRange', '')
@@ -117,6 +128,32 @@ class SheetsSync:
             logging.error(f"Unexpected error syncing to Sheets: {e}")
             return None
     
+    def update_lead(self, updated_range, lead_data):
+        """
+        Overwrites the row previously written by sync_lead (its updatedRange,
+        e.g. 'Sheet1!A12:AA12') with lead_data. Returns True on success.
+        """
+        try:
+            row = ["" if lead_data.get(col) is None else str(lead_data.get(col)).strip() for col in FIELDNAMES]
+            _execute(self.service.spreadsheets().values().update(
+                spreadsheetId=self.spreadsheet_id,
+                range=updated_range,
+                valueInputOption='RAW',
+                body={'values': [row]}
+            ))
+            logging.info(f" Updated lead in Google Sheets: {lead_data.get('Company', 'Unknown')} ({updated_range})")
+            return True
+        except HttpError as e:
+            if e.resp.status == 429:
+                logging.warning("Google Sheets rate limit hit, retrying in 2 seconds...")
+                time.sleep(2)
+                return self.update_lead(updated_range, lead_data)
+            logging.error(f"Failed to update lead in Sheets: {e}")
+            return False
+        except Exception as e:
+            logging.error(f"Unexpected error updating Sheets row: {e}")
+            return False
+
     def batch_sync_leads(self, leads_list, sheet_name='Sheet1'):
         """
         Sync multiple leads at once (more efficient).
@@ -141,13 +178,13 @@ class SheetsSync:
             
             # Batch append
             body = {'values': rows}
-            self.service.spreadsheets().values().append(
+            _execute(self.service.spreadsheets().values().append(
                 spreadsheetId=self.spreadsheet_id,
                 range=f"{sheet_name}!A:AA",
                 valueInputOption='RAW',
                 insertDataOption='INSERT_ROWS',
                 body=body
-            ).execute()
+            ))
             
             logging.info(f"✅ Batch synced {len(rows)} leads to Google Sheets")
             return len(rows)
@@ -161,6 +198,10 @@ class SheetsSync:
 _sheets_sync_instance = None
 
 def get_sheets_sync():
+    with _api_lock:  # one instance even when verification workers get here first
+        return _get_sheets_sync()
+
+def _get_sheets_sync():
     global _sheets_sync_instance
     if _sheets_sync_instance is None:
         from .config import GOOGLE_SHEET_ID, GOOGLE_APPLICATION_CREDENTIALS, ENABLE_SHEETS_SYNC
@@ -204,6 +245,18 @@ def sync_lead_to_sheet(lead_data):
         return sheets.sync_lead(lead_data)
     return None
 
+def update_lead_in_sheet(updated_range, lead_data):
+    """
+    Rewrites a row returned by sync_lead_to_sheet / sync_enriched_lead_to_sheet
+    in place (e.g. once verification finishes). Safe to call when sync is off.
+    """
+    if not updated_range:
+        return None
+    sheets = get_sheets_sync()
+    if sheets:
+        return sheets.update_lead(updated_range, lead_data)
+    return None
+
 def sync_enriched_lead_to_sheet(lead_data):
     """
     Writes enrichment output to Enrichment tab
@@ -220,10 +273,10 @@ def get_enrichment_sheet_rows(sheet_name="Enrichment"):
         return []
 
     try:
-        result = sheets.service.spreadsheets().values().get(
+        result = _execute(sheets.service.spreadsheets().values().get(
             spreadsheetId=sheets.spreadsheet_id,
             range=f"{sheet_name}!A:AA"
-        ).execute()
+        ))
 
         values = result.get("values", [])
         if not values:
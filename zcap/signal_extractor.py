@@ -0,0 +1,230 @@
+"""
+Local extraction of explicit logistics facts from scraped text and HTML.
+
+social_media, contact_details, logistics_signals, shipping_locations and
+customer_focus are literal strings on the page ("Free shipping over $100",
+"30-day returns", phone numbers, social links) and the analysis prompt already
+forbids inferring them, so they are pulled out here with precompiled
+multi-pattern regexes instead of being generated by Gemini. tech_stack comes
+from the HTML/header fingerprints in tech_fingerprint.py.
+"""
+
+import re
+
+from .tech_fingerprint import detect_technologies, format_tech_stack
+
+# One alternation per signal family; match.lastgroup names the phrase that fired.
+LOGISTICS_PATTERNS = {
+    "free_shipping": r"free (?:standard |ground |us |domestic |express |2-day )?shipping(?: on (?:all )?(?:orders?|everything))?(?: (?:over|above|on orders over) [$€£]\s?\d+(?:[.,]\d+)?)?",
+    "flat_rate": r"flat[- ]rate shipping(?: of [$€£]\s?\d+(?:[.,]\d+)?)?",
+    "returns_window": r"\d{1,3}[- ]day (?:free |easy |hassle[- ]free |money[- ]back )?(?:returns?|return policy|money[- ]back guarantee)",
+    "free_returns": r"(?:free|easy|hassle[- ]free) returns?(?: (?:and|&) exchanges)?",
+    "same_day": r"same[- ]day (?:shipping|dispatch|delivery)",
+    "next_day": r"next[- ]day (?:shipping|delivery)|overnight shipping",
+    "ships_within": r"ships? (?:with)?in \d+(?:\s?[-–]\s?\d+)? (?:business )?(?:days?|hours?)",
+    "international": r"(?:international|worldwide|global) (?:shipping|delivery)|we ship (?:worldwide|internationally|globally)",
+    "local_pickup": r"(?:local|in[- ]store|curbside) pick[- ]?up",
+    "subscription": r"subscribe (?:&|and) save|subscription (?:box|plan)s?|auto[- ]?ship",
+    "pre_order": r"pre[- ]?orders?",
+    "made_to_order": r"made[- ]to[- ]order|handmade to order",
+    "wholesale": r"wholesale(?: (?:inquiries|program|accounts?|pricing))?",
+}
+LOGISTICS_RE = re.compile(
+    "|".join(f"(?P<{name}>\\b(?:{pattern})\\b)" for name, pattern in LOGISTICS_PATTERNS.items()),
+    re.IGNORECASE
+)
+
+SHIPPING_SCOPE_PATTERNS = {
+    "Global": r"we ship (?:worldwide|globally|to (?:over )?\d{2,3}\+? countries)|worldwide (?:shipping|delivery)|ships? worldwide",
+    "International": r"international (?:shipping|delivery|orders)|we (?:also )?ship internationally|ships? internationally",
+    "North America": r"ship(?:s|ping)? (?:to|within) (?:the )?(?:us|usa|united states|u\.s\.) (?:and|&) canada|north america",
+    "US Only": r"(?:only ship|ship only|shipping (?:is )?only available) (?:with)?in (?:the )?(?:contiguous |continental )?(?:us|usa|united states|u\.s\.)|(?:us|usa|domestic) (?:shipping )?only|we do not ship internationally",
+}
+SHIPPING_SCOPE_RE = re.compile(
+    "|".join(f"(?P<{name.replace(' ', '_')}>\\b(?:{pattern})\\b)" for name, pattern in SHIPPING_SCOPE_PATTERNS.items()),
+    re.IGNORECASE
+)
+SCOPE_PRIORITY = ["US Only", "Global", "International", "North America"]  # explicit restriction wins
+
+B2B_RE = re.compile(
+    r"\b(wholesale|bulk (?:orders?|pricing)|for (?:businesses|retailers)|trade (?:account|program)|"
+    r"net[- ]?30|become a (?:stockist|retailer|distributor)|request a quote|b2b|distributors?|resellers?)\b", re.I)
+B2C_RE = re.compile(
+    r"\b(add to (?:cart|bag|basket)|shop now|buy now|free shipping|gift (?:cards?|sets?|guide)|"
+    r"checkout|my account|rewards program|sale)\b", re.I)
+FOCUS_MIN_HITS = 2
+
+SOCIAL_DOMAINS = {
+    "instagram.com": "Instagram",
+    "facebook.com": "Facebook",
+    "twitter.com": "Twitter",
+    "x.com": "X",
+    "tiktok.com": "TikTok",
+    "youtube.com": "YouTube",
+    "linkedin.com": "LinkedIn",
+    "pinterest.com": "Pinterest",
+}
+SOCIAL_LINK_RE = re.compile(
+    r"https?://(?:www\.|[a-z]{2}\.)?(" + "|".join(re.escape(d) for d in SOCIAL_DOMAINS) + r")/([^\s\"'<>?#]+)",
+    re.IGNORECASE
+)
+SOCIAL_SKIP = re.compile(r"^(sharer|share|intent|plugins|dialog|tr|embed|watch|p/|reel|hashtag|search|home)", re.I)
+
+PHONE_RE = re.compile(
+    r"(?:tel:|\b)(\+?1[\s.-]?)?\(?([2-9]\d{2})\)?[\s.-]([2-9]\d{2})[\s.-](\d{4})\b|(\+(?!1)\d{1,3}[\s.-]\d{2,4}[\s.-]\d{3,4}[\s.-]?\d{0,4})"
+)
+ADDRESS_RE = re.compile(
+    r"\b\d{2,5}\s+(?:[A-Z][A-Za-z0-9.']*\s){1,4}(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Dr|Drive|Ln|Lane|Way|Pkwy|Parkway|Ct|Court)\.?"
+    r"(?:,?\s(?:Suite|Ste|Unit|#)\.?\s?\w+)?,?\s(?:[A-Z][a-z]+\s?){1,3},?\s[A-Z]{2}\s\d{5}\b"
+)
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+GENERIC_EMAIL_PREFIXES = ("info", "hello", "support", "contact", "sales", "help", "care", "orders", "service", "team")
+
+MAX_SIGNALS = 6
+
+
+def _page_text(scraped):
+    return "\n".join(
+        scraped.get(key) or "" for key in ("text", "about_text", "team_text", "press_text", "careers_text")
+    )
+
+
+def _dedupe(values, limit=MAX_SIGNALS):
+    seen = set()
+    out = []
+    for value in values:
+        key = value.lower()
+        if key not in seen:
+            seen.add(key)
+            out.append(value)
+        if len(out) >= limit:
+            break
+    return out
+
+
+def extract_logistics_signals(text):
+    """'Free shipping over $100, 30-day returns, Ships within 2 business days'."""
+    phrases = []
+    fired = set()
+    for match in LOGISTICS_RE.finditer(text):
+        # One phrase per family keeps "free shipping" from repeating across banners
+        if match.lastgroup in fired:
+            continue
+        fired.add(match.lastgroup)
+        phrase = re.sub(r"\s+", " ", match.group(0)).strip()
+        phrases.append(phrase[0].upper() + phrase[1:])
+    return ", ".join(_dedupe(phrases))
+
+
+def extract_shipping_locations(text, structured_facts=None):
+    found = {match.lastgroup.replace("_", " ") for match in SHIPPING_SCOPE_RE.finditer(text)}
+    for scope in SCOPE_PRIORITY:
+        if scope in found:
+            return scope
+
+    ships_to = (structured_facts or {}).get("ships_to") or []
+    if ships_to:
+        codes = {str(c).upper() for c in ships_to}
+        if codes <= {"US"}:
+            return "US Only"
+        if codes <= {"US", "CA", "MX"}:
+            return "North America"
+        return "Global" if len(codes) >= 10 else "International"
+    return ""
+
+
+def extract_customer_focus(text):
+    b2b = len(B2B_RE.findall(text))
+    b2c = len(B2C_RE.findall(text))
+    if b2b >= FOCUS_MIN_HITS and b2c >= FOCUS_MIN_HITS:
+        return "Both"
+    if b2b >= FOCUS_MIN_HITS:
+        return "B2B"
+    if b2c >= FOCUS_MIN_HITS:
+        return "B2C"
+    return ""
+
+
+def extract_social_media(html, text=""):
+    """'Instagram: @brand, LinkedIn: /company/brand' from profile links (share buttons skipped)."""
+    profiles = []
+    for domain, path in SOCIAL_LINK_RE.findall(html or text or ""):
+        path = path.strip("/")
+        if not path or SOCIAL_SKIP.match(path):
+            continue
+        network = SOCIAL_DOMAINS[domain.lower()]
+        if network == "LinkedIn":
+            if not path.lower().startswith(("company/", "in/")):
+                continue
+            handle = "/" + "/".join(path.split("/")[:2])
+        elif network == "YouTube":
+            handle = "/" + "/".join(path.split("/")[:2]) if path.lower().startswith(("channel/", "c/", "user/")) else "/" + path.split("/")[0]
+        else:
+            handle = path.split("/")[0]
+            handle = handle if handle.startswith("@") else f"@{handle}"
+        profiles.append((network, handle))
+
+    seen_networks = set()
+    out = []
+    for network, handle in profiles:
+        if network not in seen_networks:
+            seen_networks.add(network)
+            out.append(f"{network}: {handle}")
+    return ", ".join(out)
+
+
+def extract_contact_details(text, html="", structured_facts=None):
+    """'Phone: 555-0199, HQ: 123 Main St, Austin, TX 78701, Email: hello@brand.com'."""
+    parts = []
+
+    phone = None
+    for match in PHONE_RE.finditer(f"{text}\n{html or ''}"):
+        if match.group(2):
+            phone = f"{match.group(2)}-{match.group(3)}-{match.group(4)}"
+        else:
+            phone = match.group(5).strip()
+        break
+    if phone:
+        parts.append(f"Phone: {phone}")
+
+    address = ADDRESS_RE.search(text)
+    location = address.group(0) if address else (structured_facts or {}).get("store_location")
+    if location:
+        parts.append(f"HQ: {location}")
+
+    for email in EMAIL_RE.findall(text):
+        if email.lower().split("@")[0] in GENERIC_EMAIL_PREFIXES:
+            parts.append(f"Email: {email.lower()}")
+            break
+    return ", ".join(parts)
+
+
+def extract_signals(scraped):
+    """
+    Returns the explicit fields for a scrape_website result, keyed like the
+    analyze_lead output (empty string when not stated on the site).
+    """
+    text = _page_text(scraped)
+    html = scraped.get("html") or ""
+    facts = scraped.get("structured_facts")
+    technologies = scraped.get("technologies") or detect_technologies(html, scraped.get("headers"))
+    return {
+        "tech_stack": format_tech_stack(technologies),
+        "social_media": extract_social_media(html, text),
+        "contact_details": extract_contact_details(text, html, facts),
+        "logistics_signals": extract_logistics_signals(text),
+        "shipping_locations": extract_shipping_locations(text, facts),
+        "customer_focus": extract_customer_focus(text),
+    }
+
+
+def format_signals(signals):
+    """Compact one-line-per-field block for the analysis prompt (grading context only)."""
+    labels = {
+        "logistics_signals": "Logistics",
+        "shipping_locations": "Ships to",
+        "customer_focus": "Customer focus",
+        "tech_stack": "Tech stack",
+        "contact_details": "Contact",
+    }
+    return "\n".join(f"{label}: {signals[key]}" for key, label in labels.items() if signals.get(key))
@@ -1,8 +1,12 @@
 import csv
 import os
 import logging
+import threading
 from .config import INPUT_ICP_FILE, OUTPUT_FILE
 
+# save_lead (pipeline thread) and update_lead (verification workers) share the CSV
+_file_lock = threading.Lock()
+
 def get_keywords():
     """
     Reads keywords from the input file.
@@ -93,8 +97,54 @@ def save_lead(lead_data, filename=None):
         row.append(lead_data.get(h, ""))
         
     try:
-        with open(filename, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(row)
+        with _file_lock:
+            with open(filename, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(row)
     except Exception as e:
         logging.error(f"Failed to save lead: {e}")
+
+def update_lead(lead_data, updates, filename=None, match_status=None):
+    """
+    Rewrites the saved row for lead_data (same Company / First Name / Last Name,
+    and Status == match_status when given) with `updates`. Returns True if a
+    row was updated. The last matching row wins, i.e. the most recent save.
+    """
+    if filename is None:
+        filename = OUTPUT_FILE
+    keys = ("Company", "First Name", "Last Name")
+    target = tuple((lead_data.get(k) or "").strip() for k in keys)
+
+    try:
+        with _file_lock:
+            if not os.path.exists(filename):
+                return False
+            with open(filename, 'r', newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))
+            if not rows:
+                return False
+            header = rows[0]
+            index = {h: i for i, h in enumerate(header)}
+            status_col = index.get("Status")
+
+            for row in reversed(rows[1:]):
+                row += [""] * (len(header) - len(row))
+                if tuple(row[index[k]].strip() for k in keys) != target:
+                    continue
+                if match_status is not None and status_col is not None and row[status_col] != match_status:
+                    continue
+                for h, value in updates.items():
+                    if h in index:
+                        row[index[h]] = value
+                break
+            else:
+                return False
+
+            tmp = f"{filename}.tmp"
+            with open(tmp, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(rows)
+            os.replace(tmp, filename)
+            return True
+    except Exception as e:
+        logging.error(f"Failed to update lead: {e}")
+        return False
@@ -0,0 +1,135 @@
+"""
+Wappalyzer-style tech-stack fingerprinting from raw HTML and response headers.
+
+Playwright's inner_text drops <script> tags and headers, which is exactly
+where Shopify, Klaviyo, Recharge, ShipStation, Gorgias... show up. Rules live
+in data/tech_rules.json; each technology can match on:
+  scriptSrc  - regexes against <script src="...">
+  headers    - {header: regex} ("" = header present)
+  cookies    - {cookie name prefix: regex} from Set-Cookie
+  meta       - {meta name: regex against content} ("" = meta present)
+  js         - regexes against inline <script> bodies (global variables)
+  html       - regexes against the whole document
+All patterns are compiled once; detection is a single pass over the markup
+that scrape_website already fetched.
+"""
+
+import json
+import logging
+import os
+import re
+
+RULES_FILE = os.path.join(os.path.dirname(__file__), "data", "tech_rules.json")
+
+SCRIPT_SRC_RE = re.compile(r"<script[^>]+src\s*=\s*[\"']([^\"']+)[\"']", re.IGNORECASE)
+INLINE_SCRIPT_RE = re.compile(r"<script(?![^>]*\bsrc\s*=)[^>]*>(.*?)</script>", re.IGNORECASE | re.DOTALL)
+META_RE = re.compile(r"<meta\s+[^>]*>", re.IGNORECASE)
+META_ATTR_RE = re.compile(r"(name|property|content)\s*=\s*[\"']([^\"']*)[\"']", re.IGNORECASE)
+COOKIE_NAME_RE = re.compile(r"(?:^|,\s*)([A-Za-z0-9_\-.]+)=")
+
+# Stack categories shown in the lead's Tech Stack column (analytics/CDN noise left out)
+LEAD_CATEGORIES = [
+    "Ecommerce", "Website Builder", "Subscriptions", "Shipping", "Fulfillment", "Returns",
+    "Email Marketing", "SMS Marketing", "Customer Support", "Reviews", "Payments",
+    "Dropshipping", "Print on Demand", "Digital Delivery",
+]
+
+_rules = None
+
+
+def _compile(pattern):
+    return re.compile(pattern, re.IGNORECASE) if pattern else None
+
+
+def load_rules(path=RULES_FILE):
+    """Loads and compiles the rules file once per process."""
+    global _rules
+    if _rules is not None and path == RULES_FILE:
+        return _rules
+    try:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+    except Exception as e:
+        logging.warning(f"Tech fingerprint rules unavailable ({path}): {e}")
+        raw = {}
+
+    compiled = []
+    for name, rule in raw.items():
+        compiled.append({
+            "name": name,
+            "category": rule.get("category", "Other"),
+            "scriptSrc": [_compile(p) for p in rule.get("scriptSrc", [])],
+            "headers": {k.lower(): _compile(v) for k, v in rule.get("headers", {}).items()},
+            "cookies": {k.lower(): _compile(v) for k, v in rule.get("cookies", {}).items()},
+            "meta": {k.lower(): _compile(v) for k, v in rule.get("meta", {}).items()},
+            "js": [_compile(p) for p in rule.get("js", [])],
+            "html": [_compile(p) for p in rule.get("html", [])],
+        })
+    if path == RULES_FILE:
+        _rules = compiled
+    return compiled
+
+
+def _parse_page(html, headers):
+    """Splits the document into the pieces rules match against (one pass each)."""
+    headers = {str(k).lower(): str(v) for k, v in (headers or {}).items()}
+    meta = {}
+    for tag in META_RE.findall(html):
+        attrs = {k.lower(): v for k, v in META_ATTR_RE.findall(tag)}
+        key = (attrs.get("name") or attrs.get("property") or "").lower()
+        if key:
+            meta[key] = attrs.get("content", "")
+    return {
+        "scripts": "\n".join(SCRIPT_SRC_RE.findall(html)),
+        "inline": "\n".join(INLINE_SCRIPT_RE.findall(html)),
+        "headers": headers,
+        "cookies": [c.lower() for c in COOKIE_NAME_RE.findall(headers.get("set-cookie", ""))],
+        "meta": meta,
+    }
+
+
+def _matches(rule, page, html):
+    if any(p.search(page["scripts"]) for p in rule["scriptSrc"]):
+        return "scriptSrc"
+    for header, pattern in rule["headers"].items():
+        # Keys ending in "-" match any header with that prefix (e.g. "x-bc-")
+        hits = [v for k, v in page["headers"].items() if k == header or (header.endswith("-") and k.startswith(header))]
+        if hits and (pattern is None or any(pattern.search(v) for v in hits)):
+            return "headers"
+    for cookie in rule["cookies"]:
+        if any(name.startswith(cookie) for name in page["cookies"]):
+            return "cookies"
+    for name, pattern in rule["meta"].items():
+        if name in page["meta"] and (pattern is None or pattern.search(page["meta"][name])):
+            return "meta"
+    if any(p.search(page["inline"]) for p in rule["js"]):
+        return "js"
+    if any(p.search(html) for p in rule["html"]):
+        return "html"
+    return None
+
+
+def detect_technologies(html, headers=None):
+    """
+    Returns [{"name", "category", "matched_on"}] for the technologies found in
+    the raw HTML/headers, in rules-file order.
+    """
+    if not html and not headers:
+        return []
+    html = html or ""
+    page = _parse_page(html, headers)
+    found = []
+    for rule in load_rules():
+        matched_on = _matches(rule, page, html)
+        if matched_on:
+            found.append({"name": rule["name"], "category": rule["category"], "matched_on": matched_on})
+    return found
+
+
+def format_tech_stack(technologies):
+    """'Shopify, Klaviyo, Recharge' for the lead record (lead-relevant categories only)."""
+    return ", ".join(t["name"] for t in technologies or [] if t["category"] in LEAD_CATEGORIES)
+
+
+def tech_categories(technologies):
+    return {t["category"] for t in technologies or []}
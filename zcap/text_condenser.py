@@ -0,0 +1,140 @@
+"""
+Boilerplate stripping and cross-page dedup for LLM input.
+
+HOMEPAGE/ABOUT/CAREERS/PRESS text each repeat the same nav menus, footers,
+cookie banners and announcement bars; concatenated and cut at 15k chars, the
+boilerplate survives while real content is truncated. This condenses the
+pages before truncation:
+  1. lines repeated across pages (nav/footer) are dropped,
+  2. short e-commerce chrome lines (cart, currency, newsletter...) are dropped,
+  3. near-identical paragraphs are deduplicated.
+"""
+
+import logging
+import re
+import threading
+
+DEFAULT_CHAR_LIMIT = 15000
+SHORT_LINE_CHARS = 60        # Repeated lines at most this long are treated as nav/footer
+CHROME_LINE_MAX_CHARS = 120  # Chrome patterns only apply to lines this short
+PARAGRAPH_MIN_CHARS = 80     # Near-dup detection only for paragraph-sized lines
+NEAR_DUP_JACCARD = 0.8
+SHINGLE_SIZE = 3
+
+SITE_SECTIONS = [
+    ("HOMEPAGE", "text"),
+    ("ABOUT", "about_text"),
+    ("CAREERS", "careers_text"),
+    ("PRESS", "press_text"),
+]
+
+# Store chrome: matched against short lines only, so real sentences survive.
+CHROME_PATTERNS = re.compile("|".join([
+    r"\b(add to|view|your|my|shopping) (cart|bag|basket)\b",
+    r"\bcart\b.*\b(empty|\d+ items?)\b",
+    r"^(cart|bag|basket|checkout|search|menu|close|account|log ?in|sign ?in|sign ?up|register|wishlist)$",
+    r"^(country|region|currency)(/region)?\b",
+    r"\b(select|change|update) (your )?(country|region|currency|language)\b",
+    r"^(usd|eur|gbp|cad|aud|aed)\b.*[$€£]",
+    # Banner phrases only: "Chocolate chip cookies" / "Subscribe & save" are product lines
+    r"\b(sign up for|subscribe to) our (newsletter|emails?|mailing list)\b",
+    r"\b(join our (mailing )?list|enter your email( address)?)\b|^(subscribe|newsletter)$",
+    r"\b(we use cookies|(this|our) (web)?site uses cookies|accept (all )?cookies|cookie (policy|settings|preferences))\b",
+    r"\b(accept all|reject all|privacy preferences|manage preferences)\b",
+    r"\b(skip to (main )?content|back to top|scroll to top)\b",
+    r"©|\ball rights reserved\b|\bpowered by\b",
+    r"^(privacy policy|terms (of service|& conditions)|refund policy|accessibility|sitemap)$",
+    r"\b(quick view|sold out|regular price|sale price|unit price)\b",
+    r"^(previous|next|slide \d+|\d+ of \d+|pause|play)$",
+    r"^(facebook|instagram|twitter|tiktok|pinterest|youtube|linkedin|x)$",
+]), re.IGNORECASE)
+
+# Repeated banner lines that still carry logistics signal keep their first occurrence
+KEEP_SIGNALS = re.compile(r"\b(ship(s|ping)?|deliver(y|ies)|returns?|wholesale|warehouse)\b", re.IGNORECASE)
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "chars_in": 0, "chars_out": 0}
+
+
+def _normalize(line):
+    return re.sub(r"\s+", " ", line).strip().lower()
+
+
+def _shingles(text):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _is_chrome(norm):
+    return len(norm) <= CHROME_LINE_MAX_CHARS and bool(CHROME_PATTERNS.search(norm))
+
+
+def condense_sections(sections, limit=DEFAULT_CHAR_LIMIT):
+    """
+    sections: ordered list of (label, text). Returns a single labelled string,
+    condensed and then truncated to `limit` chars.
+    """
+    sections = [(label, text or "") for label, text in sections if text]
+
+    # How many distinct pages each normalized line appears on
+    page_counts = {}
+    for _, text in sections:
+        for norm in {_normalize(line) for line in text.splitlines()}:
+            if norm:
+                page_counts[norm] = page_counts.get(norm, 0) + 1
+
+    seen_lines = set()
+    kept_paragraphs = []  # shingle sets of kept long lines
+    parts = []
+    chars_in = 0
+
+    for label, text in sections:
+        chars_in += len(text)
+        kept = []
+        for line in text.splitlines():
+            norm = _normalize(line)
+            if len(norm) < 3 or norm in seen_lines:
+                continue
+            seen_lines.add(norm)
+
+            # Short lines on several pages are nav menus / footers / banners
+            if page_counts.get(norm, 0) > 1 and len(norm) <= SHORT_LINE_CHARS and not KEEP_SIGNALS.search(norm):
+                continue
+            if _is_chrome(norm):
+                continue
+
+            if len(norm) >= PARAGRAPH_MIN_CHARS:
+                shingles = _shingles(norm)
+                if any(len(shingles & other) / len(shingles | other) >= NEAR_DUP_JACCARD for other in kept_paragraphs):
+                    continue
+                kept_paragraphs.append(shingles)
+
+            kept.append(line.strip())
+
+        if kept:
+            parts.append(f"{label}:\n" + "\n".join(kept))
+
+    condensed = "\n\n".join(parts)[:limit]
+
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["chars_in"] += chars_in
+        _stats["chars_out"] += len(condensed)
+
+    if chars_in:
+        logging.info(f"✂️ Condensed site text {chars_in} → {len(condensed)} chars")
+    return condensed
+
+
+def condense_scraped(scraped, limit=DEFAULT_CHAR_LIMIT):
+    """Condenses the standard scrape_website sections (homepage, about, careers, press)."""
+    return condense_sections([(label, scraped.get(key, "")) for label, key in SITE_SECTIONS], limit=limit)
+
+
+def get_condense_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["reduction_pct"] = round(100 * (1 - stats["chars_out"] / stats["chars_in"]), 1) if stats["chars_in"] else 0.0
+    return stats
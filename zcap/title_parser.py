@@ -0,0 +1,194 @@
+"""
+Rule-based SERP title parser (fast path in front of Gemini name cleaning).
+
+Most titles follow predictable shapes ("Brand – Tagline", "Shop X | Brand",
+"Home | Brand", "Brand: Official Site") and the registrable domain usually
+confirms the brand. We split on separators, strip SEO tokens, score segments
+against the domain and flag listicles; only low-confidence titles go to the LLM.
+"""
+
+import logging
+import re
+import threading
+from difflib import SequenceMatcher
+from urllib.parse import urlparse
+
+from .config import TITLE_PARSER_MIN_CONFIDENCE
+
+SEPARATORS = re.compile(r"\s*(?:\||–|—|·|•|»|::|\s-\s|:\s)\s*")
+
+LISTICLE_PATTERNS = re.compile("|".join([
+    r"^\s*(the\s+)?(top|best)\s+\d+",
+    r"^\s*\d+\s+(best|top|great|amazing)\b",
+    r"^\s*(the\s+)?best\b.*\b20\d\d\b",
+    r"\b(top|best)\s+\d+\s",
+    r"\b(top|best)\s+(brands|stores|shops|sites|companies)\b",
+    r"^\s*(reviews?|how to|what is|list of|guide to)\b|\b(buying guide|review of|vs\.?|versus)\b",
+]), re.IGNORECASE)
+
+SEO_TOKENS = re.compile("|".join([
+    r"^(home\s*page|home|welcome to|welcome)\b",
+    r"\b(official\s+(online\s+)?(site|store|website|shop))\b",
+    r"\b(online\s+(store|shop)|shop\s+online|buy\s+online)\b",
+    r"\b(homepage|home)$",
+]), re.IGNORECASE)
+
+# Multi-part public suffixes we actually see in discovery (.com/.io/.co/.ae ...)
+MULTI_PART_SUFFIXES = {
+    "co.uk", "org.uk", "com.au", "net.au", "co.nz", "com.br", "co.jp", "com.mx",
+    "co.za", "com.sg", "co.in", "ae.org", "com.tr", "co.ae", "com.cn"
+}
+
+MAX_NAME_WORDS = 6
+
+# Words that extend a brand into its company name ("Vermont Woods Studios" on
+# vermontwoods.com); anything else after the brand is a tagline
+COMPANY_NAME_SUFFIXES = re.compile(
+    r"^(studios?|co\.?|company|labs?|inc\.?|llc|ltd\.?|group|brands|goods|supply|works|collective|&|and)$",
+    re.IGNORECASE)
+
+_stats_lock = threading.Lock()
+_stats = {"titles": 0, "rule_resolved": 0, "escalated": 0, "llm_seconds": 0.0, "llm_titles": 0}
+
+
+def registrable_label(url):
+    """'https://shop.vermontwoods.co.uk/x' -> 'vermontwoods'."""
+    host = urlparse(url or "").netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    labels = [l for l in host.split(".") if l]
+    if len(labels) < 2:
+        return labels[0] if labels else ""
+    if ".".join(labels[-2:]) in MULTI_PART_SUFFIXES and len(labels) >= 3:
+        return labels[-3]
+    return labels[-2]
+
+
+def _compact(text):
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def _strip_seo(segment):
+    previous = None
+    while previous != segment:
+        previous = segment
+        segment = SEO_TOKENS.sub("", segment).strip(" -,.!")
+    return segment
+
+
+def _best_window(segment, token):
+    """
+    Finds the contiguous word window of `segment` that best matches the domain
+    token. Returns (score, window_text).
+    """
+    words = segment.split()
+    best = (0.0, "")
+    for i in range(len(words)):
+        for j in range(i + 1, min(len(words), i + MAX_NAME_WORDS) + 1):
+            window = " ".join(words[i:j])
+            compact = _compact(window)
+            if not compact:
+                continue
+            if compact == token:
+                return 1.0, window
+            score = SequenceMatcher(None, compact, token).ratio()
+            if score > best[0]:
+                best = (score, window)
+    return best
+
+
+def _brand_with_suffix(segment, token):
+    """
+    Segment starting with the domain words: "Vermont Woods Studios" keeps its
+    company-name suffix; "Allbirds Shoes for Men" is cut to the brand span.
+    """
+    score, name = _best_window(segment, token)
+    if _compact(name) != token or not segment.startswith(name):
+        return score, name
+    rest = segment[len(name):].split()
+    suffix = []
+    for word in rest:
+        if not COMPANY_NAME_SUFFIXES.match(word.strip(",.")):
+            break
+        suffix.append(word)
+    while suffix and suffix[-1].lower() in ("&", "and"):
+        suffix.pop()
+    return max(score, 0.9), " ".join([name] + suffix)
+
+
+def parse_title(title, url):
+    """
+    Returns {"company_name", "is_company", "confidence"} for a SERP title.
+    confidence is 0-1; callers escalate to the LLM below TITLE_PARSER_MIN_CONFIDENCE.
+    """
+    title = (title or "").strip()
+    if not title:
+        return {"company_name": "", "is_company": False, "confidence": 0.0}
+
+    is_listicle = bool(LISTICLE_PATTERNS.search(title))
+
+    token = _compact(registrable_label(url))
+    segments = [_strip_seo(s) for s in SEPARATORS.split(title)]
+    segments = [s for s in segments if s]
+    if is_listicle and token not in {_compact(seg) for seg in segments}:
+        return {"company_name": "", "is_company": False, "confidence": 0.9}
+    if not token or not segments:
+        return {"company_name": segments[0] if segments else title, "is_company": True, "confidence": 0.2}
+
+    best_score, best_name = 0.0, ""
+    for segment in segments:
+        compact = _compact(segment)
+        if compact == token:
+            score, name = 1.0, segment
+        elif compact.startswith(token) and len(segment.split()) <= MAX_NAME_WORDS:
+            score, name = _brand_with_suffix(segment, token)
+        elif token in compact and len(segment.split()) <= MAX_NAME_WORDS:
+            # "Shop Vermont Woods" for vermontwoods.com: keep the brand span only
+            score, name = _best_window(segment, token)
+            score = max(score, 0.9) if _compact(name) == token else score
+        else:
+            score, name = _best_window(segment, token)
+        if score > best_score:
+            best_score, best_name = score, name
+
+    if best_score >= 0.85:
+        return {"company_name": best_name.strip(" -,.!"), "is_company": True, "confidence": round(best_score, 2)}
+
+    # No segment matches the domain: the first segment is only a guess
+    return {"company_name": segments[0], "is_company": True, "confidence": round(min(best_score, 0.5), 2)}
+
+
+def is_confident(parsed):
+    return parsed["confidence"] >= TITLE_PARSER_MIN_CONFIDENCE
+
+
+def record_rule_resolved(count=1):
+    with _stats_lock:
+        _stats["titles"] += count
+        _stats["rule_resolved"] += count
+
+
+def record_escalated(count, llm_seconds):
+    """count titles went to the LLM, taking llm_seconds of wall time in total."""
+    with _stats_lock:
+        _stats["titles"] += count
+        _stats["escalated"] += count
+        _stats["llm_seconds"] += llm_seconds
+        _stats["llm_titles"] += count
+
+
+def get_title_parser_stats():
+    """Share of titles resolved without the LLM and the (estimated) latency saved."""
+    with _stats_lock:
+        stats = dict(_stats)
+    per_title = stats["llm_seconds"] / stats["llm_titles"] if stats["llm_titles"] else 0.0
+    stats["rule_share"] = round(stats["rule_resolved"] / stats["titles"], 3) if stats["titles"] else 0.0
+    stats["est_seconds_saved"] = round(stats["rule_resolved"] * per_title, 1)
+    return stats
+
+
+def log_title_parser_stats():
+    stats = get_title_parser_stats()
+    logging.info(f"🏷️ Title parser: {stats['rule_resolved']}/{stats['titles']} titles resolved without LLM "
+                 f"({stats['rule_share']:.0%}), ~{stats['est_seconds_saved']}s LLM latency saved")
+    return stats
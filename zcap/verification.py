@@ -1,9 +1,17 @@
 import smtplib
-import dns.resolver
+import secrets
 import socket
 import logging
+import threading
 import requests
-from .config import HUNTER_API_KEY
+from contextlib import contextmanager
+from .config import (
+    EMAIL_PATTERN_MIN_CONFIDENCE, HUNTER_API_KEY, SMTP_VERIFY_ENABLED, SMTP_TIMEOUT, SMTP_MAX_CONCURRENT_PER_MX, SMTP_MAX_SESSIONS_PER_MX
+)
+from .dns_resolver import resolve_mx
+from .mail_knowledge import known_behavior, record_outcome
+from .hunter_ledger import cache_response, get_cached_response, mark_exhausted, release_credit, reserve_credit
+from .email_patterns import EMAIL_FORMATS, observe, predict, rank_candidates, render
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,9 +19,20 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 def find_email_with_hunter(first_name, last_name, domain):
     """
     Use Hunter.io to find email. Always returns a tuple (email, status).
+    Cached per person and capped by the shared monthly credit ledger.
     """
     if not HUNTER_API_KEY:
         return None, "No Hunter API Key"
+
+    cached = get_cached_response(domain, first_name, last_name)
+    if cached is not None:
+        if cached["email"]:
+            logging.info(f"✓ Hunter.io (cached): {cached['email']} (confidence: {cached['score']}%)")
+            return cached["email"], "Hunter.io"
+        return None, "Hunter.io - Not Found"
+
+    if not reserve_credit():
+        return None, "Hunter.io - Monthly Quota Reached"
     
     api_url = "https://api.hunter.io/v2/email-finder"
     params = {
@@ -27,14 +46,23 @@ def find_email_with_hunter(first_name, last_name, domain):
         response = requests.get(api_url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
-        
+    except Exception as e:
+        release_credit()
+        if getattr(getattr(e, "response", None), "status_code", None) == 429:
+            mark_exhausted()
+        logging.error(f"Hunter.io error: {e}")
+        return None, f"Hunter.io Error: {str(e)}"
+
+    try:
         # Check if 'data' key exists and contains an email
         if data.get("data") and data["data"].get("email"):
             email = data["data"]["email"]
             confidence = data["data"].get("score", 0)
             logging.info(f"✓ Hunter.io found: {email} (confidence: {confidence}%)")
+            cache_response(domain, first_name, last_name, email, confidence)
             return email, "Hunter.io"
         
+        cache_response(domain, first_name, last_name, None)
         return None, "Hunter.io - Not Found"
         
     except Exception as e:
@@ -43,48 +71,148 @@ def find_email_with_hunter(first_name, last_name, domain):
 
 def generate_emails(first, last, domain):
     """
-    Generates common email patterns.
+    Generates common email patterns (EMAIL_FORMATS order).
     """
     if not first or not domain:
         return []
-        
-    f = first.lower()
-    l = last.lower() if last else ""
-    d = domain
-    
-    patterns = [
-        f"{f}@{d}",
-    ]
-    
-    if l:
-        patterns.extend([
-            f"{f}.{l}@{d}",
-            f"{f}{l}@{d}",
-            f"{f}_{l}@{d}",
-            f"{l}.{f}@{d}",
-            f"{f[0]}{l}@{d}",
-            f"{f[0]}.{l}@{d}"
-        ])
-        
-    return patterns
+    patterns = [render(pattern, first, last, domain) for pattern in EMAIL_FORMATS]
+    return list(dict.fromkeys(p for p in patterns if p))
 
 def get_mx_record(domain):
     """
-    Retrieves the highest priority MX record for a domain.
+    Retrieves the highest priority MX record for a domain (cached across runs).
     """
-    try:
-        records = dns.resolver.resolve(domain, 'MX')
-        # Sort by preference and pick the first one
-        mx_record = sorted(records, key=lambda r: r.preference)[0].exchange.to_text().rstrip('.')
-        return mx_record
-    except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers, Exception) as e:
-        logging.warning(f"Could not get MX record for {domain}: {e}")
-        return None
+    hosts = resolve_mx(domain)
+    return hosts[0] if hosts else None
+
+HELO_HOST = "verify.shipcube.io"
+MAIL_FROM = "check@shipcube.io"
+
+# Per-MX session limits (many brands share Google Workspace / Microsoft 365 MX hosts)
+_mx_lock = threading.Lock()
+_mx_slots = {}      # mx host -> BoundedSemaphore(SMTP_MAX_CONCURRENT_PER_MX)
+_mx_sessions = {}   # mx host -> sessions opened this run
+_smtp_stats = {"sessions": 0, "rcpt_probes": 0, "limited": 0, "errors": 0}
+
+
+def _rcpt_status(code):
+    if code in (250, 251):
+        return "Valid"
+    if code in (550, 551, 553):
+        return "Invalid"
+    return "Unknown"  # 4xx greylisting / policy deferrals
+
+
+def _is_refusal(error, greeted):
+    """
+    An explicit SMTP refusal from the MX (5xx banner or HELO reply, or hanging
+    up after its banner) as opposed to a timeout / refused connection, which
+    usually means our own outbound port 25 is blocked.
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return greeted
+    if isinstance(error, (smtplib.SMTPConnectError, smtplib.SMTPHeloError)):
+        return error.smtp_code >= 500
+    return False
+
+
+@contextmanager
+def _mx_session_slot(mx_record):
+    """Yields False when the per-run session limit for this MX host is used up."""
+    with _mx_lock:
+        allowed = _mx_sessions.get(mx_record, 0) < SMTP_MAX_SESSIONS_PER_MX
+        if allowed:
+            _mx_sessions[mx_record] = _mx_sessions.get(mx_record, 0) + 1
+            slot = _mx_slots.setdefault(mx_record, threading.BoundedSemaphore(SMTP_MAX_CONCURRENT_PER_MX))
+        else:
+            _smtp_stats["limited"] += 1
+    if not allowed:
+        yield False
+        return
+    with slot:
+        yield True
+
+
+def smtp_probe_session(mx_record, domain, addresses, probe_catch_all=True):
+    """
+    Opens ONE SMTP session to mx_record: a catch-all probe with a random
+    mailbox, then RCPT TO for each address, with RSET between envelopes.
+    Returns {"catch_all": True/False/None, "behavior": ..., "results": {address: status}}
+    where status is 'Valid', 'Invalid', 'Unknown' or 'Error' and behavior is
+    'normal', 'catch_all', 'greylisting', 'blocks_probes' or 'error'; None if
+    the MX host's session limit is reached. On a catch-all domain the
+    addresses are not probed (every RCPT would answer 250).
+    """
+    verdict = {"catch_all": None, "behavior": "error", "results": {}}
+    codes = []
+    with _mx_session_slot(mx_record) as allowed:
+        if not allowed:
+            logging.info(f"SMTP session limit reached for {mx_record}, skipping {domain}")
+            return None
+
+        server = smtplib.SMTP(timeout=SMTP_TIMEOUT)
+        server.set_debuglevel(0)
+        with _mx_lock:
+            _smtp_stats["sessions"] += 1
+        greeted = False
+        try:
+            try:
+                code, banner = server.connect(mx_record)
+                if code != 220:  # SMTP() without a host doesn't check the greeting itself
+                    raise smtplib.SMTPConnectError(code, banner)
+                greeted = True
+                server.helo(HELO_HOST)
+            except OSError as e:  # smtplib.SMTPException is an OSError
+                # Only a refusal by the MX itself is remembered; network failures stay 'error'
+                if _is_refusal(e, greeted):
+                    verdict["behavior"] = "blocks_probes"
+                raise
+
+            envelopes = ([f"{secrets.token_hex(6)}-noreply@{domain}"] if probe_catch_all else []) + list(addresses)
+            for idx, address in enumerate(envelopes):
+                if idx:
+                    server.rset()
+                server.mail(MAIL_FROM)
+                code, _ = server.rcpt(address)
+                codes.append(code)
+                with _mx_lock:
+                    _smtp_stats["rcpt_probes"] += 1
+                status = _rcpt_status(code)
+                if probe_catch_all and idx == 0:
+                    verdict["catch_all"] = status == "Valid"
+                    if verdict["catch_all"]:
+                        break
+                else:
+                    verdict["results"][address] = status
+            if verdict["catch_all"]:
+                verdict["behavior"] = "catch_all"
+            elif codes and all(400 <= c < 500 for c in codes):
+                verdict["behavior"] = "greylisting"
+            else:
+                verdict["behavior"] = "normal"
+        except Exception as e:
+            with _mx_lock:
+                _smtp_stats["errors"] += 1
+            logging.warning(f"SMTP session to {mx_record} for {domain} failed: {e}")
+            for address in addresses:
+                verdict["results"].setdefault(address, "Error")
+        finally:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+    return verdict
+
+
+def get_smtp_stats():
+    with _mx_lock:
+        return dict(_smtp_stats, mx_hosts=len(_mx_sessions))
+
 
 def verify_email(email, mx_record=None):
     """
     Performs an SMTP handshake to verify if an email exists.
-    Returns: 'Valid', 'Invalid', 'Catch-All', or 'Unknown'
+    Returns: 'Valid', 'Invalid', 'Unknown' or 'Error'
     """
     domain = email.split('@')[1]
     
@@ -93,81 +221,107 @@ def verify_email(email, mx_record=None):
         if not mx_record:
             return "Unknown" # DNS failure
 
-    try:
-        # Connect to the MX server with SHORT timeout
-        server = smtplib.SMTP(timeout=3)  # Fast fail: 3 seconds only
-        server.set_debuglevel(0)
-        
-        # Connect
-        server.connect(mx_record)
-        
-        # HELO/EHLO
-        server.helo('verify.shipcube.io')
-        
-        # MAIL FROM
-        server.mail('check@shipcube.io')
-        
-        # RCPT TO
-        code, message = server.rcpt(email)
-        server.quit()
-        
-        if code == 250:
-            return "Valid"
-        elif code == 550:
-            return "Invalid"
-        else:
-            return "Unknown"
-
-    except Exception as e:
-        logging.warning(f"SMTP verification failed for {email}: {e}")
-        return "Error"
-
-# Global counter to limit SMTP checks per run
-smtp_verification_count = 0
-SMTP_VERIFICATION_LIMIT = 2  # Only verify 2 emails per run
-
-# Cache for catch-all domains (to skip SMTP for them)
-catch_all_domains = set()
+    verdict = smtp_probe_session(mx_record, domain, [email], probe_catch_all=False)
+    return verdict["results"].get(email, "Unknown") if verdict else "Unknown"
 
 def check_catch_all(domain, mx_record=None):
     """
     Checks if a domain is a catch-all by testing a random invalid email.
     """
-    random_email = f"xyz123randomtest@{domain}"
-    result = verify_email(random_email, mx_record)
-    return result == "Valid"
+    mx_record = mx_record or get_mx_record(domain)
+    verdict = smtp_probe_session(mx_record, domain, []) if mx_record else None
+    return bool(verdict and verdict["catch_all"])
 
-def verify_lead(first_name, last_name, domain, company_url=None):
-    global smtp_verification_count
-    
+def verify_candidates(addresses, domain):
+    """
+    Verifies every candidate address for a domain in a single SMTP session.
+    Returns {"catch_all": bool, "results": {address: status}}; results are
+    empty when SMTP is disabled, the domain is catch-all or unreachable.
+    """
+    verdict = {"catch_all": False, "results": {}}
+    if not SMTP_VERIFY_ENABLED or not addresses:
+        return verdict
+
+    mx_record = get_mx_record(domain)
+    if not mx_record:
+        logging.warning(f"No MX record for {domain}")
+        return verdict
+
+    # Skip domains / MX providers already known to make probing pointless
+    known = known_behavior(domain, mx_record)
+    if known:
+        logging.info(f"Skipping SMTP for {domain}: {known}")
+        verdict["catch_all"] = known in ("catch_all", "provider accepts_all")
+        return verdict
+
+    session = smtp_probe_session(mx_record, domain, addresses)
+    if not session:
+        return verdict
+    if session["behavior"] != "error":
+        record_outcome(domain, mx_record, session["behavior"])
+    if session["catch_all"]:
+        logging.info(f"Domain {domain} is catch-all - remembered")
+        verdict["catch_all"] = True
+    verdict["results"] = session["results"]
+    return verdict
+
+def first_valid(verdict, addresses):
+    return next((a for a in addresses if verdict["results"].get(a) == "Valid"), None)
+
+def verify_lead(first_name, last_name, domain, company_url=None, html=None):
     if not first_name or not domain:
         return None, "Missing Lead Data"
 
+    mx_record = get_mx_record(domain)
+
     # 1. Scrape Website (Best for Cloud)
     if company_url:
         try:
             from .email_finder import find_email_on_website
-            emails_found = find_email_on_website(company_url)
+            emails_found = find_email_on_website(company_url, html=html, first_name=first_name, last_name=last_name)
             if emails_found:
+                for found in emails_found:
+                    observe(found, first_name, last_name, "scraped", mx_record)
                 # Logic to check name matching...
                 return emails_found[0], "Website Scrape"
         except Exception as e:
             logging.error(f"Scraper error: {e}")
 
-    # 2. Hunter.io (Very reliable in Cloud)
+    # 2. Known format for this domain: no Hunter credit, no SMTP session
+    prediction = predict(first_name, last_name, domain, mx_record)
+    if prediction and prediction[3] == "domain" and prediction[2] >= EMAIL_PATTERN_MIN_CONFIDENCE:
+        email, pattern, confidence, _ = prediction
+        logging.info(f"📐 Learned {pattern} format for {domain} ({confidence:.0%}): {email}")
+        return email, f"Learned Pattern ({pattern}, {confidence:.0%})"
+
+    patterns = rank_candidates(generate_emails(first_name, last_name, domain), prediction)
+
+    # 3. Hunter.io (Very reliable in Cloud), checked together with the patterns in one SMTP session
     email, status = find_email_with_hunter(first_name, last_name, domain)
     if email:
-        # Only try SMTP if we are under the limit AND not in a blocked environment
-        if smtp_verification_count < SMTP_VERIFICATION_LIMIT:
-            smtp_result = smart_smtp_verify(email)
-            if smtp_result == "Valid":
-                smtp_verification_count += 1
-                return email, f"{status} (SMTP Verified)"
+        candidates = [email] + [p for p in patterns if p != email]
+        verdict = verify_candidates(candidates, domain)
+        if verdict["results"].get(email) == "Valid":
+            logging.info(f"✓ SMTP verified: {email}")
+            observe(email, first_name, last_name, "smtp", mx_record)
+            return email, f"{status} (SMTP Verified)"
+        if verdict["results"].get(email) == "Invalid":
+            logging.warning(f"✗ SMTP invalid: {email}")
+            verified = first_valid(verdict, candidates)
+            if verified:
+                observe(verified, first_name, last_name, "smtp", mx_record)
+                return verified, "Pattern (SMTP Verified)"
+            return email, status
+        observe(email, first_name, last_name, "hunter", mx_record)
         return email, status
     
-    # 3. Pattern Guessing (Safe fallback)
-    patterns = generate_emails(first_name, last_name, domain)
+    # 4. Pattern Guessing (Safe fallback, most likely format first), verified when the MX answers
     if patterns:
+        verified = first_valid(verify_candidates(patterns, domain), patterns)
+        if verified:
+            logging.info(f"✓ SMTP verified pattern: {verified}")
+            observe(verified, first_name, last_name, "smtp", mx_record)
+            return verified, "Pattern (SMTP Verified)"
         return patterns[0], "Pattern Guess (Not Verified)"
     
     return None, "Email Not Found"
@@ -180,25 +334,8 @@ def smart_smtp_verify(email):
     try:
         domain = email.split('@')[1]
         
-        # Skip if domain is known catch-all
-        if domain in catch_all_domains:
-            logging.info(f"Skipping SMTP for catch-all domain: {domain}")
-            return "Skip"
-        
-        # Get MX record
-        mx_record = get_mx_record(domain)
-        if not mx_record:
-            logging.warning(f"No MX record for {domain}")
-            return "Skip"
-        
-        # Check if catch-all (quick test)
-        if check_catch_all(domain, mx_record):
-            logging.info(f"Domain {domain} is catch-all - caching")
-            catch_all_domains.add(domain)
-            return "Skip"
-        
-        # Verify the actual email
-        result = verify_email(email, mx_record)
+        # Catch-all probe and the actual email share one SMTP session
+        result = verify_candidates([email], domain)["results"].get(email)
         
         if result == "Valid":
             logging.info(f"✓ SMTP verified: {email}")
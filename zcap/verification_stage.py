@@ -0,0 +1,123 @@
+"""
+Asynchronous email verification stage.
+
+verify_lead (site scrape, Hunter, SMTP sessions) used to run inline in
+process_single_company / enrich_row, holding the worker's slot through SMTP
+timeouts. Leads are now written to their sinks with status
+VERIFICATION_PENDING and verification jobs go to a separate bounded pool;
+each job's on_done callback updates the saved lead in place.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import VERIFICATION_ASYNC, VERIFICATION_WORKERS, VERIFICATION_QUEUE_LIMIT, VERIFICATION_DRAIN_TIMEOUT
+from .llm_telemetry import company_scope
+from .memory_governor import stage
+from .verification import verify_lead
+
+VERIFICATION_PENDING = "Verification Pending"
+
+_lock = threading.Lock()
+_executor = None
+_slots = threading.BoundedSemaphore(VERIFICATION_QUEUE_LIMIT)  # queued + running jobs
+_idle = threading.Condition(_lock)
+_stats = {"submitted": 0, "completed": 0, "verified": 0, "failed": 0, "pending": 0, "seconds": 0.0}
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=VERIFICATION_WORKERS, thread_name_prefix="verify")
+        return _executor
+
+
+def _run(company, first_name, last_name, domain, company_url, on_done, html=None):
+    started = time.time()
+    email, status, failed = None, None, False
+    try:
+        with company_scope(company), stage("verification"):
+            email, status = verify_lead(first_name, last_name, domain, company_url=company_url, html=html)
+    except Exception as e:
+        failed = True
+        status = "Verification Error"
+        logging.error(f"Verification failed for {first_name} {last_name} @ {domain}: {e}")
+
+    try:
+        on_done(email, status)
+    except Exception as e:
+        failed = True
+        logging.error(f"Verification update failed for {company}: {e}")
+    finally:
+        with _lock:
+            _stats["completed"] += 1
+            _stats["pending"] -= 1
+            _stats["seconds"] += time.time() - started
+            if failed:
+                _stats["failed"] += 1
+            elif status and "Verified" in status:
+                _stats["verified"] += 1
+            _idle.notify_all()
+
+
+def submit_verification(company, first_name, last_name, domain, company_url, on_done, html=None):
+    """
+    Queues verify_lead(...) and calls on_done(email, status) from a
+    verification worker. Blocks only when VERIFICATION_QUEUE_LIMIT jobs are
+    already queued or running. With VERIFICATION_ASYNC off it runs inline.
+    `html` is the already-scraped homepage, reused by the website email search.
+    """
+    with _lock:
+        _stats["submitted"] += 1
+        _stats["pending"] += 1
+    if not VERIFICATION_ASYNC:
+        _run(company, first_name, last_name, domain, company_url, on_done, html)
+        return
+
+    _slots.acquire()
+
+    def job():
+        try:
+            _run(company, first_name, last_name, domain, company_url, on_done, html)
+        finally:
+            _slots.release()
+
+    _get_executor().submit(job)
+
+
+def drain_verification(timeout=VERIFICATION_DRAIN_TIMEOUT):
+    """Waits until every submitted job has finished; returns how many are still pending."""
+    deadline = time.time() + timeout
+    with _lock:
+        while _stats["pending"] > 0 and time.time() < deadline:
+            _idle.wait(timeout=max(0.1, deadline - time.time()))
+        pending = _stats["pending"]
+    if pending:
+        logging.warning(f"⏳ {pending} verifications still pending after {timeout}s; their leads stay '{VERIFICATION_PENDING}'")
+    return pending
+
+
+def shutdown_verification_stage():
+    """Drains outstanding jobs, then stops the pool."""
+    global _executor
+    drain_verification()
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_verification_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats["avg_seconds"] = round(stats["seconds"] / stats["completed"], 2) if stats["completed"] else 0.0
+    return stats
+
+
+def log_verification_stats():
+    stats = get_verification_stats()
+    logging.info(f"✉️ Verification: {stats['completed']}/{stats['submitted']} done ({stats['verified']} verified, "
+                 f"{stats['failed']} failed, {stats['pending']} pending), avg {stats['avg_seconds']}s per lead")